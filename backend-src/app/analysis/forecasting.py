@@ -0,0 +1,150 @@
+import logging
+import time
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Dict, Optional, Sequence
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+METHODS = ("ses", "holt")
+
+# Smoothing parameters tried for every series; the best by one-step-ahead squared error wins
+ALPHA_GRID = np.array([0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.8, 0.95])
+BETA_GRID = np.array([0.01, 0.05, 0.1, 0.2, 0.4])
+
+
+@dataclass
+class PanelForecast:
+    method: str
+    point: np.ndarray  # (series, horizon)
+    lower: np.ndarray
+    upper: np.ndarray
+    alpha: np.ndarray  # Chosen per series
+    beta: Optional[np.ndarray]  # Holt only
+    rmse: np.ndarray  # One-step-ahead, in-sample
+    interval: float
+    fit_seconds: float
+
+    def series(self, i: int) -> Dict:
+        result = {
+            "forecast": self.point[i].tolist(),
+            "lower": self.lower[i].tolist(),
+            "upper": self.upper[i].tolist(),
+            "alpha": float(self.alpha[i]),
+            "rmse": float(self.rmse[i])
+        }
+        if self.beta is not None:
+            result["beta"] = float(self.beta[i])
+        return result
+
+
+def to_panel(series: Sequence[Sequence[float]]) -> np.ndarray:
+    """Right-aligned ``(series, time)`` array; shorter series are NaN-padded at the start"""
+    length = max((len(values) for values in series), default=0)
+    panel = np.full((len(series), length), np.nan)
+    for i, values in enumerate(series):
+        if len(values):
+            panel[i, length - len(values):] = values
+    return panel
+
+
+class ForecastEngine:
+    """Simple exponential smoothing and Holt's linear trend, fitted across a panel at once.
+
+    Every series and every candidate smoothing parameter is updated in the same
+    NumPy step, so a fit is one loop over time rather than one per series. Series
+    are processed in blocks of ``chunk_size`` to bound memory. Missing values
+    (NaN) are skipped: the state is carried forward by the model's own forecast.
+    Intervals use the analytic ETS(A,N,N) / ETS(A,A,N) forecast variance.
+    """
+
+    def __init__(self, method: str = "holt", horizon: int = 4, interval: float = 0.95, chunk_size: int = 20000):
+        if method not in METHODS:
+            raise ValueError(f"Unknown forecasting method '{method}'; use one of {', '.join(METHODS)}")
+        self.method = method
+        self.horizon = horizon
+        self.interval = interval
+        self.chunk_size = chunk_size
+
+    def _grid(self):
+        if self.method == "ses":
+            return ALPHA_GRID.copy(), np.zeros_like(ALPHA_GRID)
+        alphas, betas = np.meshgrid(ALPHA_GRID, BETA_GRID, indexing="ij")
+        return alphas.ravel(), betas.ravel()
+
+    def _fit_block(self, y: np.ndarray):
+        n, length = y.shape
+        observed = ~np.isnan(y)
+        counts = np.cumsum(observed, axis=1)
+        first = np.argmax(counts >= 1, axis=1)
+        rows = np.arange(n)
+        level0 = y[rows, first]
+        trend0 = np.zeros(n)
+        if self.method == "holt":
+            has_two = counts[:, -1] >= 2
+            second = np.argmax(counts >= 2, axis=1)
+            trend0 = np.where(has_two, (y[rows, second] - level0) / np.maximum(second - first, 1), 0.0)
+
+        alphas, betas = self._grid()
+        a, b = alphas[:, None], betas[:, None]  # (grid, 1) against (grid, series) state
+        level = np.repeat(level0[None, :], len(alphas), axis=0)
+        trend = np.repeat(trend0[None, :], len(alphas), axis=0)
+        sse = np.zeros_like(level)
+        errors = np.zeros(n)
+
+        for t in range(length):
+            started = t > first  # The first observation only initializes the state
+            y_t = np.nan_to_num(y[:, t])
+            update = observed[:, t] & started
+            forecast = level + trend
+            error = np.where(update, y_t - forecast, 0.0)
+            sse += error ** 2
+            errors += update
+            new_level = np.where(started, forecast + a * error, level)
+            if self.method == "holt":
+                trend = np.where(started, trend + a * b * error, trend)
+            level = new_level
+
+        best = np.argmin(sse, axis=0)
+        pick = lambda grid_values: np.take_along_axis(grid_values, best[None, :], axis=0)[0]
+        level, trend, sse = pick(level), pick(trend), pick(sse)
+        alpha, beta = alphas[best], betas[best]
+
+        params = 2 if self.method == "ses" else 4  # Smoothing parameters plus initial states
+        sigma2 = sse / np.maximum(errors - params, 1)
+        h = np.arange(1, self.horizon + 1)[None, :]
+        # Trend updates by alpha * beta * error, which is the ETS trend smoothing parameter
+        alpha_, beta_ = alpha[:, None], (alpha * beta)[:, None]
+        if self.method == "ses":
+            variance_factor = 1 + (h - 1) * alpha_ ** 2
+        else:
+            variance_factor = 1 + (h - 1) * (alpha_ ** 2 + alpha_ * beta_ * h + beta_ ** 2 * h * (2 * h - 1) / 6)
+        point = level[:, None] + h * trend[:, None]
+        spread = NormalDist().inv_cdf(0.5 + self.interval / 2) * np.sqrt(sigma2[:, None] * variance_factor)
+        rmse = np.sqrt(sse / np.maximum(errors, 1))
+        return point, point - spread, point + spread, alpha, beta, rmse
+
+    def forecast(self, panel: np.ndarray) -> PanelForecast:
+        """Forecast every row of a ``(series, time)`` panel; each row needs at least one observation"""
+        panel = np.asarray(panel, dtype=np.float64)
+        if panel.ndim != 2 or not panel.shape[1]:
+            raise ValueError("Expected a (series, time) panel with at least one period")
+        if np.isnan(panel).all(axis=1).any():
+            raise ValueError("Every series needs at least one observation")
+        started = time.perf_counter()
+        blocks = [self._fit_block(panel[start:start + self.chunk_size]) for start in range(0, len(panel), self.chunk_size)]
+        point, lower, upper, alpha, beta, rmse = (np.concatenate(parts) for parts in zip(*blocks))
+        fit_seconds = time.perf_counter() - started
+        logger.info(f"Forecast {len(panel)} series ({self.method}, horizon {self.horizon}) in {fit_seconds:.2f}s")
+        return PanelForecast(
+            method=self.method,
+            point=point,
+            lower=lower,
+            upper=upper,
+            alpha=alpha,
+            beta=beta if self.method == "holt" else None,
+            rmse=rmse,
+            interval=self.interval,
+            fit_seconds=fit_seconds
+        )
@@ -0,0 +1,228 @@
+import asyncio
+import io
+import json
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, BinaryIO, Callable, Dict, Iterable, Iterator, Optional, TypeVar
+import numpy as np
+import pandas as pd
+from app.analysis.segmentation import FEATURES
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+T = TypeVar("T")
+
+CSV_TYPES = {"text/csv", "application/csv"}
+PARQUET_TYPES = {"application/vnd.apache.parquet", "application/x-parquet", "application/parquet"}
+ARROW_STREAM_TYPES = {"application/vnd.apache.arrow.stream", "application/x-arrow-stream"}
+
+
+class IngestionError(ValueError):
+    """An upload that can't be read as customer features"""
+
+
+@dataclass
+class IngestionStats:
+    rows: int = 0
+    rejected: int = 0  # Rows dropped for missing, non-finite or negative features
+    chunks: int = 0
+
+
+def validate_chunk(chunk: np.ndarray, stats: IngestionStats) -> np.ndarray:
+    """Rows with every feature finite and non-negative; the rest are counted as rejected"""
+    valid = np.isfinite(chunk).all(axis=1) & (chunk >= 0).all(axis=1)
+    rejected = len(chunk) - int(valid.sum())
+    stats.chunks += 1
+    stats.rows += len(chunk) - rejected
+    if rejected:
+        stats.rejected += rejected
+        return chunk[valid]
+    return chunk
+
+
+def _to_float(values) -> np.ndarray:
+    """A feature column as float64; unparseable cells become NaN so validation rejects just their rows"""
+    values = np.asarray(values)
+    if values.dtype.kind in "biuf":
+        return values.astype(np.float64, copy=False)
+    return pd.to_numeric(pd.Series(values, copy=False), errors="coerce").to_numpy(dtype=np.float64)
+
+
+def csv_chunks(source: BinaryIO, chunk_size: int) -> Iterator[np.ndarray]:
+    """Feature columns as float64, ``chunk_size`` rows at a time"""
+    try:
+        # Clean numeric columns parse straight to float64; a chunk with a bad cell is coerced per column
+        reader = pd.read_csv(source, usecols=FEATURES, chunksize=chunk_size)
+        for frame in reader:
+            yield np.column_stack([_to_float(frame[name].to_numpy()) for name in FEATURES])
+    except ValueError as e:
+        raise IngestionError(f"Invalid CSV: {e}") from e
+
+
+def _batch_to_array(batch) -> np.ndarray:
+    missing = [name for name in FEATURES if name not in batch.schema.names]
+    if missing:
+        raise IngestionError(f"Missing columns: {', '.join(missing)}")
+    try:
+        # Nulls arrive as NaN (numeric) or None (object) and are rejected by validation
+        return np.column_stack([_to_float(batch.column(name).to_numpy(zero_copy_only=False)) for name in FEATURES])
+    except (TypeError, ValueError, pa.ArrowInvalid) as e:
+        raise IngestionError(f"Unreadable feature column: {e}") from e
+
+
+def arrow_stream_chunks(source: BinaryIO, chunk_size: int) -> Iterator[np.ndarray]:
+    """Arrow IPC stream, read batch by batch as the bytes arrive"""
+    if not PYARROW_AVAILABLE:
+        raise IngestionError("Arrow uploads need pyarrow installed")
+    try:
+        for batch in pa.ipc.open_stream(source):
+            for start in range(0, batch.num_rows, chunk_size):
+                yield _batch_to_array(batch.slice(start, chunk_size))
+    except pa.ArrowInvalid as e:
+        raise IngestionError(f"Invalid Arrow stream: {e}") from e
+
+
+def parquet_chunks(source: BinaryIO, chunk_size: int, spool_bytes: int) -> Iterator[np.ndarray]:
+    """Parquet row groups; the footer is at the end, so the upload is spooled (to disk past ``spool_bytes``) first"""
+    if not PYARROW_AVAILABLE:
+        raise IngestionError("Parquet uploads need pyarrow installed")
+    with tempfile.SpooledTemporaryFile(max_size=spool_bytes) as spooled:
+        while True:
+            block = source.read(1 << 20)
+            if not block:
+                break
+            spooled.write(block)
+        spooled.seek(0)
+        try:
+            parquet = pa.parquet.ParquetFile(spooled)
+            for batch in parquet.iter_batches(batch_size=chunk_size, columns=[name for name in FEATURES if name in parquet.schema_arrow.names]):
+                yield _batch_to_array(batch)
+        except pa.ArrowInvalid as e:
+            raise IngestionError(f"Invalid Parquet file: {e}") from e
+
+
+def parse_upload(source: BinaryIO, content_type: str, chunk_size: int, spool_bytes: int = 64 * 2 ** 20) -> Iterator[np.ndarray]:
+    """Feature chunks from an upload body of the given content type"""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in CSV_TYPES:
+        return csv_chunks(source, chunk_size)
+    if media_type in ARROW_STREAM_TYPES:
+        return arrow_stream_chunks(source, chunk_size)
+    if media_type in PARQUET_TYPES:
+        return parquet_chunks(source, chunk_size, spool_bytes)
+    raise IngestionError(f"Unsupported content type '{media_type}'; send text/csv, Parquet or an Arrow stream")
+
+
+def ndjson_records(source: BinaryIO, parse: Callable[[Dict[str, Any]], T]) -> Iterator[T]:
+    """One parsed record per non-blank line of newline-delimited JSON, read as the bytes arrive"""
+    for number, line in enumerate(io.BufferedReader(source), start=1):
+        if not line.strip():
+            continue
+        try:
+            yield parse(json.loads(line))
+        except (TypeError, ValueError) as e:
+            raise IngestionError(f"Line {number}: {e}") from e
+
+
+class ArraySpool:
+    """Validated feature rows appended to a temporary file as raw float64.
+
+    Uploads are parsed once; later passes over the data re-read the spool through
+    a memory map instead of parsing again or holding every row in memory.
+    """
+
+    def __init__(self, width: int = len(FEATURES)):
+        self.width = width
+        self.rows = 0
+        self._file = tempfile.NamedTemporaryFile(prefix="segment-upload-", suffix=".f64", delete=False)
+
+    def append(self, chunk: np.ndarray):
+        np.ascontiguousarray(chunk, dtype=np.float64).tofile(self._file)
+        self.rows += len(chunk)
+
+    def tee(self, chunks: Iterable[np.ndarray]) -> Iterator[np.ndarray]:
+        """Pass chunks through, spooling each one"""
+        for chunk in chunks:
+            self.append(chunk)
+            yield chunk
+
+    def chunks(self, chunk_size: int) -> Callable[[], Iterator[np.ndarray]]:
+        """Re-iterable chunk views over the spooled rows"""
+        def iterate():
+            self._file.flush()
+            if not self.rows:
+                return
+            rows = np.memmap(self._file.name, dtype=np.float64, mode="r", shape=(self.rows, self.width))
+            for start in range(0, self.rows, chunk_size):
+                yield rows[start:start + chunk_size]
+        return iterate
+
+    def close(self):
+        self._file.close()
+        try:
+            os.unlink(self._file.name)
+        except OSError:
+            pass
+
+
+class AsyncStreamReader(io.RawIOBase):
+    """Blocking file object over an async byte stream, for parsers running in a worker thread.
+
+    Each read waits on the event loop for the next piece of the request body, so
+    parsing proceeds while the upload is still arriving.
+    """
+
+    def __init__(self, stream: AsyncIterator[bytes], loop: asyncio.AbstractEventLoop):
+        self._stream = stream.__aiter__()
+        self._loop = loop
+        self._buffer = b""
+        self._done = False
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def _next_piece(self) -> Optional[bytes]:
+        async def next_piece():
+            try:
+                return await self._stream.__anext__()
+            except StopAsyncIteration:
+                return None
+        return asyncio.run_coroutine_threadsafe(next_piece(), self._loop).result()
+
+    def readinto(self, buffer) -> int:
+        while not self._buffer and not self._done:
+            piece = self._next_piece()
+            if piece is None:
+                self._done = True
+            else:
+                self._buffer = memoryview(piece)
+                self.bytes_read += len(piece)
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    def read(self, size: int = -1) -> bytes:
+        """Exactly ``size`` bytes unless the body ends first; Arrow's stream reader treats a short read as truncation"""
+        if size is None or size < 0:
+            return self.readall()
+        data = bytearray(size)
+        view = memoryview(data)
+        filled = 0
+        while filled < size:
+            count = self.readinto(view[filled:])
+            if not count:
+                break
+            filled += count
+        return bytes(data[:filled])
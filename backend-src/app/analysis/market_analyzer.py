@@ -1,10 +1,25 @@
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional, Tuple
 from pydantic import BaseModel
 import numpy as np
 from scipy import stats
 from dataclasses import dataclass
 import pandas as pd
 from app.models.business import BusinessProfile, Location, Challenge, TechnologyTool
+from app.analysis.ranking import TopK, batched
+from app.analysis.scenarios import ScenarioAssumptions, ScenarioEngine
+from app.analysis.spatial_index import competitor_index
+from app.core.config import settings
+
+# Competitor counts assumed for locations without coordinates or before competitors are loaded
+ESTIMATED_DIRECT_COMPETITORS = 10
+ESTIMATED_INDIRECT_COMPETITORS = 20
+# Market share taken by the estimated competitors; indexed counts are scored on the same curve
+ESTIMATED_COMPETITOR_SHARE = 0.15
+# Weighted competitor count (indirect ones counting half) at which competitors take half the market
+COMPETITOR_SHARE_HALF_COUNT = (
+    (ESTIMATED_DIRECT_COMPETITORS + 0.5 * ESTIMATED_INDIRECT_COMPETITORS)
+    * (1 - ESTIMATED_COMPETITOR_SHARE) / ESTIMATED_COMPETITOR_SHARE
+)
 
 @dataclass
 class MarketMetrics:
@@ -54,11 +69,7 @@ class MarketAnalyzer:
         growth_potential = self._forecast_growth(location)
         
         # Calculate location score based on multiple factors
-        location_score = np.mean([
-            market_size / self.profile.monthly_revenue,
-            1 - competition.market_share,
-            growth_potential / self.market_data["market_growth_rate"]
-        ])
+        location_score = float(self._location_scores(market_size, competition.market_share, growth_potential))
 
         risk_factors = self._identify_risk_factors(location, competition)
         recommendations = self._generate_location_recommendations(
@@ -74,6 +85,56 @@ class MarketAnalyzer:
             recommendations=recommendations
         )
 
+    def _location_scores(self, market_sizes, competitor_shares, growth_forecasts) -> np.ndarray:
+        """Location score formula; takes scalars or one array entry per location"""
+        return (
+            np.asarray(market_sizes) / self.profile.monthly_revenue
+            + (1 - np.asarray(competitor_shares))
+            + np.asarray(growth_forecasts) / self.market_data["market_growth_rate"]
+        ) / 3
+
+    def rank_locations(self, candidates: Iterable[Location], k: int = 10, chunk_size: Optional[int] = None) -> Dict:
+        """Score candidate locations in array batches and fully analyze only the best ``k``.
+
+        Candidates are consumed in chunks and cut back to the current top ``k``
+        after each one, so memory follows ``k`` and the chunk size rather than the
+        number of candidates.
+        """
+        leaders: TopK[Location] = TopK(k)
+        for chunk in batched(candidates, chunk_size or settings.LOCATION_SCREEN_CHUNK):
+            scores = self._location_scores(
+                self._calculate_market_sizes(chunk),
+                self._competitor_shares(chunk),
+                self._forecast_growths(chunk)
+            )
+            leaders.push(scores, chunk)
+
+        return {
+            "screened": leaders.seen,
+            "k": k,
+            "top": [
+                {"rank": rank, "location_id": location.id, **self.analyze_location(location).dict()}
+                for rank, (_, location) in enumerate(leaders.result(), start=1)
+            ]
+        }
+
+    def simulate_location(self, location: Location, n_paths: Optional[int] = None, seed: Optional[int] = None) -> Dict:
+        """Monte Carlo risk bands around the deterministic location analysis"""
+        competition = self._analyze_competition(location)
+        assumptions = ScenarioAssumptions(
+            market_size=self._calculate_market_size(location),
+            monthly_revenue=self.profile.monthly_revenue,
+            growth_mean=self._forecast_growth(location),
+            saturation_mean=self.market_data["industry_saturation"],
+            competitor_share_mean=competition.market_share,
+            reference_growth=self.market_data["market_growth_rate"]
+        )
+        engine = ScenarioEngine(
+            n_paths=n_paths or settings.SCENARIO_PATHS,
+            horizon_years=settings.SCENARIO_HORIZON_YEARS
+        )
+        return engine.simulate(assumptions, seed=seed)
+
     def analyze_technology_stack(self) -> Dict:
         """Analyze current technology stack and recommend improvements"""
         tech_stack = self.profile.technology_stack
@@ -104,30 +165,84 @@ class MarketAnalyzer:
 
     def _calculate_market_size(self, location: Location) -> float:
         """Calculate total addressable market size for a location"""
+        return float(self._calculate_market_sizes([location])[0])
+
+    def _calculate_market_sizes(self, locations: List[Location]) -> np.ndarray:
+        """Total addressable market size per location"""
         # This would use real market data and ML models in production
         base_market_size = 1000000  # Example base market size
-        location_multiplier = 1.2  # Based on location-specific factors
+        location_multipliers = np.full(len(locations), 1.2)  # Based on location-specific factors
         industry_multiplier = 1.5  # Based on industry growth
-        
-        return base_market_size * location_multiplier * industry_multiplier
+
+        return base_market_size * location_multipliers * industry_multiplier
 
     def _analyze_competition(self, location: Location) -> CompetitorAnalysis:
         """Analyze competitive landscape in a location"""
-        # This would use real competitor data in production
+        latitudes, longitudes, located = self._coordinates([location])
+        if located[0] and self._competitors_indexed():
+            stats = competitor_index.competition(latitudes[0], longitudes[0], self._industry())
+            return CompetitorAnalysis(
+                direct_competitors=stats.direct,
+                indirect_competitors=stats.indirect,
+                market_share=float(self._competitor_share(stats.direct, stats.indirect)),
+                competitive_advantage_score=0.7,
+                threat_level=self._threat_level(stats.direct)
+            )
+
+        # Estimate for locations without coordinates or before competitors are loaded
         return CompetitorAnalysis(
-            direct_competitors=10,
-            indirect_competitors=20,
-            market_share=0.15,
+            direct_competitors=ESTIMATED_DIRECT_COMPETITORS,
+            indirect_competitors=ESTIMATED_INDIRECT_COMPETITORS,
+            market_share=float(self._competitor_share(ESTIMATED_DIRECT_COMPETITORS, ESTIMATED_INDIRECT_COMPETITORS)),
             competitive_advantage_score=0.7,
-            threat_level="medium"
+            threat_level=self._threat_level(ESTIMATED_DIRECT_COMPETITORS)
         )
 
+    def _competitor_shares(self, locations: List[Location]) -> np.ndarray:
+        """Market share held by competitors, per location, from one batched index query"""
+        # Same formula for estimated and indexed counts, so ranking doesn't favour either
+        shares = np.full(len(locations), self._competitor_share(ESTIMATED_DIRECT_COMPETITORS, ESTIMATED_INDIRECT_COMPETITORS))
+        latitudes, longitudes, located = self._coordinates(locations)
+        if located.any() and self._competitors_indexed():
+            direct, indirect = competitor_index.counts(latitudes[located], longitudes[located], self._industry())
+            shares[located] = self._competitor_share(direct, indirect)
+        return shares
+
+    @staticmethod
+    def _competitor_share(direct, indirect):
+        """Market share taken by competitors, indirect ones counting half; the estimated counts give ESTIMATED_COMPETITOR_SHARE"""
+        weighted = np.asarray(direct) + 0.5 * np.asarray(indirect)
+        return weighted / (weighted + COMPETITOR_SHARE_HALF_COUNT)
+
+    @staticmethod
+    def _threat_level(direct: int) -> str:
+        return "high" if direct >= 10 else "medium" if direct >= 3 else "low"
+
+    @staticmethod
+    def _coordinates(locations: List[Location]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Latitudes, longitudes and which locations have both"""
+        latitudes = np.array([getattr(location, "latitude", None) for location in locations], dtype=np.float64)
+        longitudes = np.array([getattr(location, "longitude", None) for location in locations], dtype=np.float64)
+        return latitudes, longitudes, ~(np.isnan(latitudes) | np.isnan(longitudes))
+
+    @staticmethod
+    def _competitors_indexed() -> bool:
+        competitor_index.refresh()
+        return len(competitor_index) > 0
+
+    def _industry(self) -> Optional[str]:
+        return getattr(self.profile, "industry", None)
+
     def _forecast_growth(self, location: Location) -> float:
         """Forecast market growth potential"""
+        return float(self._forecast_growths([location])[0])
+
+    def _forecast_growths(self, locations: List[Location]) -> np.ndarray:
+        """Market growth potential per location"""
         # This would use time series analysis and ML models in production
         base_growth = self.market_data["market_growth_rate"]
-        location_factor = 1.1  # Location-specific growth modifier
-        return base_growth * location_factor
+        location_factors = np.full(len(locations), 1.1)  # Location-specific growth modifiers
+        return base_growth * location_factors
 
     def _calculate_tech_efficiency(self, tech_stack: List[TechnologyTool]) -> float:
         """Calculate efficiency score of current technology stack"""
@@ -0,0 +1,47 @@
+from typing import Any, Generic, Iterable, Iterator, List, Sequence, Tuple, TypeVar
+import numpy as np
+
+T = TypeVar("T")
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Consecutive lists of ``size`` items; only one batch is held at a time"""
+    batch: List[T] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class TopK(Generic[T]):
+    """Highest-scoring ``k`` items over a stream of scored batches.
+
+    Each batch is merged with the current leaders and cut back to ``k`` with
+    ``argpartition``, so memory is ``k`` plus one batch however many items pass
+    through. NaN scores never rank.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self.seen = 0
+        self._scores = np.empty(0)
+        self._items: List[T] = []
+
+    def push(self, scores: np.ndarray, items: Sequence[T]):
+        scores = np.nan_to_num(np.asarray(scores, dtype=np.float64), nan=-np.inf)
+        self.seen += len(items)
+        merged = np.concatenate([self._scores, scores])
+        pool: List[Any] = self._items + list(items)
+        if len(merged) > self.k:
+            keep = np.argpartition(-merged, self.k - 1)[:self.k]
+            merged = merged[keep]
+            pool = [pool[i] for i in keep]
+        self._scores, self._items = merged, pool
+
+    def result(self) -> List[Tuple[float, T]]:
+        """Leaders, best first"""
+        order = np.argsort(-self._scores, kind="stable")
+        return [(float(self._scores[i]), self._items[i]) for i in order]
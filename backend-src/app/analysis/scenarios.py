@@ -0,0 +1,89 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+@dataclass
+class ScenarioAssumptions:
+    """Distributions a location's outlook is sampled from"""
+    market_size: float  # Current total addressable market
+    monthly_revenue: float  # The business's own revenue, which location scores are relative to
+    growth_mean: float  # Expected annual market growth
+    growth_sd: float = 0.05  # Year-to-year volatility of that growth
+    saturation_mean: float = 0.65  # Share of the market's capacity already reached
+    saturation_concentration: float = 20.0  # Beta concentration; higher is more certain
+    competitor_share_mean: float = 0.15  # Share held by direct competitors
+    competitor_concentration: float = 30.0
+    reference_growth: Optional[float] = None  # Growth that scores 1.0; defaults to growth_mean
+
+
+def _beta(rng: np.random.Generator, mean: float, concentration: float, size: int) -> np.ndarray:
+    mean = min(max(mean, 1e-3), 1 - 1e-3)
+    return rng.beta(mean * concentration, (1 - mean) * concentration, size)
+
+
+def _bands(values: np.ndarray, percentiles: Sequence[int]) -> Dict[str, list]:
+    """Percentiles over paths (axis 0), keyed ``p5``, ``p50``..."""
+    bands = np.percentile(values, percentiles, axis=0)
+    return {f"p{p}": np.round(band, 4).tolist() for p, band in zip(percentiles, bands)}
+
+
+class ScenarioEngine:
+    """Monte Carlo market outlook as whole-array NumPy operations.
+
+    Each path draws a saturation level, a competitor share and a year-by-year
+    growth series. The market grows logistically: growth shrinks as the market
+    approaches the capacity implied by its saturation. Paths are never looped
+    over; only the handful of simulated years is, on arrays of every path.
+    """
+
+    def __init__(self, n_paths: int = 100_000, horizon_years: int = 5, percentiles: Sequence[int] = PERCENTILES):
+        self.n_paths = n_paths
+        self.horizon_years = horizon_years
+        self.percentiles = tuple(percentiles)
+
+    def simulate(self, assumptions: ScenarioAssumptions, seed: Optional[int] = None) -> Dict:
+        """Percentile bands for market size per year and for the location score at the horizon"""
+        started = time.perf_counter()
+        rng = np.random.default_rng(seed)
+        n, years = self.n_paths, self.horizon_years
+
+        saturation = _beta(rng, assumptions.saturation_mean, assumptions.saturation_concentration, n)
+        competitor_share = _beta(rng, assumptions.competitor_share_mean, assumptions.competitor_concentration, n)
+        growth = rng.normal(assumptions.growth_mean, assumptions.growth_sd, (n, years))
+
+        # Logistic growth towards capacity; penetration is the market's share of its own capacity
+        sizes = np.empty((n, years + 1))
+        sizes[:, 0] = assumptions.market_size
+        penetration = saturation
+        for year in range(years):
+            penetration = np.clip(penetration * (1 + growth[:, year] * (1 - penetration)), 1e-6, 1.0)
+            sizes[:, year + 1] = assumptions.market_size * penetration / saturation
+
+        # Same three factors as MarketAnalyzer.analyze_location, per path
+        annual_growth = (sizes[:, -1] / sizes[:, 0]) ** (1 / years) - 1
+        reference_growth = assumptions.reference_growth or assumptions.growth_mean or 1.0
+        location_score = (
+            sizes[:, -1] / assumptions.monthly_revenue
+            + (1 - competitor_share)
+            + annual_growth / reference_growth
+        ) / 3
+
+        result = {
+            "paths": n,
+            "horizon_years": years,
+            "seed": seed,
+            "market_size": _bands(sizes, self.percentiles),
+            "annual_growth": _bands(annual_growth, self.percentiles),
+            "location_score": _bands(location_score, self.percentiles),
+            "probability_of_decline": round(float((sizes[:, -1] < sizes[:, 0]).mean()), 4)
+        }
+        result["simulation_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        logger.debug(f"Simulated {n} scenario paths over {years} years in {result['simulation_ms']}ms")
+        return result
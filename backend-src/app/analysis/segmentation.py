@@ -0,0 +1,292 @@
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.metrics import silhouette_score
+from sklearn.preprocessing import StandardScaler
+
+logger = logging.getLogger(__name__)
+
+FEATURES = ["revenue", "frequency", "recency"]
+
+# Called as progress(stage, rows_done, rows_total); rows_total is None when unknown
+ProgressCallback = Callable[[str, int, Optional[int]], None]
+
+
+@dataclass
+class SegmentationResult:
+    k: int
+    centers: np.ndarray  # In original feature units
+    segment_sizes: List[int]
+    inertia: float
+    n_samples: int
+    fit_seconds: float
+    labels: Optional[np.ndarray] = None
+    k_scores: Dict[int, float] = field(default_factory=dict)  # Silhouette per candidate k, when chosen automatically
+
+    def to_dict(self) -> Dict:
+        result = {
+            "k": self.k,
+            "segment_centers": self.centers.tolist(),
+            "segment_sizes": self.segment_sizes,
+            "inertia": round(self.inertia, 4),
+            "n_samples": self.n_samples,
+            "fit_seconds": round(self.fit_seconds, 3)
+        }
+        if self.labels is not None:
+            result["segments"] = self.labels.tolist()
+        if self.k_scores:
+            result["k_scores"] = {k: round(score, 4) for k, score in self.k_scores.items()}
+        return result
+
+
+def feature_matrix(customers: List[Dict]) -> np.ndarray:
+    """``(rows, len(FEATURES))`` float array from customer records; a missing feature raises KeyError"""
+    return np.array([[customer[name] for name in FEATURES] for customer in customers], dtype=np.float64).reshape(-1, len(FEATURES))
+
+
+@dataclass
+class SegmentationModel:
+    """A fitted segmentation: scaler statistics, centers and the baseline used for drift.
+
+    Centers are kept in standardized units, so assigning a customer is one scale
+    step and one nearest-center lookup.
+    """
+    mean: np.ndarray
+    scale: np.ndarray
+    centers: np.ndarray  # Standardized
+    baseline_distance: float  # Mean squared distance to the nearest center at fit time
+    baseline_shares: List[float]  # Fraction of customers per segment at fit time
+    n_samples: int
+    created_at: float = field(default_factory=time.time)
+    version: Optional[int] = None
+
+    @classmethod
+    def from_fit(cls, engine: "SegmentationEngine", result: SegmentationResult) -> "SegmentationModel":
+        return cls(
+            mean=engine.scaler.mean_.copy(),
+            scale=engine.scaler.scale_.copy(),
+            centers=engine.kmeans.cluster_centers_.copy(),
+            baseline_distance=result.inertia / result.n_samples,
+            baseline_shares=[size / result.n_samples for size in result.segment_sizes],
+            n_samples=result.n_samples
+        )
+
+    @property
+    def k(self) -> int:
+        return len(self.centers)
+
+    def assign(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Nearest segment and squared standardized distance to it, per row"""
+        scaled = (np.asarray(X, dtype=np.float64) - self.mean) / self.scale
+        # |x - c|^2 = |x|^2 - 2x.c + |c|^2: one matrix product instead of a (rows, k, features) array
+        distances = (scaled ** 2).sum(axis=1)[:, None] - 2 * scaled @ self.centers.T + (self.centers ** 2).sum(axis=1)
+        labels = distances.argmin(axis=1)
+        return labels, np.maximum(distances[np.arange(len(labels)), labels], 0.0)
+
+    def to_dict(self) -> Dict:
+        return {
+            "mean": self.mean.tolist(),
+            "scale": self.scale.tolist(),
+            "centers": self.centers.tolist(),
+            "baseline_distance": self.baseline_distance,
+            "baseline_shares": self.baseline_shares,
+            "n_samples": self.n_samples,
+            "created_at": self.created_at,
+            "version": self.version
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SegmentationModel":
+        return cls(
+            mean=np.array(data["mean"]),
+            scale=np.array(data["scale"]),
+            centers=np.array(data["centers"]),
+            baseline_distance=data["baseline_distance"],
+            baseline_shares=data["baseline_shares"],
+            n_samples=data["n_samples"],
+            created_at=data["created_at"],
+            version=data.get("version")
+        )
+
+
+def array_chunks(X: np.ndarray, chunk_size: int) -> Callable[[], Iterator[np.ndarray]]:
+    """Re-iterable chunk views over an in-memory array (no copies)"""
+    return lambda: (X[start:start + chunk_size] for start in range(0, len(X), chunk_size))
+
+
+class _Reservoir:
+    """Uniform row sample of a stream in fixed memory"""
+
+    def __init__(self, size: int, rng: np.random.Generator):
+        self.size = size
+        self.rng = rng
+        self.rows: Optional[np.ndarray] = None
+        self.seen = 0
+
+    def add(self, chunk: np.ndarray):
+        seen, self.seen = self.seen, self.seen + len(chunk)
+        if self.rows is None:
+            self.rows = chunk[:0].copy()
+        if len(self.rows) + len(chunk) <= self.size:
+            self.rows = np.concatenate([self.rows, chunk])
+            return
+        # Keep old and new rows in proportion to how many each side represents
+        keep_old = min(len(self.rows), int(round(self.size * seen / self.seen)))
+        keep_new = min(len(chunk), self.size - keep_old)
+        old = self.rows[self.rng.choice(len(self.rows), keep_old, replace=False)]
+        new = chunk[self.rng.choice(len(chunk), keep_new, replace=False)]
+        self.rows = np.concatenate([old, new])
+
+
+class SegmentationEngine:
+    """Customer segmentation on standardized features with MiniBatchKMeans.
+
+    Data is consumed as chunks in passes (scaling, clustering, labelling), so memory
+    is bounded by the chunk size rather than the number of customers. With
+    ``n_clusters=None`` the number of segments is picked by silhouette score on a
+    reservoir sample taken during the first pass.
+    """
+
+    def __init__(
+        self,
+        n_clusters: Optional[int] = 4,
+        chunk_size: int = 50_000,
+        k_range: Tuple[int, int] = (2, 8),
+        sample_size: int = 20_000,
+        random_state: int = 42,
+        progress: Optional[ProgressCallback] = None
+    ):
+        self.n_clusters = n_clusters
+        self.chunk_size = chunk_size
+        self.k_range = k_range
+        self.sample_size = sample_size
+        self.random_state = random_state
+        self.progress = progress
+        self.scaler: Optional[StandardScaler] = None
+        self.kmeans: Optional[MiniBatchKMeans] = None
+
+    def _report(self, stage: str, done: int, total: Optional[int]):
+        if self.progress is not None:
+            self.progress(stage, done, total)
+        logger.debug(f"Segmentation {stage}: {done}/{total or '?'} rows")
+
+    def _select_k(self, sample: np.ndarray) -> Tuple[int, Dict[int, float]]:
+        """Best silhouette score over ``k_range`` on the scaled sample"""
+        low, high = self.k_range
+        high = min(high, len(sample) - 1)
+        scores: Dict[int, float] = {}
+        for k in range(low, high + 1):
+            model = MiniBatchKMeans(n_clusters=k, random_state=self.random_state, n_init=3, batch_size=4096)
+            labels = model.fit_predict(sample)
+            if len(np.unique(labels)) < 2:
+                continue
+            scores[k] = float(silhouette_score(sample, labels, sample_size=min(len(sample), 5000), random_state=self.random_state))
+        if not scores:
+            return low, scores
+        return max(scores, key=scores.get), scores
+
+    def fit_chunks(
+        self,
+        chunks: Callable[[], Iterable[np.ndarray]],
+        total_rows: Optional[int] = None,
+        return_labels: bool = True,
+        first_pass: Optional[Iterable[np.ndarray]] = None
+    ) -> SegmentationResult:
+        """Fit from a re-iterable source of ``(rows, len(FEATURES))`` float chunks.
+
+        ``first_pass`` lets the scaling pass consume a one-shot stream (an upload
+        being parsed) while ``chunks`` serves the later passes once it is complete.
+        """
+        started = time.perf_counter()
+        rng = np.random.default_rng(self.random_state)
+
+        # Pass 1: feature means/variances, plus a sample for seeding centers and choosing k
+        self.scaler = StandardScaler()
+        reservoir = _Reservoir(self.sample_size, rng)
+        seen = 0
+        for chunk in (first_pass if first_pass is not None else chunks()):
+            if not len(chunk):
+                continue
+            self.scaler.partial_fit(chunk)
+            reservoir.add(chunk)
+            seen += len(chunk)
+            self._report("scaling", seen, total_rows)
+        if seen == 0:
+            raise ValueError("No customer rows to segment")
+
+        sample = self.scaler.transform(reservoir.rows)
+        k_scores: Dict[int, float] = {}
+        k = self.n_clusters
+        if k is None:
+            k, k_scores = self._select_k(sample)
+            logger.info(f"Selected k={k} from silhouette scores {k_scores}")
+        k = min(k, seen)
+
+        # Pass 2: cluster, starting from centers fitted on the sample so the first chunk
+        # doesn't decide the seeding. partial_fit needs at least k rows per call, so small tails are merged forward
+        seed = MiniBatchKMeans(n_clusters=k, random_state=self.random_state, n_init=3, batch_size=4096).fit(sample)
+        self.kmeans = MiniBatchKMeans(
+            n_clusters=k,
+            init=seed.cluster_centers_,
+            n_init=1,
+            # Chunks are often sorted (by signup date, region...); reassigning centers that a
+            # chunk doesn't touch would throw away the seeding, so only the sample decides them
+            reassignment_ratio=0.0,
+            random_state=self.random_state,
+            batch_size=min(self.chunk_size, 4096)
+        )
+        done = 0
+        pending: List[np.ndarray] = []
+        pending_rows = 0
+        for chunk in chunks():
+            pending.append(self.scaler.transform(chunk))
+            pending_rows += len(chunk)
+            if pending_rows >= max(k, self.kmeans.batch_size):
+                self.kmeans.partial_fit(np.concatenate(pending) if len(pending) > 1 else pending[0])
+                done += pending_rows
+                pending, pending_rows = [], 0
+                self._report("clustering", done, total_rows)
+        if pending:
+            self.kmeans.partial_fit(np.concatenate(pending) if len(pending) > 1 else pending[0])
+            self._report("clustering", done + pending_rows, total_rows)
+
+        # Pass 3: segment sizes and inertia (and labels, 4 bytes per row, if wanted)
+        labels, sizes, inertia = self._label(chunks, total_rows, return_labels)
+        return SegmentationResult(
+            k=k,
+            centers=self.scaler.inverse_transform(self.kmeans.cluster_centers_),
+            segment_sizes=sizes,
+            inertia=inertia,
+            n_samples=seen,
+            fit_seconds=time.perf_counter() - started,
+            labels=labels,
+            k_scores=k_scores
+        )
+
+    def _label(
+        self,
+        chunks: Callable[[], Iterable[np.ndarray]],
+        total_rows: Optional[int],
+        return_labels: bool
+    ) -> Tuple[Optional[np.ndarray], List[int], float]:
+        labels = []
+        sizes = np.zeros(self.kmeans.n_clusters, dtype=np.int64)
+        inertia = 0.0
+        done = 0
+        for chunk in chunks():
+            scaled = self.scaler.transform(chunk)
+            chunk_labels = self.kmeans.predict(scaled).astype(np.int32)
+            inertia += float(((scaled - self.kmeans.cluster_centers_[chunk_labels]) ** 2).sum())
+            sizes += np.bincount(chunk_labels, minlength=len(sizes))
+            if return_labels:
+                labels.append(chunk_labels)
+            done += len(chunk)
+            self._report("labelling", done, total_rows)
+        return (np.concatenate(labels) if return_labels else None), sizes.tolist(), inertia
+
+    def fit(self, X: np.ndarray, return_labels: bool = True) -> SegmentationResult:
+        """Fit an in-memory ``(rows, len(FEATURES))`` array"""
+        return self.fit_chunks(array_chunks(np.asarray(X, dtype=np.float64), self.chunk_size), len(X), return_labels)
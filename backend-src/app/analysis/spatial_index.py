@@ -0,0 +1,325 @@
+import json
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import redis
+from scipy.spatial import cKDTree
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+SYNC_OVERLAP_SECONDS = 5
+
+
+def to_unit_vectors(latitudes, longitudes) -> np.ndarray:
+    """Points on the unit sphere, so straight-line KD-tree distances order like great-circle ones"""
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def chord_length(radius_km: float) -> float:
+    """Straight-line distance on the unit sphere matching a great-circle distance"""
+    return 2 * math.sin(min(radius_km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+def arc_km(chord) -> np.ndarray:
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2, 0, 1))
+
+
+class SpatialIndex:
+    """Points by id in a KD-tree, plus a small delta tree for recent changes.
+
+    Upserts go to the delta and moved or removed points are tombstoned, so a
+    change never rebuilds the main tree; queries combine the main tree, minus
+    tombstones, with the delta. The main tree is rebuilt once pending changes
+    pass ``rebuild_fraction`` of the indexed points.
+    """
+
+    def __init__(self, rebuild_fraction: float = 0.1, min_rebuild: int = 256):
+        self.rebuild_fraction = rebuild_fraction
+        self.min_rebuild = min_rebuild
+        self.rebuilds = 0
+        self._set_tree([], np.empty((0, 3)))
+
+    def __len__(self) -> int:
+        return len(self._tree_ids) - len(self._removed) + len(self._delta)
+
+    def build(self, points: Dict[str, Tuple[float, float]]):
+        """Index ``{id: (latitude, longitude)}`` from scratch"""
+        ids = list(points)
+        coordinates = np.array([points[i] for i in ids], dtype=np.float64).reshape(-1, 2)
+        self._set_tree(ids, to_unit_vectors(coordinates[:, 0], coordinates[:, 1]))
+        self.rebuilds += 1
+
+    def _set_tree(self, ids: List[str], vectors: np.ndarray):
+        self._tree = cKDTree(vectors) if len(ids) else None
+        self._tree_ids = ids
+        self._tree_positions = {point_id: i for i, point_id in enumerate(ids)}
+        self._removed: Dict[str, int] = {}  # Tombstoned id -> position in the main tree
+        self._delta: Dict[str, np.ndarray] = {}
+        self._changed()
+
+    def _changed(self):
+        # Small trees over the delta and the tombstones, rebuilt lazily on the next query
+        self._delta_tree: Optional[Tuple[List[str], Optional[cKDTree]]] = None
+        self._removed_tree: Optional[cKDTree] = None
+
+    def upsert(self, point_id: str, latitude: float, longitude: float):
+        position = self._tree_positions.get(point_id)
+        if position is not None:
+            self._removed[point_id] = position
+        self._delta[point_id] = to_unit_vectors(latitude, longitude)
+        self._after_change()
+
+    def remove(self, point_id: str):
+        position = self._tree_positions.get(point_id)
+        if position is not None:
+            self._removed[point_id] = position
+        self._delta.pop(point_id, None)
+        self._after_change()
+
+    def _after_change(self):
+        if len(self._delta) + len(self._removed) > max(self.min_rebuild, self.rebuild_fraction * len(self._tree_ids)):
+            self.rebuild()
+        else:
+            self._changed()
+
+    def rebuild(self):
+        """Fold the delta and tombstones into a fresh main tree"""
+        keep = [i for i, point_id in enumerate(self._tree_ids) if point_id not in self._removed]
+        ids = [self._tree_ids[i] for i in keep] + list(self._delta)
+        parts = [self._tree.data[keep]] if self._tree is not None else []
+        if self._delta:
+            parts.append(np.array(list(self._delta.values())))
+        self._set_tree(ids, np.concatenate(parts) if parts else np.empty((0, 3)))
+        self.rebuilds += 1
+
+    def _delta_index(self) -> Tuple[List[str], Optional[cKDTree]]:
+        if self._delta_tree is None:
+            ids = list(self._delta)
+            self._delta_tree = (ids, cKDTree(np.array([self._delta[i] for i in ids])) if ids else None)
+        return self._delta_tree
+
+    def _tombstones(self) -> Optional[cKDTree]:
+        if self._removed_tree is None and self._removed:
+            self._removed_tree = cKDTree(self._tree.data[list(self._removed.values())])
+        return self._removed_tree
+
+    def count_within(self, vectors: np.ndarray, radius_km: float) -> np.ndarray:
+        """Points within ``radius_km`` of each query vector (``(n, 3)`` array)"""
+        chord = chord_length(radius_km)
+        counts = np.zeros(len(vectors), dtype=np.int64)
+        if self._tree is not None:
+            counts += self._tree.query_ball_point(vectors, chord, return_length=True)
+            tombstones = self._tombstones()
+            if tombstones is not None:
+                # Tombstoned points are still in the main tree at their old position
+                counts -= tombstones.query_ball_point(vectors, chord, return_length=True)
+        _, delta_tree = self._delta_index()
+        if delta_tree is not None:
+            counts += delta_tree.query_ball_point(vectors, chord, return_length=True)
+        return counts
+
+    def nearest(self, latitude: float, longitude: float, k: int = 5) -> List[Tuple[str, float]]:
+        """Up to ``k`` closest ``(id, km)``"""
+        vector = to_unit_vectors(latitude, longitude)
+        candidates: List[Tuple[str, float]] = []
+        if self._tree is not None:
+            # Ask for extra neighbours so tombstoned ones can be skipped
+            want = min(k + len(self._removed), len(self._tree_ids))
+            chords, indices = self._tree.query(vector, k=want)
+            for chord, i in zip(np.atleast_1d(chords), np.atleast_1d(indices)):
+                if self._tree_ids[i] not in self._removed:
+                    candidates.append((self._tree_ids[i], float(chord)))
+        delta_ids, delta_tree = self._delta_index()
+        if delta_tree is not None:
+            chords, indices = delta_tree.query(vector, k=min(k, len(delta_ids)))
+            candidates.extend((delta_ids[i], float(chord)) for chord, i in zip(np.atleast_1d(chords), np.atleast_1d(indices)))
+        candidates.sort(key=lambda entry: entry[1])
+        return [(point_id, round(float(arc_km(chord)), 3)) for point_id, chord in candidates[:k]]
+
+
+@dataclass
+class CompetitionStats:
+    direct: int
+    indirect: int
+    density_per_km2: float
+    nearest: List[Tuple[str, float]]
+
+
+class CompetitorIndex:
+    """Spatial index of competitor locations, loaded from Redis and kept in sync incrementally.
+
+    Competitors are stored in Redis with an update timestamp; ``refresh`` applies
+    only the records changed since the previous sync. One index covers every
+    competitor and one per industry, so direct (same industry) and indirect
+    counts are each a single tree query. Queries run in worker threads, and even
+    a read can build a delta tree lazily, so refreshes and queries share one lock.
+    """
+
+    def __init__(self, radius_km: float = 5.0, refresh_seconds: float = 60, rebuild_fraction: float = 0.1):
+        self.radius_km = radius_km
+        self.refresh_seconds = refresh_seconds
+        self.rebuild_fraction = rebuild_fraction
+        self._all = SpatialIndex(rebuild_fraction)
+        self._by_industry: Dict[str, SpatialIndex] = {}
+        self._industries: Dict[str, str] = {}  # Competitor id -> industry
+        self._synced_until = 0.0
+        self._checked_at = 0.0
+        self._lock = threading.RLock()
+        try:
+            self.redis_client = redis.Redis(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                db=3,
+                decode_responses=True
+            )
+        except Exception as e:
+            logger.error(f"Failed to initialize Redis competitor index: {e}")
+            self.redis_client = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._all)
+
+    @staticmethod
+    def _industry_key(industry: Optional[str]) -> str:
+        return (industry or "").strip().lower()
+
+    def _industry_index(self, industry: str) -> SpatialIndex:
+        index = self._by_industry.get(industry)
+        if index is None:
+            index = self._by_industry[industry] = SpatialIndex(self.rebuild_fraction)
+        return index
+
+    def apply(self, records: Iterable[Dict[str, Any]]):
+        """Upsert ``{"id", "latitude", "longitude", "industry"}`` records; ``"deleted": true`` removes one"""
+        for record in records:
+            point_id = str(record["id"])
+            previous = self._industries.pop(point_id, None)
+            if previous is not None:
+                self._by_industry[previous].remove(point_id)
+            if record.get("deleted"):
+                self._all.remove(point_id)
+                continue
+            industry = self._industry_key(record.get("industry"))
+            self._industries[point_id] = industry
+            self._all.upsert(point_id, record["latitude"], record["longitude"])
+            self._industry_index(industry).upsert(point_id, record["latitude"], record["longitude"])
+
+    def load(self, records: Iterable[Dict[str, Any]]):
+        """Replace the index with ``records``, building each tree in one go"""
+        points: Dict[str, Tuple[float, float]] = {}
+        industries: Dict[str, str] = {}
+        for record in records:
+            if not record.get("deleted"):
+                point_id = str(record["id"])
+                points[point_id] = (record["latitude"], record["longitude"])
+                industries[point_id] = self._industry_key(record.get("industry"))
+        self._all = SpatialIndex(self.rebuild_fraction)
+        self._all.build(points)
+        by_industry: Dict[str, Dict[str, Tuple[float, float]]] = {}
+        for point_id, industry in industries.items():
+            by_industry.setdefault(industry, {})[point_id] = points[point_id]
+        self._by_industry = {}
+        for industry, industry_points in by_industry.items():
+            self._industry_index(industry).build(industry_points)
+        self._industries = industries
+
+    def save(self, records: List[Dict[str, Any]]):
+        """Persist competitor records for every worker's next refresh"""
+        if not self.redis_client:
+            raise RuntimeError("Competitor store unavailable")
+        now = time.time()
+        pipe = self.redis_client.pipeline()
+        for record in records:
+            pipe.hset("competitors:data", str(record["id"]), json.dumps(record))
+            pipe.zadd("competitors:updated", {str(record["id"]): now})
+        pipe.execute()
+        self._checked_at = 0.0  # This worker picks the change up on its next query
+
+    def _fresh(self) -> bool:
+        return time.time() - self._checked_at < self.refresh_seconds
+
+    def refresh(self, force: bool = False) -> int:
+        """Apply competitor records changed since the last sync; returns how many"""
+        if not self.redis_client or (not force and self._fresh()):
+            return 0
+        with self._lock:
+            # Threads that queued on the lock behind a refresh find the index fresh and skip theirs
+            if not force and self._fresh():
+                return 0
+            self._checked_at = time.time()
+            try:
+                # Overlap the previous sync so a write stamped just before it but committed after isn't missed;
+                # re-applying a record is harmless
+                since = self._synced_until - SYNC_OVERLAP_SECONDS if self._synced_until else "-inf"
+                changed = self.redis_client.zrangebyscore("competitors:updated", since, "+inf", withscores=True)
+                if not changed:
+                    return 0
+                ids = [point_id for point_id, _ in changed]
+                records = [json.loads(data) for data in self.redis_client.hmget("competitors:data", ids) if data]
+                if self._synced_until == 0.0:
+                    self.load(records)
+                else:
+                    self.apply(records)
+                self._synced_until = max(score for _, score in changed)
+                logger.info(f"Competitor index applied {len(records)} changes ({len(self)} competitors)")
+                return len(records)
+            except Exception as e:
+                logger.error(f"Competitor index refresh error: {e}")
+                return 0
+
+    def competition(self, latitude: float, longitude: float, industry: Optional[str] = None, radius_km: Optional[float] = None) -> CompetitionStats:
+        """Direct and indirect competitors within the radius, their density and the nearest few"""
+        self.refresh()
+        radius_km = radius_km or self.radius_km
+        vector = to_unit_vectors(latitude, longitude)[None, :]
+        with self._lock:
+            total = int(self._all.count_within(vector, radius_km)[0])
+            industry_index = self._by_industry.get(self._industry_key(industry)) if industry else None
+            direct = int(industry_index.count_within(vector, radius_km)[0]) if industry_index else (0 if industry else total)
+            nearest = self._all.nearest(latitude, longitude, 5)
+        return CompetitionStats(
+            direct=direct,
+            indirect=total - direct,
+            density_per_km2=total / (math.pi * radius_km ** 2),
+            nearest=nearest
+        )
+
+    def counts(self, latitudes, longitudes, industry: Optional[str] = None, radius_km: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Direct and indirect competitor counts for many locations in one tree query each"""
+        self.refresh()
+        radius_km = radius_km or self.radius_km
+        vectors = to_unit_vectors(latitudes, longitudes).reshape(-1, 3)
+        with self._lock:
+            total = self._all.count_within(vectors, radius_km)
+            if not industry:
+                return total, np.zeros_like(total)
+            industry_index = self._by_industry.get(self._industry_key(industry))
+            direct = industry_index.count_within(vectors, radius_km) if industry_index else np.zeros_like(total)
+        return direct, total - direct
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "competitors": len(self),
+                "industries": len(self._by_industry),
+                "radius_km": self.radius_km,
+                "rebuilds": self._all.rebuilds,
+                "synced_until": self._synced_until
+            }
+
+
+competitor_index = CompetitorIndex(
+    radius_km=settings.COMPETITOR_RADIUS_KM,
+    refresh_seconds=settings.COMPETITOR_INDEX_REFRESH_SECONDS,
+    rebuild_fraction=settings.COMPETITOR_INDEX_REBUILD_FRACTION
+)
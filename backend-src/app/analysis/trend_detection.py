@@ -0,0 +1,240 @@
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from app.core.config import settings
+
+STOPWORDS = frozenset("""
+a about after all also an and any are as at be because been but by can could did do does for from get
+got had has have he her his how i if in into is it its just like me more most my new no not now of on
+one only or our out over rt she so some than that the their them then there these they this to too up
+us was we were what when which who will with would you your amp via
+""".split())
+
+_URL = re.compile(r"https?://\S+")
+# Hashtags and mentions may be short (#ai); plain words need three characters
+_TOKEN = re.compile(r"[#@][a-z0-9_]{2,}|[a-z0-9][a-z0-9_'-]{2,}")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased words, hashtags and mentions; URLs and stopwords are dropped"""
+    text = _URL.sub(" ", text.lower())
+    return [token for token in _TOKEN.findall(text) if token.lstrip("#@") not in STOPWORDS]
+
+
+class CountMinSketch:
+    """Approximate counts in fixed memory; estimates never undercount"""
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self._rows = np.arange(depth)
+
+    def _columns(self, item: str) -> np.ndarray:
+        # Double hashing: one digest gives every row's column
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return np.array([(h1 + row * h2) % self.width for row in range(self.depth)])
+
+    def add(self, item: str, count: int = 1):
+        self.table[self._rows, self._columns(item)] += count
+
+    def estimate(self, item: str) -> int:
+        return int(self.table[self._rows, self._columns(item)].min())
+
+    def clear(self):
+        self.table.fill(0)
+
+
+class SpaceSaving:
+    """Top-k heavy hitters in ``k`` counters (Metwally et al.)"""
+
+    def __init__(self, k: int = 200):
+        self.k = k
+        self.counters: Dict[str, List[int]] = {}  # item -> [count, overestimation]
+
+    def add(self, item: str, count: int = 1):
+        counter = self.counters.get(item)
+        if counter is not None:
+            counter[0] += count
+            return
+        if len(self.counters) < self.k:
+            self.counters[item] = [count, 0]
+            return
+        # Replace the smallest counter; the newcomer inherits its count as possible error
+        victim = min(self.counters, key=lambda key: self.counters[key][0])
+        floor = self.counters.pop(victim)[0]
+        self.counters[item] = [floor + count, floor]
+
+    def top(self, n: int) -> List[Tuple[str, int]]:
+        ranked = sorted(self.counters.items(), key=lambda entry: entry[1][0], reverse=True)
+        return [(item, counter[0]) for item, counter in ranked[:n]]
+
+    def clear(self):
+        self.counters.clear()
+
+
+@dataclass
+class _Bucket:
+    epoch: int
+    sketch: CountMinSketch
+    heavy_hitters: SpaceSaving
+
+
+class SlidingWindowCounter:
+    """Term counts over a sliding time window made of fixed-size buckets.
+
+    Each bucket holds its own sketch and top-k counters and is recycled once it
+    falls out of the window, so memory is fixed however many terms arrive.
+    """
+
+    def __init__(self, bucket_seconds: float = 300, buckets: int = 12, k: int = 200, width: int = 2048, depth: int = 4):
+        self.bucket_seconds = bucket_seconds
+        self._buckets = [_Bucket(-1, CountMinSketch(width, depth), SpaceSaving(k)) for _ in range(buckets)]
+        self.first_epoch: Optional[int] = None
+        self.total = 0
+
+    def _epoch(self, timestamp: Optional[float]) -> int:
+        return int((time.time() if timestamp is None else timestamp) // self.bucket_seconds)
+
+    def add(self, terms: Iterable[str], timestamp: Optional[float] = None):
+        epoch = self._epoch(timestamp)
+        bucket = self._buckets[epoch % len(self._buckets)]
+        if bucket.epoch != epoch:
+            if bucket.epoch > epoch:
+                return  # Older than the window
+            bucket.sketch.clear()
+            bucket.heavy_hitters.clear()
+            bucket.epoch = epoch
+        if self.first_epoch is None:
+            self.first_epoch = epoch
+        for term in terms:
+            bucket.sketch.add(term)
+            bucket.heavy_hitters.add(term)
+            self.total += 1
+
+    def _live(self, now_epoch: int, newest: int, oldest: int) -> List[_Bucket]:
+        """Buckets between ``oldest`` and ``newest`` buckets ago"""
+        return [b for b in self._buckets if newest <= now_epoch - b.epoch <= oldest]
+
+    def count(self, term: str, buckets: Optional[int] = None, skip: int = 0, timestamp: Optional[float] = None) -> int:
+        """Estimated occurrences over ``buckets`` buckets, ignoring the most recent ``skip``"""
+        now_epoch = self._epoch(timestamp)
+        oldest = (buckets or len(self._buckets)) + skip - 1
+        return sum(b.sketch.estimate(term) for b in self._live(now_epoch, skip, oldest))
+
+    def candidates(self, buckets: Optional[int] = None, timestamp: Optional[float] = None) -> Dict[str, int]:
+        """Heavy hitters of the most recent ``buckets`` buckets with their top-k counts"""
+        now_epoch = self._epoch(timestamp)
+        merged: Dict[str, int] = {}
+        for bucket in self._live(now_epoch, 0, (buckets or len(self._buckets)) - 1):
+            for term, count in bucket.heavy_hitters.counters.items():
+                merged[term] = merged.get(term, 0) + count[0]
+        return merged
+
+    def observed_buckets(self, timestamp: Optional[float] = None) -> int:
+        if self.first_epoch is None:
+            return 0
+        return min(self._epoch(timestamp) - self.first_epoch + 1, len(self._buckets))
+
+
+class TrendEngine:
+    """Streaming heavy-hitter and emerging-term detection per industry.
+
+    Collected texts are tokenized into a sliding-window counter per industry.
+    A term is emerging when its rate over the most recent buckets is well above
+    its rate over the rest of the window.
+    """
+
+    def __init__(
+        self,
+        bucket_seconds: float = 300,
+        buckets: int = 12,
+        k: int = 200,
+        recent_buckets: int = 2,
+        min_count: int = 5,
+        rise_ratio: float = 3.0,
+        max_industries: int = 50
+    ):
+        self.bucket_seconds = bucket_seconds
+        self.buckets = buckets
+        self.k = k
+        self.recent_buckets = recent_buckets
+        self.min_count = min_count
+        self.rise_ratio = rise_ratio
+        self.max_industries = max_industries
+        self._windows: "OrderedDict[str, SlidingWindowCounter]" = OrderedDict()
+
+    def _window(self, industry: str, create: bool = False) -> Optional[SlidingWindowCounter]:
+        key = industry.strip().lower()
+        window = self._windows.get(key)
+        if window is None and create:
+            if len(self._windows) >= self.max_industries:
+                self._windows.popitem(last=False)  # Least recently fed industry
+            window = self._windows[key] = SlidingWindowCounter(self.bucket_seconds, self.buckets, self.k)
+        if window is not None:
+            self._windows.move_to_end(key)
+        return window
+
+    def add_texts(self, industry: str, texts: Iterable[str], timestamp: Optional[float] = None) -> int:
+        """Feed collected texts; returns the number of terms counted"""
+        window = self._window(industry, create=True)
+        before = window.total
+        for text in texts:
+            if text:
+                window.add(tokenize(text), timestamp)
+        return window.total - before
+
+    def top_terms(self, industry: str, n: int = 10, timestamp: Optional[float] = None) -> List[Dict]:
+        """Most frequent terms over the whole window"""
+        window = self._window(industry)
+        if window is None:
+            return []
+        candidates = window.candidates(timestamp=timestamp)
+        ranked = sorted(candidates, key=candidates.get, reverse=True)[:n * 2]
+        counted = [(term, window.count(term, timestamp=timestamp)) for term in ranked]
+        counted.sort(key=lambda entry: entry[1], reverse=True)
+        return [{"term": term, "count": count} for term, count in counted[:n]]
+
+    def emerging_terms(self, industry: str, n: int = 10, timestamp: Optional[float] = None) -> List[Dict]:
+        """Terms whose recent rate is at least ``rise_ratio`` times their baseline rate"""
+        window = self._window(industry)
+        if window is None:
+            return []
+        baseline_buckets = window.observed_buckets(timestamp) - self.recent_buckets
+        if baseline_buckets <= 0:
+            return []  # Not enough history to call anything a rise yet
+
+        emerging = []
+        for term in window.candidates(self.recent_buckets, timestamp):
+            recent = window.count(term, self.recent_buckets, timestamp=timestamp)
+            if recent < self.min_count:
+                continue
+            baseline = window.count(term, baseline_buckets, skip=self.recent_buckets, timestamp=timestamp)
+            # +1 smoothing so brand-new terms get a finite, volume-weighted ratio
+            ratio = (recent / self.recent_buckets + 1) / (baseline / baseline_buckets + 1)
+            if ratio >= self.rise_ratio:
+                emerging.append({"term": term, "recent": recent, "baseline": baseline, "ratio": round(ratio, 2)})
+        emerging.sort(key=lambda entry: entry["ratio"], reverse=True)
+        return emerging[:n]
+
+    def get_stats(self) -> Dict:
+        return {
+            "industries": list(self._windows),
+            "terms_counted": {industry: window.total for industry, window in self._windows.items()},
+            "window_seconds": self.bucket_seconds * self.buckets,
+            "top_k": self.k
+        }
+
+
+trend_engine = TrendEngine(
+    bucket_seconds=settings.TREND_BUCKET_SECONDS,
+    buckets=settings.TREND_WINDOW_BUCKETS,
+    k=settings.TREND_TOP_K,
+    rise_ratio=settings.TREND_RISE_RATIO
+)
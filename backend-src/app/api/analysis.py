@@ -1,7 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Dict, List
-from app.models.business import BusinessProfile
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from pydantic import ValidationError
+from typing import Dict, List, Optional
+import asyncio
+from app.models.business import BusinessProfile, Location
+from app.analysis.ingestion import AsyncStreamReader, IngestionError, ndjson_records
 from app.analysis.market_analyzer import MarketAnalyzer
+from app.analysis.spatial_index import competitor_index
 from app.core.auth import get_current_user
 
 router = APIRouter()
@@ -53,6 +57,112 @@ async def analyze_location(
             detail=f"Failed to analyze location: {str(e)}"
         )
 
+@router.post("/analyze/locations/rank", response_model=Dict)
+async def rank_locations(
+    request: Request,
+    k: int = Query(10, ge=1, le=1000),
+    current_user = Depends(get_current_user)
+):
+    """
+    Screen candidate locations and return the top k with full analysis.
+
+    The body is newline-delimited JSON (application/x-ndjson): the business
+    profile on the first line, then one candidate location per line. Candidates
+    are parsed and scored as the body arrives, so memory follows k rather than
+    the number of candidates.
+    """
+    reader = AsyncStreamReader(request.stream(), asyncio.get_running_loop())
+
+    def rank():
+        records = ndjson_records(reader, lambda record: record)
+        profile = next(records, None)
+        if profile is None:
+            raise IngestionError("Expected the business profile on the first line")
+        analyzer = MarketAnalyzer(BusinessProfile(**profile))
+        candidates = (Location(**record) for record in records)
+        return analyzer.rank_locations(candidates, k)
+
+    try:
+        return await asyncio.to_thread(rank)
+    except (IngestionError, ValidationError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to rank locations: {str(e)}"
+        )
+
+@router.post("/analyze/location/{location_id}/scenarios", response_model=Dict)
+async def simulate_location_scenarios(
+    location_id: str,
+    business_profile: BusinessProfile,
+    paths: Optional[int] = Query(None, ge=1000, le=1_000_000, description="Simulated paths; defaults to SCENARIO_PATHS"),
+    seed: Optional[int] = Query(None, description="Fix to reproduce a simulation"),
+    current_user = Depends(get_current_user)
+):
+    """
+    Monte Carlo percentile bands for a location's market size and score
+    """
+    location = next(
+        (loc for loc in business_profile.preferred_locations if loc.id == location_id),
+        None
+    )
+    if not location:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Location with ID {location_id} not found"
+        )
+    try:
+        analyzer = MarketAnalyzer(business_profile)
+        return await asyncio.to_thread(analyzer.simulate_location, location, paths, seed)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to simulate location scenarios: {str(e)}"
+        )
+
+@router.post("/analyze/competitors", response_model=Dict)
+async def save_competitors(
+    competitors: List[Dict],
+    current_user = Depends(get_current_user)
+):
+    """
+    Add, move or delete competitor locations ({"id", "latitude", "longitude", "industry"}, or "deleted": true)
+    """
+    invalid = [
+        competitor.get("id") for competitor in competitors
+        if "id" not in competitor or (not competitor.get("deleted") and not {"latitude", "longitude"} <= competitor.keys())
+    ]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Competitors need id, latitude and longitude: {invalid[:10]}")
+    try:
+        competitor_index.save(competitors)
+        return {"saved": len(competitors), "index": competitor_index.get_stats()}
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to save competitors: {str(e)}"
+        )
+
+@router.get("/analyze/competitors/nearby", response_model=Dict)
+async def nearby_competitors(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    industry: Optional[str] = None,
+    radius_km: Optional[float] = Query(None, gt=0, le=500),
+    current_user = Depends(get_current_user)
+):
+    """
+    Competitor counts, density and nearest competitors around a point
+    """
+    stats = competitor_index.competition(latitude, longitude, industry, radius_km)
+    return {
+        "direct_competitors": stats.direct,
+        "indirect_competitors": stats.indirect,
+        "density_per_km2": round(stats.density_per_km2, 4),
+        "nearest": [{"id": point_id, "distance_km": km} for point_id, km in stats.nearest]
+    }
+
 @router.post("/analyze/technology", response_model=Dict)
 async def analyze_technology(
     business_profile: BusinessProfile,
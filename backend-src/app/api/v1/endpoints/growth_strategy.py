@@ -1,6 +1,5 @@
 from fastapi import APIRouter, HTTPException, Depends
 from typing import List, Dict, Any
-import httpx
 from app.core.auth import get_current_user
 from app.schemas.user import User
 from app.schemas.growth_strategy import (
@@ -9,11 +8,12 @@ from app.schemas.growth_strategy import (
     Strategy
 )
 from app.core.config import settings
+from app.integrations.llm_providers import get_llm_provider
+from app.utils.hedging import latency_budget
 
 router = APIRouter()
 
-API_URL = "https://api-inference.huggingface.co/models/facebook/bart-large-cnn"
-headers = {"Authorization": f"Bearer {settings.HUGGINGFACE_API_KEY}"}
+llm_provider = get_llm_provider("huggingface")
 
 async def generate_growth_insights(company_data: dict) -> dict:
     try:
@@ -28,17 +28,12 @@ async def generate_growth_insights(company_data: dict) -> dict:
         Provide growth strategies and metrics.
         """
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                API_URL,
-                headers=headers,
-                json={"inputs": prompt, "parameters": {"max_length": 500}}
-            )
+        try:
+            completion = await llm_provider.complete(prompt, max_tokens=500)
+        except Exception:
+            raise HTTPException(status_code=500, detail="AI model request failed")
             
-            if response.status_code != 200:
-                raise HTTPException(status_code=500, detail="AI model request failed")
-                
-            ai_insights = response.json()[0]['generated_text']
+        ai_insights = completion.text
         
         # Generate metrics based on company data
         metrics = [
@@ -106,7 +101,8 @@ async def get_growth_strategy(current_user: User = Depends(get_current_user)) ->
             "main_products": ["Market Analysis Tool", "Customer Intelligence Platform"]
         }
         
-        return await generate_growth_insights(company_data)
+        with latency_budget(settings.GROWTH_STRATEGY_LATENCY_BUDGET):
+            return await generate_growth_insights(company_data)
         
     except Exception as e:
         raise HTTPException(
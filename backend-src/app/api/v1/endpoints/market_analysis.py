@@ -1,6 +1,15 @@
-from fastapi import APIRouter, HTTPException
-from typing import Dict, List
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Dict, List, Optional
+import json
+from app.core.config import settings
+from app.analysis.ingestion import IngestionError
+from app.analysis.trend_detection import trend_engine
+from app.integrations.twitter_collector import twitter_collector
 from app.services.market_analysis import MarketAnalysisService
+from app.services.segment_models import segment_models
+from app.services.sentiment import sentiment_scorer
+from app.utils.hedging import latency_budget
 
 router = APIRouter()
 market_service = MarketAnalysisService()
@@ -14,24 +23,96 @@ async def get_market_trends(
     Get market trends and analysis for specific industry and location
     """
     try:
-        analysis = await market_service.analyze_market_trends(industry, location)
+        with latency_budget(settings.MARKET_INSIGHTS_LATENCY_BUDGET):
+            analysis = await market_service.analyze_market_trends(industry, location)
         return analysis
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/trends/{industry}/terms")
+async def get_trending_terms(
+    industry: str,
+    limit: int = Query(10, ge=1, le=100)
+):
+    """
+    Top and emerging terms in tweets collected for an industry
+    """
+    return {
+        'industry': industry,
+        'top_terms': trend_engine.top_terms(industry, limit),
+        'emerging_terms': trend_engine.emerging_terms(industry, limit)
+    }
+
 @router.post("/segment-customers")
 async def segment_customers(
-    customer_data: List[Dict]
+    customer_data: List[Dict],
+    n_clusters: int = Query(4, ge=1, le=20),
+    auto_k: bool = Query(False, description="Choose the number of segments by silhouette score"),
+    save_as: Optional[str] = Query(None, description="Store the fitted model under this name for later assignment")
 ):
     """
     Perform customer segmentation using AI clustering
     """
     try:
-        segments = await market_service.segment_customers(customer_data)
+        segments = await market_service.segment_customers(customer_data, n_clusters, auto_k, save_as)
         return segments
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/segment-customers/upload")
+async def segment_customer_upload(
+    request: Request,
+    n_clusters: int = Query(4, ge=1, le=20),
+    auto_k: bool = Query(False, description="Choose the number of segments by silhouette score"),
+    save_as: Optional[str] = Query(None, description="Store the fitted model under this name for later assignment")
+):
+    """
+    Segment customers from a raw CSV, Parquet or Arrow stream body (revenue, frequency, recency columns)
+    """
+    try:
+        return await market_service.segment_customer_upload(
+            request.stream(),
+            request.headers.get("content-type", ""),
+            n_clusters,
+            auto_k,
+            save_as
+        )
+    except IngestionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/segments/{model_name}/assign")
+async def assign_segments(
+    model_name: str,
+    customer_data: List[Dict]
+):
+    """
+    Label customers with a stored segmentation model, without refitting
+    """
+    try:
+        return segment_models.assign(model_name, customer_data)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except (KeyError, ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid customer data: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/segments/{model_name}/drift")
+async def get_segment_drift(
+    model_name: str
+):
+    """
+    Drift of customers assigned since the latest fit of a stored model
+    """
+    try:
+        return segment_models.drift(model_name)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/market-size")
 async def predict_market_size(
     industry_data: Dict
@@ -44,3 +125,41 @@ async def predict_market_size(
         return prediction
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/market-size/batch")
+async def forecast_market_sizes(
+    series: Dict[str, List[Optional[float]]],
+    method: str = Query("holt", pattern="^(ses|holt)$"),
+    horizon: int = Query(4, ge=1, le=60),
+    interval: float = Query(0.95, gt=0, lt=1)
+):
+    """
+    Forecast many market-size series at once, with prediction intervals (null marks a missing period)
+    """
+    try:
+        return await market_service.forecast_market_sizes(series, method, horizon, interval)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/sentiment/stats")
+async def get_sentiment_stats():
+    """
+    Sentiment batching and throughput (tweets per second per core)
+    """
+    return sentiment_scorer.get_stats()
+
+@router.get("/tweets/stream")
+async def stream_tweets(
+    query: List[str] = Query(..., description="One or more search queries, collected concurrently"),
+    limit: int = Query(100, ge=1, le=1000, description="Tweets per query")
+):
+    """
+    Stream recent tweets as newline-delimited JSON while pages are still being collected
+    """
+    async def lines():
+        async for matched_query, tweet in twitter_collector.stream_many(query, limit=limit):
+            yield json.dumps({"query": matched_query, **tweet}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
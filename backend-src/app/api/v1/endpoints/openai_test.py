@@ -1,5 +1,7 @@
 from fastapi import APIRouter, HTTPException
+from app.core.config import settings
 from app.integrations.openai_integration import OpenAIIntegration
+from app.utils.hedging import latency_budget
 from typing import Dict
 
 router = APIRouter()
@@ -17,10 +19,11 @@ async def test_market_insights(data: Dict):
     }
     """
     try:
-        result = await openai_client.generate_market_insights(
-            industry=data.get("industry"),
-            context=data.get("context")
-        )
+        with latency_budget(settings.MARKET_INSIGHTS_LATENCY_BUDGET):
+            result = await openai_client.generate_market_insights(
+                industry=data.get("industry"),
+                context=data.get("context")
+            )
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -39,7 +42,22 @@ async def test_growth_strategies(business_data: Dict):
     }
     """
     try:
-        result = await openai_client.generate_growth_strategies(business_data)
+        with latency_budget(settings.GROWTH_STRATEGY_LATENCY_BUDGET):
+            result = await openai_client.generate_growth_strategies(business_data)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/usage")
+async def get_usage():
+    """
+    Token usage, retries and budget of the shared OpenAI client
+    """
+    return openai_client.get_usage_stats()
+
+@router.get("/cache")
+async def get_cache_stats():
+    """
+    Prompt cache hit rate for the OpenAI integration
+    """
+    return await openai_client.get_cache_stats()
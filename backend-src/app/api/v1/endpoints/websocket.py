@@ -24,11 +24,11 @@ class ConnectionManager:
 
     async def broadcast_to_client(self, message: dict, client_id: str):
         if client_id in self.active_connections:
-            for connection in self.active_connections[client_id]:
+            for connection in list(self.active_connections[client_id]):
                 try:
                     await connection.send_json(message)
                 except WebSocketDisconnect:
-                    await self.disconnect(connection, client_id)
+                    self.disconnect(connection, client_id)
 
 manager = ConnectionManager()
 
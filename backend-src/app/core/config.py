@@ -1,4 +1,4 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from pydantic import EmailStr, Field
 from pydantic_settings import BaseSettings
 import os
@@ -34,6 +34,16 @@ class Settings(BaseSettings):
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     
+    # AI response cache
+    AI_CACHE_SOFT_TTL: int = 7200  # Seconds a cached AI response is considered fresh
+    AI_CACHE_HARD_TTL: int = 86400  # Seconds a stale response may still be served while refreshing or on errors
+    
+    # Deferred AI jobs
+    AI_JOB_RESULT_TTL: int = 86400  # Seconds finished job results stay pollable
+    AI_JOB_POLL_INTERVAL: float = 5.0  # Seconds between queue checks when idle
+    AI_JOB_RETRY_INTERVAL: float = 180.0  # Seconds to wait after the rate limiter refuses a queued job
+    AI_JOB_LEASE_SECONDS: float = 600.0  # A running job whose worker has not finished it by then is queued again
+    
     # Email
     SENDGRID_API_KEY: str = Field(default=os.getenv("SENDGRID_API_KEY", ""))
     SENDGRID_FROM_EMAIL: EmailStr = Field(default="noreply@example.com")
@@ -43,10 +53,87 @@ class Settings(BaseSettings):
     
     # API Keys
     TWITTER_BEARER_TOKEN: str = Field(default=os.getenv("TWITTER_BEARER_TOKEN", ""))
+    TWITTER_API_URL: str = "https://api.twitter.com/2"
+    TWITTER_MAX_CONCURRENT_QUERIES: int = 4  # Search queries paginated at the same time
+    TRENDS_CACHE_TTL: int = 300  # Seconds place trends are cached per location, shared across workers
+    TRENDS_HOT_LOCATIONS: int = 20  # Most recently requested locations refreshed in the background
+    TRENDS_HOT_WINDOW: int = 900  # A location stays hot this long after its last request
+    # Streaming trend detection over collected tweets (app.analysis.trend_detection)
+    TREND_BUCKET_SECONDS: int = 300
+    TREND_WINDOW_BUCKETS: int = 12  # Window length is buckets x bucket seconds
+    TREND_TOP_K: int = 200  # Heavy-hitter counters per bucket
+    TREND_RISE_RATIO: float = 3.0  # Recent vs baseline rate at which a term counts as emerging
+    # Customer segmentation (app.analysis.segmentation)
+    SEGMENTATION_CHUNK_SIZE: int = 50000  # Rows standardized and clustered at a time; bounds memory
+    SEGMENTATION_SAMPLE_SIZE: int = 20000  # Reservoir sample used to pick k automatically
+    SEGMENTATION_UPLOAD_SPOOL_MB: int = 64  # Parquet uploads are buffered in memory up to this size, then on disk
+    SEGMENTATION_DRIFT_PSI: float = 0.2  # Segment-mix shift (population stability index) that triggers a refit
+    SEGMENTATION_DRIFT_DISTANCE_RATIO: float = 1.5  # Mean distance to centers vs fit time that triggers a refit
+    SEGMENTATION_DRIFT_MIN_SAMPLES: int = 500  # Assigned customers needed before drift can trigger a refit
+    SEGMENTATION_REFIT_SAMPLE_SIZE: int = 50000  # Recent assigned customers kept for refits
+    SEGMENTATION_DRIFT_CHECK_SECONDS: int = 3600  # How often stored models are checked for drift
+    FORECAST_SERIES_CHUNK: int = 20000  # Series fitted together per NumPy block in batch market-size forecasts
+    SCENARIO_PATHS: int = 100000  # Monte Carlo paths per location scenario simulation
+    SCENARIO_HORIZON_YEARS: int = 5
+    LOCATION_SCREEN_CHUNK: int = 10000  # Candidate locations scored per array batch when ranking
+    COMPETITOR_RADIUS_KM: float = 5.0  # Competitors within this distance of a location count against it
+    COMPETITOR_INDEX_REFRESH_SECONDS: int = 60  # How often each worker pulls competitor changes from Redis
+    COMPETITOR_INDEX_REBUILD_FRACTION: float = 0.1  # Pending changes, as a share of indexed points, that trigger a tree rebuild
     HUGGINGFACE_API_KEY: Optional[str] = None
     HUGGINGFACE_API_URL: str = "https://api-inference.huggingface.co/models/facebook/bart-large-cnn"
+    HUGGINGFACE_BATCH_MAX_SIZE: int = 8  # Prompts sent together in one inference call
+    HUGGINGFACE_BATCH_MAX_WAIT_MS: int = 50  # How long the first prompt waits for others to join
     HUBSPOT_API_KEY: str = Field(default=os.getenv("HUBSPOT_API_KEY", ""))
+    OPENAI_API_KEY: str = Field(default=os.getenv("OPENAI_API_KEY", ""))
+    OPENAI_API_BASE: str = "https://api.openai.com/v1"
+    OPENAI_MODEL: str = "gpt-3.5-turbo"
+    OPENAI_MAX_CONCURRENCY: int = 8  # Calls in flight at once; the rest queue
+    OPENAI_TOKENS_PER_MINUTE: int = 90000  # Estimated from prompt size before each call
+    OPENAI_MAX_RETRIES: int = 3  # Retries after a 429, honouring Retry-After
+    OPENAI_CACHE_MAX_TEMPERATURE: float = 0.7  # Prompts sampled hotter than this are never served from cache
+    OPENAI_CACHE_MAX_SIZE: int = 1000  # Cached completions kept; separate from the growth insight cache
     
+    # LLM providers: "huggingface", "openai" or "local"; when set, overrides every call site's default
+    LLM_PROVIDER: Optional[str] = None
+    LOCAL_LLM_URL: str = "http://localhost:8001"
+    # Behaviour of the local stand-in server (app.integrations.llm_standin)
+    LLM_STANDIN_LATENCY_MS: float = 300.0  # Time to first token
+    LLM_STANDIN_TOKENS_PER_SECOND: float = 50.0
+    LLM_STANDIN_ERROR_RATE: float = 0.0  # Fraction of requests answered with 503
+    # Hedged LLM requests: a duplicate is fired once a call outlives the observed latency percentile
+    # A hedge to a rate-limited provider reserves its own rate-limit token and is skipped when none is free
+    LLM_HEDGE_ENABLED: bool = True
+    LLM_HEDGE_PROVIDER: Optional[str] = None  # Send hedges here instead of to the primary provider
+    LLM_HEDGE_PERCENTILE: float = 0.95
+    LLM_HEDGE_MIN_SAMPLES: int = 20  # No hedging until this many latencies have been observed
+    LLM_HEDGE_MIN_DELAY_MS: float = 200.0
+    LLM_LATENCY_WINDOW: int = 200  # Recent latencies kept per provider call
+    # Per-endpoint latency budgets in seconds, shared by every nested upstream call
+    GROWTH_STRATEGY_LATENCY_BUDGET: float = 20.0
+    MARKET_INSIGHTS_LATENCY_BUDGET: float = 15.0
+    # Per-source deadlines (seconds) for the concurrent market trends fan-out
+    TWITTER_TRENDS_TIMEOUT: float = 5.0
+    TWITTER_SEARCH_TIMEOUT: float = 8.0
+    AI_MARKET_INSIGHTS_TIMEOUT: float = 12.0
+
+    # Local ML models (app.utils.model_registry)
+    SENTIMENT_MODEL: str = "distilbert-base-uncased-finetuned-sst-2-english"
+    MODEL_WARM_UP: List[str] = []  # Models loaded at startup instead of on first use
+    MODEL_IDLE_UNLOAD_SECONDS: float = 1800.0  # Unused models are unloaded after this; 0 keeps them
+    SENTIMENT_BATCH_MAX_SIZE: int = 64  # Texts from concurrent requests scored together
+    SENTIMENT_BATCH_MAX_WAIT_MS: int = 20  # How long the first text waits for others to join
+    SENTIMENT_MODEL_BATCH_SIZE: int = 16  # Texts per forward pass, grouped by length to limit padding
+
+    # Shared upstream HTTP client
+    HTTP_CLIENT_HTTP2: bool = True
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 50
+    HTTP_CLIENT_MAX_KEEPALIVE: int = 20
+    HTTP_CLIENT_KEEPALIVE_EXPIRY: float = 60.0  # seconds an idle connection is kept open
+    HTTP_CLIENT_CONNECT_TIMEOUT: float = 5.0
+    HTTP_CLIENT_READ_TIMEOUT: float = 30.0
+    HTTP_CLIENT_POOL_TIMEOUT: float = 5.0
+    HTTP_CLIENT_TIMINGS_HISTORY: int = 500  # Number of recent upstream timings kept for stats
+
     # OAuth Settings
     FACEBOOK_CLIENT_ID: Optional[str] = Field(default=os.getenv("FACEBOOK_CLIENT_ID", ""))
     FACEBOOK_CLIENT_SECRET: Optional[str] = Field(default=os.getenv("FACEBOOK_CLIENT_SECRET", ""))
@@ -0,0 +1,449 @@
+import asyncio
+import hashlib
+import json
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, TypeVar, Union
+import httpx
+from app.core.config import settings
+from app.utils.hedging import build_hedger
+from app.utils.http_client import http_client
+from app.utils.rate_limiter import RateLimiter, RateLimitExceeded, TokenBudget
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# A prompt is either plain text or OpenAI-style chat messages; providers convert as needed
+Prompt = Union[str, List[Dict[str, str]]]
+
+
+class LLMProviderError(Exception):
+    """Raised when a provider returns an unusable response"""
+
+
+@dataclass
+class LLMCompletion:
+    text: str
+    provider: str
+    model: str
+    finish_reason: Optional[str] = None
+    usage: Dict[str, int] = field(default_factory=dict)
+
+
+def prompt_to_messages(prompt: Prompt) -> List[Dict[str, str]]:
+    if isinstance(prompt, str):
+        return [{"role": "user", "content": prompt}]
+    return prompt
+
+
+def prompt_to_text(prompt: Prompt) -> str:
+    if isinstance(prompt, str):
+        return prompt
+    return "\n\n".join(message["content"] for message in prompt)
+
+
+def completion_cache_key(model: str, prompt: Prompt, max_tokens: int, temperature: float) -> str:
+    """Cache key for a completion; whitespace differences in the prompt do not matter"""
+    messages = [
+        {"role": message.get("role", "user"), "content": " ".join((message.get("content") or "").split())}
+        for message in prompt_to_messages(prompt)
+    ]
+    payload = json.dumps(
+        {"model": model, "messages": messages, "max_tokens": max_tokens, "temperature": temperature},
+        sort_keys=True
+    )
+    return f"llm_completion:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+
+def estimate_tokens(prompt: Prompt) -> int:
+    """Rough prompt size in tokens (about four characters each, plus per-message overhead)"""
+    messages = prompt_to_messages(prompt)
+    return sum(len(message.get("content") or "") // 4 + 4 for message in messages)
+
+
+def retry_after_seconds(response: httpx.Response, default: float = 1.0) -> float:
+    try:
+        return max(float(response.headers.get("retry-after", default)), 0.0)
+    except ValueError:
+        return default
+
+
+class LLMProvider(ABC):
+    """Interface every model backend implements"""
+
+    name = "base"
+    # Whether calls spend the shared AI rate-limit budget, and under which limiter key
+    rate_limited = True
+    rate_limit_key = "huggingface_api"
+
+    @property
+    def configured(self) -> bool:
+        return True
+
+    @abstractmethod
+    async def complete(self, prompt: Prompt, max_tokens: int = 500, temperature: float = 0.7) -> LLMCompletion:
+        """Complete one prompt"""
+
+    async def complete_batch(self, prompts: List[Prompt], max_tokens: int = 500, temperature: float = 0.7) -> List[LLMCompletion]:
+        """Complete several prompts; providers with a batch API override this"""
+        return list(await asyncio.gather(*(
+            self.complete(prompt, max_tokens=max_tokens, temperature=temperature) for prompt in prompts
+        )))
+
+    async def stream(self, prompt: Prompt, max_tokens: int = 500, temperature: float = 0.7) -> AsyncIterator[str]:
+        """Yield text as it is generated; providers without streaming yield it all at once"""
+        completion = await self.complete(prompt, max_tokens=max_tokens, temperature=temperature)
+        yield completion.text
+
+
+class HuggingFaceProvider(LLMProvider):
+    """HuggingFace Inference API; accepts a list of inputs per request"""
+
+    name = "huggingface"
+
+    def __init__(self, api_url: str, api_key: Optional[str]):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.model = api_url.rstrip("/").split("/models/")[-1]
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.api_key}"}
+
+    def _check_response(self, response: httpx.Response):
+        if response.status_code == 429:
+            raise RateLimitExceeded(self.name)
+        response.raise_for_status()
+
+    @staticmethod
+    def extract_generated_text(item: Any) -> str:
+        """Pull the generated text out of one output item"""
+        if isinstance(item, list):
+            item = item[0]
+        return item.get("generated_text") or item.get("summary_text", "")
+
+    def _completion(self, item: Any) -> LLMCompletion:
+        return LLMCompletion(
+            text=self.extract_generated_text(item),
+            provider=self.name,
+            model=self.model,
+            finish_reason="stop"
+        )
+
+    async def complete(self, prompt: Prompt, max_tokens: int = 500, temperature: float = 0.7) -> LLMCompletion:
+        return (await self.complete_batch([prompt], max_tokens=max_tokens, temperature=temperature))[0]
+
+    async def complete_batch(self, prompts: List[Prompt], max_tokens: int = 500, temperature: float = 0.7) -> List[LLMCompletion]:
+        inputs = [prompt_to_text(prompt) for prompt in prompts]
+        response = await http_client.post(
+            self.api_url,
+            headers=self.headers,
+            json={
+                "inputs": inputs if len(inputs) > 1 else inputs[0],
+                "parameters": {"max_length": max_tokens, "temperature": temperature}
+            }
+        )
+        self._check_response(response)
+
+        output = response.json()
+        if len(inputs) == 1:
+            output = [output]
+        if not isinstance(output, list) or len(output) != len(inputs):
+            raise LLMProviderError("HuggingFace batch response does not match the number of inputs")
+        return [self._completion(item) for item in output]
+
+    async def stream(self, prompt: Prompt, max_tokens: int = 500, temperature: float = 0.7) -> AsyncIterator[str]:
+        async with http_client.stream(
+            "POST",
+            self.api_url,
+            headers=self.headers,
+            json={
+                "inputs": prompt_to_text(prompt),
+                "parameters": {"max_new_tokens": max_tokens, "temperature": temperature},
+                "stream": True
+            }
+        ) as response:
+            self._check_response(response)
+
+            # Models without token streaming answer with a single JSON body
+            if "text/event-stream" not in response.headers.get("content-type", ""):
+                yield self.extract_generated_text(json.loads(await response.aread()))
+                return
+
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                token = json.loads(line[len("data:"):]).get("token") or {}
+                if not token.get("special"):
+                    yield token.get("text", "")
+
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI-compatible chat completions API.
+
+    Concurrency is capped by a semaphore and every call waits for room in a
+    per-minute token budget, so bursts queue instead of coming back as 429s.
+    """
+
+    name = "openai"
+    # Throttled by its own token budget instead of the shared limiter
+    rate_limited = False
+
+    def __init__(
+        self,
+        api_base: str,
+        api_key: Optional[str],
+        model: str,
+        max_concurrency: int = 8,
+        tokens_per_minute: int = 90000,
+        max_retries: int = 3
+    ):
+        self.api_base = api_base.rstrip("/")
+        self.api_key = api_key
+        self.model = model
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.token_budget = TokenBudget(tokens_per_minute)
+        self.usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "retries": 0}
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    def _request(self, prompt: Prompt, max_tokens: int, temperature: float, stream: bool = False) -> Dict[str, Any]:
+        return {
+            "url": f"{self.api_base}/chat/completions",
+            "headers": {"Authorization": f"Bearer {self.api_key}"},
+            "json": {
+                "model": self.model,
+                "messages": prompt_to_messages(prompt),
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "stream": stream
+            }
+        }
+
+    def _check_response(self, response: httpx.Response):
+        if response.status_code == 429:
+            raise RateLimitExceeded(self.name)
+        response.raise_for_status()
+
+    def get_usage_stats(self) -> Dict[str, Any]:
+        """Cumulative token usage for capacity planning"""
+        return {
+            **self.usage,
+            "max_concurrency": self.max_concurrency,
+            "budget": self.token_budget.get_stats()
+        }
+
+    async def _throttled(self, response: httpx.Response, attempt: int) -> bool:
+        """On a 429 with retries left, hold back every caller for Retry-After and report True"""
+        if response.status_code != 429 or attempt >= self.max_retries:
+            return False
+        delay = retry_after_seconds(response, default=2 ** attempt)
+        logger.warning(f"{self.name} rate limited, retrying in {delay:.1f}s")
+        self.token_budget.pause(delay)
+        self.usage["retries"] += 1
+        await asyncio.sleep(delay)
+        return True
+
+    def _record_usage(self, usage: Dict[str, int]):
+        self.usage["calls"] += 1
+        for field_name in ("prompt_tokens", "completion_tokens", "total_tokens"):
+            self.usage[field_name] += usage.get(field_name, 0)
+
+    async def complete(self, prompt: Prompt, max_tokens: int = 500, temperature: float = 0.7) -> LLMCompletion:
+        async with self._semaphore:
+            entry = await self.token_budget.acquire(estimate_tokens(prompt) + max_tokens)
+            attempt = 0
+            while True:
+                response = await http_client.request("POST", **self._request(prompt, max_tokens, temperature))
+                if not await self._throttled(response, attempt):
+                    break
+                attempt += 1
+            self._check_response(response)
+
+        body = response.json()
+        try:
+            choice = body["choices"][0]
+            usage = body.get("usage") or {}
+            completion = LLMCompletion(
+                text=choice["message"]["content"],
+                provider=self.name,
+                model=body.get("model", self.model),
+                finish_reason=choice.get("finish_reason"),
+                usage=usage
+            )
+        except (KeyError, IndexError) as e:
+            raise LLMProviderError(f"Unexpected chat completion response: {e}")
+
+        if usage.get("total_tokens"):
+            self.token_budget.settle(entry, usage["total_tokens"])
+        self._record_usage(usage)
+        return completion
+
+    async def stream(self, prompt: Prompt, max_tokens: int = 500, temperature: float = 0.7) -> AsyncIterator[str]:
+        request = self._request(prompt, max_tokens, temperature, stream=True)
+        url = request.pop("url")
+        async with self._semaphore:
+            # Streamed responses carry no usage, so the estimate stands
+            await self.token_budget.acquire(estimate_tokens(prompt) + max_tokens)
+            async with http_client.stream("POST", url, **request) as response:
+                self._check_response(response)
+                self.usage["calls"] += 1
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    delta = json.loads(data)["choices"][0].get("delta") or {}
+                    if delta.get("content"):
+                        yield delta["content"]
+
+
+class LocalStandInProvider(HuggingFaceProvider):
+    """The bundled stand-in server (app.integrations.llm_standin) for offline load testing"""
+
+    name = "local"
+    rate_limited = False
+
+    def __init__(self, base_url: str):
+        super().__init__(f"{base_url.rstrip('/')}/models/standin", api_key="local")
+
+
+class HedgedProvider(LLMProvider):
+    """Hedges a provider's completions past its tail latency, optionally against a second provider.
+
+    A hedge sent to a rate-limited provider reserves its own limiter token first;
+    when none is available the hedge is skipped and the primary call runs on.
+    """
+
+    def __init__(
+        self,
+        primary: LLMProvider,
+        secondary: Optional[LLMProvider] = None,
+        limiter: Optional[RateLimiter] = None
+    ):
+        self.primary = primary
+        self.secondary = secondary
+        self.name = primary.name
+        self.rate_limited = primary.rate_limited
+        self.rate_limit_key = primary.rate_limit_key
+        self.hedger = build_hedger(primary.name)
+        self.limiter = limiter or RateLimiter()
+        self.refused_hedges = 0
+
+    def __getattr__(self, attr: str) -> Any:
+        # Expose provider details such as api_url and model
+        if attr == "primary":
+            raise AttributeError(attr)
+        return getattr(self.primary, attr)
+
+    @property
+    def configured(self) -> bool:
+        return self.primary.configured
+
+    @property
+    def _hedge_target(self) -> LLMProvider:
+        if self.secondary is not None and self.secondary.configured:
+            return self.secondary
+        return self.primary
+
+    async def _hedge(self, target: LLMProvider, call: Callable[[LLMProvider], Awaitable[T]]) -> T:
+        """Send the hedge, charging it a rate-limit token when the target is rate limited"""
+        if not target.rate_limited:
+            return await call(target)
+
+        key = target.rate_limit_key
+        reservation = await self.limiter.reserve(key)
+        if reservation is None:
+            # The primary call is still running, so a refused hedge just drops out of the race
+            self.refused_hedges += 1
+            raise RateLimitExceeded(key)
+
+        sent = True
+        try:
+            return await call(target)
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+            sent = False
+            raise
+        finally:
+            if sent:
+                await self.limiter.commit(key, reservation)
+            else:
+                await self.limiter.release(key, reservation)
+
+    async def _run(self, key: str, call: Callable[[LLMProvider], Awaitable[T]]) -> T:
+        target = self._hedge_target
+        return await self.hedger.run(key, lambda: call(self.primary), lambda: self._hedge(target, call))
+
+    async def complete(self, prompt: Prompt, max_tokens: int = 500, temperature: float = 0.7) -> LLMCompletion:
+        return await self._run(
+            "complete",
+            lambda provider: provider.complete(prompt, max_tokens=max_tokens, temperature=temperature)
+        )
+
+    async def complete_batch(self, prompts: List[Prompt], max_tokens: int = 500, temperature: float = 0.7) -> List[LLMCompletion]:
+        return await self._run(
+            "complete_batch",
+            lambda provider: provider.complete_batch(prompts, max_tokens=max_tokens, temperature=temperature)
+        )
+
+    def stream(self, prompt: Prompt, max_tokens: int = 500, temperature: float = 0.7) -> AsyncIterator[str]:
+        # Tokens are already flowing to the client, so streams are not hedged
+        return self.primary.stream(prompt, max_tokens=max_tokens, temperature=temperature)
+
+    def get_usage_stats(self) -> Dict[str, Any]:
+        """Token usage and budget of the primary provider, where it tracks them"""
+        if not hasattr(self.primary, "get_usage_stats"):
+            return {}
+        return self.primary.get_usage_stats()
+
+    def get_hedge_stats(self) -> Dict[str, Any]:
+        return {
+            **self.hedger.get_stats(),
+            "hedge_provider": self._hedge_target.name,
+            "refused_hedges": self.refused_hedges
+        }
+
+
+_providers: Dict[str, LLMProvider] = {}
+
+
+def _build_provider(name: str) -> LLMProvider:
+    if name == "huggingface":
+        return HuggingFaceProvider(settings.HUGGINGFACE_API_URL, settings.HUGGINGFACE_API_KEY)
+    if name == "openai":
+        return OpenAIProvider(
+            settings.OPENAI_API_BASE,
+            settings.OPENAI_API_KEY,
+            settings.OPENAI_MODEL,
+            max_concurrency=settings.OPENAI_MAX_CONCURRENCY,
+            tokens_per_minute=settings.OPENAI_TOKENS_PER_MINUTE,
+            max_retries=settings.OPENAI_MAX_RETRIES
+        )
+    if name == "local":
+        return LocalStandInProvider(settings.LOCAL_LLM_URL)
+    raise ValueError(f"Unknown LLM provider: {name}")
+
+
+def get_llm_provider(default: str) -> LLMProvider:
+    """Provider for a call site; settings.LLM_PROVIDER overrides every site's default"""
+    name = settings.LLM_PROVIDER or default
+    if name not in _providers:
+        provider = _build_provider(name)
+        if settings.LLM_HEDGE_ENABLED:
+            hedge_name = settings.LLM_HEDGE_PROVIDER
+            secondary = _build_provider(hedge_name) if hedge_name and hedge_name != name else None
+            provider = HedgedProvider(provider, secondary)
+        _providers[name] = provider
+        logger.info(f"Using LLM provider '{name}'")
+    return _providers[name]
@@ -0,0 +1,125 @@
+"""Local stand-in for the HuggingFace and OpenAI APIs, for offline load testing.
+
+Run it next to the API and point the app at it:
+
+    uvicorn app.integrations.llm_standin:app --port 8001
+    LLM_PROVIDER=local uvicorn app.main:app
+
+Latency, error rate and token rate come from the LLM_STANDIN_* settings.
+"""
+import asyncio
+import hashlib
+import json
+import random
+import time
+from typing import AsyncIterator, List
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.core.config import settings
+
+app = FastAPI(title="LLM stand-in")
+
+STRATEGY_LINES = [
+    "Expand into adjacent geographic markets with a partner-led sales motion",
+    "Launch a usage-based pricing tier to lower the barrier to entry",
+    "Invest in customer success to lift net revenue retention above 110%",
+    "Build an integration marketplace to deepen product stickiness",
+    "Run targeted account-based marketing for the top 200 prospects",
+    "Automate onboarding to cut time-to-value below one week",
+    "Introduce an annual plan discount to improve cash flow",
+    "Develop a referral program that rewards both sides"
+]
+
+
+def _generate_text(prompt: str) -> str:
+    """Deterministic per prompt, so cached and uncached runs are comparable"""
+    seed = int(hashlib.md5(prompt.encode()).hexdigest(), 16)
+    rng = random.Random(seed)
+    return "\n".join(rng.sample(STRATEGY_LINES, 4))
+
+
+def _tokens(text: str) -> List[str]:
+    words = text.replace("\n", " \n ").split(" ")
+    return [word if word == "\n" else word + " " for word in words if word]
+
+
+async def _simulate_latency(n_tokens: int = 0):
+    jitter = random.uniform(0.8, 1.2)
+    await asyncio.sleep(settings.LLM_STANDIN_LATENCY_MS / 1000 * jitter + n_tokens / settings.LLM_STANDIN_TOKENS_PER_SECOND)
+
+
+def _injected_error():
+    if random.random() < settings.LLM_STANDIN_ERROR_RATE:
+        return JSONResponse(status_code=503, content={"error": "Injected stand-in failure"})
+    return None
+
+
+async def _stream_tokens(text: str, event) -> AsyncIterator[str]:
+    await _simulate_latency()
+    for token in _tokens(text):
+        await asyncio.sleep(1 / settings.LLM_STANDIN_TOKENS_PER_SECOND)
+        yield event(token)
+
+
+@app.post("/models/{model}")
+async def huggingface_inference(model: str, request: Request):
+    """HuggingFace Inference API: single or batched inputs, optional token streaming"""
+    body = await request.json()
+    error = _injected_error()
+    if error:
+        return error
+
+    inputs = body.get("inputs", "")
+    if body.get("stream"):
+        text = _generate_text(inputs)
+
+        def event(token: str) -> str:
+            return f"data: {json.dumps({'token': {'text': token, 'special': False}})}\n\n"
+
+        return StreamingResponse(_stream_tokens(text, event), media_type="text/event-stream")
+
+    prompts = inputs if isinstance(inputs, list) else [inputs]
+    outputs = [{"generated_text": _generate_text(prompt)} for prompt in prompts]
+    # Batched inputs are generated together, so latency follows the longest output
+    await _simulate_latency(max(len(_tokens(output["generated_text"])) for output in outputs))
+    return outputs
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    """OpenAI-compatible chat completions, optional streaming"""
+    body = await request.json()
+    error = _injected_error()
+    if error:
+        return error
+
+    prompt = "\n\n".join(message.get("content", "") for message in body.get("messages", []))
+    text = _generate_text(prompt)
+    model = body.get("model", "standin")
+
+    if body.get("stream"):
+        def event(token: str) -> str:
+            chunk = {"model": model, "choices": [{"index": 0, "delta": {"content": token}}]}
+            return f"data: {json.dumps(chunk)}\n\n"
+
+        async def events():
+            async for chunk in _stream_tokens(text, event):
+                yield chunk
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    completion_tokens = len(_tokens(text))
+    await _simulate_latency(completion_tokens)
+    prompt_tokens = len(prompt) // 4
+    return {
+        "id": f"standin-{int(time.time() * 1000)}",
+        "object": "chat.completion",
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+    }
@@ -1,19 +1,37 @@
 from typing import Dict, List
-import openai
 from app.core.config import settings
+from app.integrations.llm_providers import completion_cache_key, get_llm_provider
+from app.utils.rate_limiter import AICache
 
 class OpenAIIntegration:
     def __init__(self):
-        openai.api_key = settings.OPENAI_API_KEY
+        self.llm = get_llm_provider("openai")
+        self.cache = AICache(namespace="openai", max_size=settings.OPENAI_CACHE_MAX_SIZE)
+
+    async def _complete(self, messages: List[Dict], temperature: float, max_tokens: int) -> Dict:
+        """
+        Run a chat completion, serving repeats of the same prompt from the AI cache
+        """
+        cacheable = temperature <= settings.OPENAI_CACHE_MAX_TEMPERATURE
+        cache_key = completion_cache_key(getattr(self.llm, "model", self.llm.name), messages, max_tokens, temperature)
+        if cacheable:
+            cached = await self.cache.get_cached_response(cache_key)
+            if cached:
+                return {**cached, 'cached': True}
+
+        completion = await self.llm.complete(messages, temperature=temperature, max_tokens=max_tokens)
+        result = {'text': completion.text, 'usage': completion.usage}
+        if cacheable:
+            await self.cache.cache_response(cache_key, result)
+        return {**result, 'cached': False}
 
     async def generate_market_insights(self, industry: str, context: str) -> Dict:
         """
         Generate market insights using OpenAI's GPT model
         """
         try:
-            response = await openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
+            completion = await self._complete(
+                [
                     {"role": "system", "content": "You are a market analysis expert."},
                     {"role": "user", "content": f"Analyze the market for {industry} with the following context: {context}"}
                 ],
@@ -23,8 +41,9 @@ class OpenAIIntegration:
             
             return {
                 'status': 'success',
-                'insights': response.choices[0].message.content,
-                'usage': response.usage
+                'insights': completion['text'],
+                'usage': completion['usage'],
+                'cached': completion['cached']
             }
         except Exception as e:
             return {
@@ -47,9 +66,8 @@ class OpenAIIntegration:
             Generate specific growth strategies and recommendations.
             """
             
-            response = await openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
+            completion = await self._complete(
+                [
                     {"role": "system", "content": "You are a business growth strategist."},
                     {"role": "user", "content": prompt}
                 ],
@@ -59,8 +77,9 @@ class OpenAIIntegration:
             
             return {
                 'status': 'success',
-                'strategies': response.choices[0].message.content,
-                'usage': response.usage
+                'strategies': completion['text'],
+                'usage': completion['usage'],
+                'cached': completion['cached']
             }
         except Exception as e:
             return {
@@ -81,9 +100,8 @@ class OpenAIIntegration:
                 for i, comp in enumerate(competitor_info)
             ])
             
-            response = await openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
+            completion = await self._complete(
+                [
                     {"role": "system", "content": "You are a competitive analysis expert."},
                     {"role": "user", "content": f"Analyze the following competitor data and provide strategic insights:\n{competitors_text}"}
                 ],
@@ -93,11 +111,24 @@ class OpenAIIntegration:
             
             return {
                 'status': 'success',
-                'analysis': response.choices[0].message.content,
-                'usage': response.usage
+                'analysis': completion['text'],
+                'usage': completion['usage'],
+                'cached': completion['cached']
             }
         except Exception as e:
             return {
                 'status': 'error',
                 'message': str(e)
             }
+
+    def get_usage_stats(self) -> Dict:
+        """
+        Token usage and budget of the shared model client, for capacity planning
+        """
+        return self.llm.get_usage_stats() if hasattr(self.llm, "get_usage_stats") else {}
+
+    async def get_cache_stats(self) -> Dict:
+        """
+        Hit rate of the prompt cache
+        """
+        return await self.cache.get_cache_stats()
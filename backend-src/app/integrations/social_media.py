@@ -1,35 +1,66 @@
 import tweepy
 from app.core.config import settings
+from app.integrations.twitter_collector import twitter_collector
+from app.services.sentiment import sentiment_scorer
+from app.utils.shared_cache import SharedTTLCache
 from typing import Dict, List
 import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+twitter_client = tweepy.Client(
+    bearer_token=settings.TWITTER_BEARER_TOKEN
+)
+
+async def fetch_place_trends(location_id: str):
+    trends = await asyncio.to_thread(twitter_client.get_place_trends, id=location_id)
+    return trends[0] if trends else []
+
+# Trends change every few minutes; a burst of requests makes one upstream call per location.
+# Shared by every analyzer so the hot-key refresher started from the lifespan covers them all
+place_trends = SharedTTLCache(
+    "place_trends",
+    fetch_place_trends,
+    ttl=settings.TRENDS_CACHE_TTL,
+    hot_keys=settings.TRENDS_HOT_LOCATIONS,
+    hot_window=settings.TRENDS_HOT_WINDOW
+)
 
 class SocialMediaAnalyzer:
     def __init__(self):
-        self.twitter_client = tweepy.Client(
-            bearer_token=settings.TWITTER_BEARER_TOKEN
-        )
+        self.twitter_client = twitter_client
+        self.place_trends = place_trends
 
     async def analyze_twitter_sentiment(self, query: str, limit: int = 100) -> Dict:
         try:
-            tweets = self.twitter_client.search_recent_tweets(
-                query=query,
-                max_results=limit,
-                tweet_fields=['created_at', 'public_metrics']
-            )
+            # Paginates past the 100-tweet page limit, pacing pages by the API's rate-limit headers
+            tweets = await twitter_collector.search(query, limit=limit)
             
             # Process tweets and extract metrics
             tweet_data = []
-            for tweet in tweets.data or []:
+            for tweet in tweets:
                 tweet_data.append({
-                    'text': tweet.text,
-                    'metrics': tweet.public_metrics,
-                    'created_at': tweet.created_at
+                    'text': tweet.get('text', ''),
+                    'metrics': tweet.get('public_metrics'),
+                    'created_at': tweet.get('created_at')
                 })
             
+            # Score every tweet; texts from concurrent requests share model batches
+            aggregate = None
+            try:
+                scores = await sentiment_scorer.score([tweet['text'] for tweet in tweet_data])
+                for tweet, score in zip(tweet_data, scores):
+                    tweet['sentiment'] = score
+                aggregate = sentiment_scorer.aggregate(scores)
+            except Exception as e:
+                logger.error(f"Sentiment scoring failed, returning unscored tweets: {e}")
+            
             return {
                 'status': 'success',
                 'data': tweet_data,
-                'count': len(tweet_data)
+                'count': len(tweet_data),
+                'sentiment': aggregate
             }
         except Exception as e:
             return {
@@ -39,10 +70,9 @@ class SocialMediaAnalyzer:
 
     async def get_market_trends(self, location_id: str = '1') -> Dict:
         try:
-            trends = self.twitter_client.get_place_trends(id=location_id)
             return {
                 'status': 'success',
-                'trends': trends[0] if trends else []
+                'trends': await self.place_trends.get(location_id)
             }
         except Exception as e:
             return {
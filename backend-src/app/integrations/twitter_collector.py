@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import httpx
+from app.core.config import settings
+from app.utils.http_client import http_client
+
+logger = logging.getLogger(__name__)
+
+# The search endpoint returns between 10 and 100 tweets per page
+MIN_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+
+
+class RateLimitWindow:
+    """Client-side view of one endpoint's rate-limit window, fed by x-rate-limit-* headers.
+
+    Pages are only sent while the window has requests left; once it is spent,
+    callers wait for the reset instead of being answered with 429.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None  # None until the API has told us
+        self.reset_at: Optional[float] = None
+        self.waits = 0
+
+    async def acquire(self):
+        while True:
+            now = time.time()
+            if self.reset_at is not None and now >= self.reset_at:
+                self.remaining, self.reset_at = self.limit, None
+            if self.remaining is None or self.remaining > 0:
+                if self.remaining is not None:
+                    # Count the request now so concurrent queries don't all spend the last one
+                    self.remaining -= 1
+                return
+            self.waits += 1
+            delay = max(self.reset_at - now, 0) + 1
+            logger.info(f"{self.name}: rate-limit window spent, waiting {delay:.0f}s for reset")
+            await asyncio.sleep(delay)
+
+    def update(self, response: httpx.Response):
+        headers = response.headers
+        try:
+            if "x-rate-limit-limit" in headers:
+                self.limit = int(headers["x-rate-limit-limit"])
+            if "x-rate-limit-remaining" in headers:
+                self.remaining = int(headers["x-rate-limit-remaining"])
+            if "x-rate-limit-reset" in headers:
+                self.reset_at = float(headers["x-rate-limit-reset"])
+        except ValueError:
+            logger.warning(f"{self.name}: unparseable rate-limit headers")
+        if response.status_code == 429:
+            self.remaining = 0
+        if self.remaining == 0 and (self.reset_at is None or self.reset_at <= time.time()):
+            # Spent without a usable reset time: assume the next minute rather than waiting forever
+            self.reset_at = time.time() + 60
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "remaining": self.remaining,
+            "resets_in": round(self.reset_at - time.time(), 1) if self.reset_at else None,
+            "waits": self.waits
+        }
+
+
+class TwitterCollector:
+    """Async Twitter API v2 recent-search collector.
+
+    Follows ``next_token`` pagination up to the requested volume, schedules pages
+    against the endpoint's rate-limit window and streams tweets back page by page.
+    """
+
+    def __init__(self, bearer_token: str, api_url: str, max_concurrent_queries: int = 4, max_retries: int = 3):
+        self.bearer_token = bearer_token
+        self.api_url = api_url.rstrip("/")
+        self.max_concurrent_queries = max_concurrent_queries
+        self.max_retries = max_retries
+        self.search_window = RateLimitWindow("recent_search")
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.bearer_token}"}
+
+    async def _fetch_page(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        for attempt in range(self.max_retries + 1):
+            await self.search_window.acquire()
+            response = await http_client.get(f"{self.api_url}/tweets/search/recent", headers=self.headers, params=params)
+            self.search_window.update(response)
+            if response.status_code != 429 or attempt == self.max_retries:
+                break
+            logger.warning(f"Twitter search rate limited, retry {attempt + 1} after the window resets")
+        response.raise_for_status()
+        return response.json()
+
+    async def stream_search(self, query: str, limit: int = 100) -> AsyncIterator[Dict[str, Any]]:
+        """Yield up to ``limit`` recent tweets for ``query`` as pages arrive"""
+        params: Dict[str, Any] = {"query": query, "tweet.fields": "created_at,public_metrics"}
+        collected = 0
+        while collected < limit:
+            params["max_results"] = min(max(limit - collected, MIN_PAGE_SIZE), MAX_PAGE_SIZE)
+            page = await self._fetch_page(params)
+            for tweet in page.get("data") or []:
+                if collected >= limit:
+                    return
+                collected += 1
+                yield tweet
+
+            next_token = (page.get("meta") or {}).get("next_token")
+            if not next_token:
+                return
+            params["next_token"] = next_token
+
+    async def search(self, query: str, limit: int = 100) -> List[Dict[str, Any]]:
+        return [tweet async for tweet in self.stream_search(query, limit)]
+
+    async def stream_many(self, queries: List[str], limit: int = 100) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Collect several queries concurrently, yielding ``(query, tweet)`` as they arrive.
+
+        A query that fails is logged and skipped; the others keep streaming.
+        """
+        results: asyncio.Queue = asyncio.Queue(maxsize=MAX_PAGE_SIZE * 2)
+        semaphore = asyncio.Semaphore(self.max_concurrent_queries)
+        done = object()
+
+        async def collect(query: str):
+            try:
+                async with semaphore:
+                    async for tweet in self.stream_search(query, limit):
+                        await results.put((query, tweet))
+            except Exception as e:
+                logger.error(f"Twitter collection failed for '{query}': {e}")
+            finally:
+                await results.put(done)
+
+        tasks = [asyncio.create_task(collect(query)) for query in queries]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                item = await results.get()
+                if item is done:
+                    remaining -= 1
+                else:
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"recent_search": self.search_window.get_stats()}
+
+
+twitter_collector = TwitterCollector(
+    bearer_token=settings.TWITTER_BEARER_TOKEN,
+    api_url=settings.TWITTER_API_URL,
+    max_concurrent_queries=settings.TWITTER_MAX_CONCURRENT_QUERIES
+)
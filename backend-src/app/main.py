@@ -1,11 +1,47 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.routers import growth_strategy, customer_intelligence, competitor_analysis
+from app.routers.growth_strategy import deferred_jobs, llm_batcher
+from app.api.v1.endpoints import websocket
+from app.utils.http_client import http_client
+from app.utils.model_registry import model_registry
+from app.services.segment_models import segment_models
+from app.services.sentiment import sentiment_scorer
+from app.integrations.social_media import place_trends
+from app.utils.static_payloads import static_payloads
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: open the pooled upstream HTTP client
+    await http_client.start()
+    # Serialize fixed responses (fallback insights, sample data) once
+    static_payloads.build()
+    # Drain AI requests deferred by the rate limiter
+    await deferred_jobs.start()
+    # Load warm-up models in the background and unload idle ones
+    await model_registry.start()
+    # Refit stored segmentation models whose assignments have drifted
+    await segment_models.start()
+    # Refresh trends for hot locations before they expire
+    await place_trends.start()
+    yield
+    # Shutdown: stop background workers and close pooled connections
+    await place_trends.stop()
+    await segment_models.stop()
+    await model_registry.stop()
+    await deferred_jobs.stop()
+    # Let batched upstream calls that are already in flight finish
+    await llm_batcher.close()
+    await sentiment_scorer.batcher.close()
+    await http_client.close()
 
 app = FastAPI(
     title="AI Market Growth Platform",
     description="API for AI-powered market growth analysis and optimization",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -36,10 +72,25 @@ app.include_router(
     tags=["competitor-analysis"]
 )
 
+# Real-time updates, including finished deferred growth strategy jobs
+app.include_router(
+    websocket.router,
+    prefix="/api/v1",
+    tags=["websocket"]
+)
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Ready once the warm-up models are loaded"""
+    models = model_registry.get_stats()
+    if not model_registry.ready():
+        return JSONResponse(status_code=503, content={"status": "loading", "models": models})
+    return {"status": "ready", "models": models}
+
 @app.get("/")
 async def root():
     return {
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from typing import List, Dict, Any
 from pydantic import BaseModel, HttpUrl
 from ..services.competitor_analysis import CompetitorAnalyzer
+from ..utils.static_payloads import static_payloads
 import logging
 import asyncio
 
@@ -63,23 +64,32 @@ async def analyze_multiple_competitors(request: CompetitorsRequest):
             detail=str(e)
         )
 
+# This is a mock implementation - you can expand this with a real database
+SAMPLE_COMPETITORS = {
+    "tech": [
+        {"name": "TechCorp", "url": "https://www.techcorp-example.com"},
+        {"name": "InnovateTech", "url": "https://www.innovatetech-example.com"}
+    ],
+    "retail": [
+        {"name": "RetailPro", "url": "https://www.retailpro-example.com"},
+        {"name": "ShopMaster", "url": "https://www.shopmaster-example.com"}
+    ],
+    "healthcare": [
+        {"name": "HealthPlus", "url": "https://www.healthplus-example.com"},
+        {"name": "MedTech", "url": "https://www.medtech-example.com"}
+    ]
+}
+
+# Serialized once at startup; unknown industries share the empty payload
+for _industry, _competitors in SAMPLE_COMPETITORS.items():
+    static_payloads.register(f"sample_competitors:{_industry}", lambda competitors=_competitors: competitors)
+static_payloads.register("sample_competitors:", list)
+
 @router.get("/sample-competitors/{industry}")
-async def get_sample_competitors(industry: str):
+async def get_sample_competitors(industry: str, request: Request):
     """Get a list of sample competitors for a given industry."""
-    # This is a mock implementation - you can expand this with a real database
-    sample_competitors = {
-        "tech": [
-            {"name": "TechCorp", "url": "https://www.techcorp-example.com"},
-            {"name": "InnovateTech", "url": "https://www.innovatetech-example.com"}
-        ],
-        "retail": [
-            {"name": "RetailPro", "url": "https://www.retailpro-example.com"},
-            {"name": "ShopMaster", "url": "https://www.shopmaster-example.com"}
-        ],
-        "healthcare": [
-            {"name": "HealthPlus", "url": "https://www.healthplus-example.com"},
-            {"name": "MedTech", "url": "https://www.medtech-example.com"}
-        ]
-    }
-    
-    return sample_competitors.get(industry.lower(), [])
+    industry = industry.lower()
+    return static_payloads.response(
+        f"sample_competitors:{industry if industry in SAMPLE_COMPETITORS else ''}",
+        request
+    )
@@ -1,12 +1,23 @@
-from fastapi import APIRouter, HTTPException, Depends, Body
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, Body, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from functools import lru_cache
+from typing import Dict, Any, AsyncIterator, List, Optional, Set
+import asyncio
 import httpx
 import logging
-import hashlib
 import json
 from ..core.config import settings
 from ..schemas.growth_strategy import GrowthStrategyResponse, MetricData, Strategy
-from ..utils.rate_limiter import RateLimiter, AICache
+from ..utils.rate_limiter import RateLimiter, AICache, RateLimitExceeded
+from ..utils.http_client import http_client
+from ..utils.batching import MicroBatcher
+from ..utils.hedging import latency_budget, within_budget
+from ..utils.job_queue import DeferredJobQueue
+from ..utils.static_payloads import static_payloads
+from ..integrations.llm_providers import get_llm_provider
+from ..api.v1.endpoints.websocket import manager
+from ..utils.profile_canonicalizer import canonicalize_company_profile, profile_cache_key, raw_cache_key, format_money
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -14,106 +25,194 @@ logger = logging.getLogger(__name__)
 rate_limiter = RateLimiter()
 ai_cache = AICache()
 
-async def generate_growth_insights(company_data: dict) -> dict:
+MAX_STRATEGIES = 4
+
+def build_growth_prompt(profile: dict) -> str:
+    """Build the growth-strategist prompt for a canonical company profile"""
+    growth_rate = profile.get('growth_rate')
+    return f"""
+        As a business growth strategist, analyze this company:
+        Industry: {profile.get('industry') or 'Unknown'}
+        Size: {profile.get('size') or 'Unknown'}
+        Revenue: {format_money(profile.get('revenue'))}
+        Growth Rate: {f"{growth_rate:g}%" if isinstance(growth_rate, float) else growth_rate or 'Unknown'}
+        Target Market: {profile.get('target_market') or 'Unknown'}
+        Current Challenges: {profile.get('current_challenges') or 'None specified'}
+        
+        Provide specific, actionable growth strategies and key metrics to track.
+        Format the response as a business plan with clear objectives and targets.
+        """
+
+def build_strategy(index: int, point: str) -> Strategy:
+    """Turn the n-th line of model output into a Strategy"""
+    progress = 90 if index == 1 else 65 if index == 2 else 40 if index == 3 else 25
+    status = "completed" if progress >= 90 else "in_progress" if progress >= 40 else "pending"
+    
+    return Strategy(
+        id=str(index),
+        title=f"Strategy {index}",
+        description=point,
+        progress=progress,
+        status=status
+    )
+
+def build_metrics(profile: dict) -> List[MetricData]:
+    """Generate metrics based on a canonical company profile"""
+    base_revenue = profile.get('revenue')
+    growth_rate = profile.get('growth_rate')
+    if not isinstance(base_revenue, float):
+        base_revenue = 10000000  # Default $10M
+    if not isinstance(growth_rate, float):
+        growth_rate = 15  # Default 15%
+    
+    return [
+        MetricData(name="Customer Acquisition", current=int(base_revenue/100000), target=int(base_revenue/80000)),
+        MetricData(name="Revenue Growth", current=int(base_revenue), target=int(base_revenue * (1 + growth_rate/100))),
+        MetricData(name="Market Share", current=growth_rate, target=min(growth_rate * 1.3, 100)),
+        MetricData(name="Customer Retention", current=85, target=95)
+    ]
+
+class StrategyStreamParser:
+    """Incrementally turns streamed model text into strategies, one per completed line"""
+
+    def __init__(self, max_strategies: int = MAX_STRATEGIES):
+        self.max_strategies = max_strategies
+        self.buffer = ""
+        self.strategies: List[Strategy] = []
+
+    @property
+    def done(self) -> bool:
+        return len(self.strategies) >= self.max_strategies
+
+    def _emit(self, line: str) -> List[Strategy]:
+        line = line.strip()
+        if not line or self.done:
+            return []
+        strategy = build_strategy(len(self.strategies) + 1, line)
+        self.strategies.append(strategy)
+        return [strategy]
+
+    def feed(self, text: str) -> List[Strategy]:
+        """Add a chunk of generated text and return strategies whose line just completed"""
+        self.buffer += text
+        emitted = []
+        while "\n" in self.buffer and not self.done:
+            line, self.buffer = self.buffer.split("\n", 1)
+            emitted.extend(self._emit(line))
+        return emitted
+
+    def finish(self) -> List[Strategy]:
+        """Flush the trailing line once the stream has ended"""
+        line, self.buffer = self.buffer, ""
+        return self._emit(line)
+
+# HuggingFace by default; settings.LLM_PROVIDER switches it (e.g. to the local stand-in)
+llm_provider = get_llm_provider("huggingface")
+
+async def generate_batch(prompts: List[str]) -> List[str]:
+    """Send a batch of prompts as one inference request, spending a single rate-limit token"""
+    reservation = None
+    if llm_provider.rate_limited:
+        reservation = await rate_limiter.reserve("huggingface_api")
+        if reservation is None:
+            raise RateLimitExceeded("huggingface_api")
+    
+    # Identical prompts submitted concurrently only need to be generated once
+    unique_prompts = list(dict.fromkeys(prompts))
+    sent = True
     try:
-        # Generate cache key based on company data
-        cache_key = hashlib.md5(json.dumps(company_data, sort_keys=True).encode()).hexdigest()
+        completions = await llm_provider.complete_batch(unique_prompts, max_tokens=500, temperature=0.7)
+    except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+        # The request never reached the API, so the capacity was not spent
+        sent = False
+        raise
+    finally:
+        if reservation and sent:
+            await rate_limiter.commit("huggingface_api", reservation)
+        elif reservation:
+            await rate_limiter.release("huggingface_api", reservation)
+    
+    texts = dict(zip(unique_prompts, (completion.text for completion in completions)))
+    return [texts[prompt] for prompt in prompts]
+
+llm_batcher = MicroBatcher(
+    generate_batch,
+    max_batch_size=settings.HUGGINGFACE_BATCH_MAX_SIZE,
+    max_wait=settings.HUGGINGFACE_BATCH_MAX_WAIT_MS / 1000,
+    name=llm_provider.name
+)
+
+async def generate_and_cache_insights(profile: dict, cache_key: str, raw_key: str = None) -> dict:
+    """Ask the model for a canonical profile and cache the result; upstream failures propagate"""
+    # Concurrent requests share one upstream call and one rate-limit token
+    ai_text = await within_budget(llm_batcher.submit(build_growth_prompt(profile)))
+    
+    # Parse AI response into our format
+    strategy_points = [s.strip() for s in ai_text.split('\n') if s.strip()]
+    strategies = [build_strategy(i, point) for i, point in enumerate(strategy_points[:MAX_STRATEGIES], 1)]
+    result = {"metrics": build_metrics(profile), "strategies": strategies}
+    
+    # Cache the successful response
+    await ai_cache.cache_response(cache_key, result, raw_key=raw_key)
+    return result
+
+# Keep references so background refreshes are not garbage collected mid-flight
+_refresh_tasks: Set[asyncio.Task] = set()
+
+async def refresh_stale_insights(profile: dict, cache_key: str):
+    """Recompute a stale cache entry; on failure the stale entry keeps being served.
+
+    The refresh lock is only released on success, so after an upstream error or
+    rate-limit denial the next attempt waits for the lock to expire.
+    """
+    try:
+        await generate_and_cache_insights(profile, cache_key)
+        await ai_cache.release_refresh(cache_key)
+        logger.info("Refreshed stale growth insights")
+    except Exception as e:
+        logger.warning(f"Background refresh failed, keeping stale insights: {e}")
+
+async def generate_growth_insights(company_data: dict, raise_on_rate_limit: bool = False) -> dict:
+    """Growth insights for a company, falling back to demo data when the AI is unavailable.
+
+    With ``raise_on_rate_limit`` a rate-limit denial propagates as RateLimitExceeded
+    instead of returning fallback data, so the caller can defer the request.
+    """
+    try:
+        # Equivalent profiles ("$10M" vs "10000000") share one cache entry
+        profile = canonicalize_company_profile(company_data)
+        cache_key = profile_cache_key(profile)
+        raw_key = raw_cache_key(company_data)
         
         # Try to get cached response
-        cached_response = await ai_cache.get_cached_response(cache_key)
-        if cached_response:
+        cached_entry = await ai_cache.get_cached_entry(cache_key, raw_key=raw_key)
+        if cached_entry and not cached_entry["stale"]:
             logger.info("Returning cached growth insights")
-            return cached_response
-
-        # Check rate limit before making API call
-        if not await rate_limiter.check_rate_limit("huggingface_api"):
-            logger.warning("Rate limit exceeded, using fallback data")
-            return get_fallback_insights()
+            return cached_entry["response"]
+        
+        if cached_entry:
+            # Serve the stale answer now; a single background task refreshes it
+            if llm_provider.configured and await ai_cache.try_acquire_refresh(cache_key):
+                task = asyncio.create_task(refresh_stale_insights(profile, cache_key))
+                _refresh_tasks.add(task)
+                task.add_done_callback(_refresh_tasks.discard)
+            logger.info(f"Returning stale growth insights ({cached_entry['age']}s old)")
+            return cached_entry["response"]
 
         logger.info("Generating growth insights for company data: %s", company_data)
         
         # For demo purposes, generate insights without AI if no API key
-        if not settings.HUGGINGFACE_API_KEY:
-            logger.info("No HuggingFace API key found, using demo data")
+        if not llm_provider.configured:
+            logger.info(f"No API key found for {llm_provider.name}, using demo data")
             return get_fallback_insights()
 
-        prompt = f"""
-        As a business growth strategist, analyze this company:
-        Industry: {company_data.get('industry', 'Unknown')}
-        Size: {company_data.get('size', 'Unknown')}
-        Revenue: {company_data.get('revenue', 'Unknown')}
-        Growth Rate: {company_data.get('growth_rate', 'Unknown')}
-        Target Market: {company_data.get('target_market', 'Unknown')}
-        Current Challenges: {company_data.get('current_challenges', 'None specified')}
-        
-        Provide specific, actionable growth strategies and key metrics to track.
-        Format the response as a business plan with clear objectives and targets.
-        """
-
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                settings.HUGGINGFACE_API_URL,
-                headers={"Authorization": f"Bearer {settings.HUGGINGFACE_API_KEY}"},
-                json={"inputs": prompt, "parameters": {"max_length": 500, "temperature": 0.7}},
-                timeout=30.0
-            )
-            
-            if response.status_code == 429:  # Rate limit exceeded
-                logger.warning("HuggingFace API rate limit exceeded, using fallback data")
-                return get_fallback_insights()
-                
-            response.raise_for_status()
-            ai_response = response.json()
-            
-            # Parse AI response into our format
-            strategies = []
-            metrics = []
-            
-            try:
-                # Extract strategies from AI response
-                ai_text = ai_response[0]['generated_text'] if isinstance(ai_response, list) else ai_response['generated_text']
-                strategy_points = [s.strip() for s in ai_text.split('\n') if s.strip()]
-                
-                for i, point in enumerate(strategy_points[:4], 1):
-                    progress = 90 if i == 1 else 65 if i == 2 else 40 if i == 3 else 25
-                    status = "completed" if progress >= 90 else "in_progress" if progress >= 40 else "pending"
-                    
-                    strategies.append(Strategy(
-                        id=str(i),
-                        title=f"Strategy {i}",
-                        description=point,
-                        progress=progress,
-                        status=status
-                    ))
-                
-                # Generate metrics based on company data
-                revenue_str = company_data.get('revenue', '$10M').replace('$', '').replace('M', '')
-                growth_rate_str = company_data.get('growth_rate', '15%').replace('%', '')
-                
-                try:
-                    base_revenue = float(revenue_str) * 1000000
-                    growth_rate = float(growth_rate_str)
-                except ValueError:
-                    base_revenue = 10000000  # Default $10M
-                    growth_rate = 15  # Default 15%
-                
-                metrics = [
-                    MetricData(name="Customer Acquisition", current=int(base_revenue/100000), target=int(base_revenue/80000)),
-                    MetricData(name="Revenue Growth", current=int(base_revenue), target=int(base_revenue * (1 + growth_rate/100))),
-                    MetricData(name="Market Share", current=growth_rate, target=min(growth_rate * 1.3, 100)),
-                    MetricData(name="Customer Retention", current=85, target=95)
-                ]
-            
-            except Exception as e:
-                logger.error(f"Error parsing AI response: {e}")
-                return get_fallback_insights()
-            
-            result = {"metrics": metrics, "strategies": strategies}
-            
-            # Cache the successful response
-            await ai_cache.cache_response(cache_key, result)
-            return result
+        return await generate_and_cache_insights(profile, cache_key, raw_key=raw_key)
 
+    except RateLimitExceeded:
+        if raise_on_rate_limit:
+            raise
+        logger.warning("Rate limit exceeded, using fallback data")
+        return get_fallback_insights()
     except httpx.HTTPError as e:
         logger.error(f"HTTP error occurred: {e}")
         return get_fallback_insights()
@@ -121,8 +220,91 @@ async def generate_growth_insights(company_data: dict) -> dict:
         logger.error(f"Error generating insights: {e}")
         return get_fallback_insights()
 
+async def run_deferred_growth_job(payload: dict) -> dict:
+    """Worker handler for deferred jobs; RateLimitExceeded puts the job back in the queue"""
+    profile = canonicalize_company_profile(payload["company_data"])
+    cache_key = profile_cache_key(profile)
+    
+    cached_response = await ai_cache.get_cached_response(cache_key)
+    if cached_response:
+        return cached_response
+    return await generate_and_cache_insights(profile, cache_key)
+
+async def notify_deferred_growth_job(notification: dict):
+    """Push a finished deferred job to the client's WebSocket connections on this worker"""
+    await manager.broadcast_to_client(
+        {"type": "growth-strategy", "data": notification},
+        notification["client_id"]
+    )
+
+deferred_jobs = DeferredJobQueue(
+    "growth_strategy",
+    handler=run_deferred_growth_job,
+    on_complete=notify_deferred_growth_job,
+    capacity_delay=lambda: rate_limiter.seconds_until_available("huggingface_api")
+)
+
+def sse_event(event: str, data: Any) -> str:
+    """Format a server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+async def stream_growth_insights(company_data: dict) -> AsyncIterator[str]:
+    """Stream metrics and strategies as server-sent events"""
+    profile = canonicalize_company_profile(company_data)
+    cache_key = profile_cache_key(profile)
+    raw_key = raw_cache_key(company_data)
+    
+    cached_response = await ai_cache.get_cached_response(cache_key, raw_key=raw_key)
+    if cached_response:
+        logger.info("Streaming cached growth insights")
+        yield sse_event("metrics", cached_response["metrics"])
+        for strategy in cached_response["strategies"]:
+            yield sse_event("strategy", strategy)
+        yield sse_event("done", {"source": "cache"})
+        return
+    
+    if not llm_provider.configured or (
+        llm_provider.rate_limited and not await rate_limiter.check_rate_limit("huggingface_api")
+    ):
+        fallback = get_fallback_insights()
+        yield sse_event("metrics", fallback["metrics"])
+        for strategy in fallback["strategies"]:
+            yield sse_event("strategy", strategy)
+        yield sse_event("done", {"source": "fallback"})
+        return
+    
+    # Metrics only depend on company data, so send them before the model starts
+    metrics = build_metrics(profile)
+    yield sse_event("metrics", metrics)
+    
+    parser = StrategyStreamParser()
+    try:
+        async for text in llm_provider.stream(build_growth_prompt(profile), max_tokens=500, temperature=0.7):
+            for strategy in parser.feed(text):
+                yield sse_event("strategy", strategy)
+            if parser.done:
+                break
+        for strategy in parser.finish():
+            yield sse_event("strategy", strategy)
+    except Exception as e:
+        logger.error(f"Error streaming insights: {e}")
+        yield sse_event("error", {"message": "AI service unavailable"})
+        # Complete the set with fallback strategies so clients always get a full plan
+        for strategy in get_fallback_insights()["strategies"][len(parser.strategies):]:
+            yield sse_event("strategy", strategy)
+        yield sse_event("done", {"source": "fallback"})
+        return
+    
+    if parser.strategies:
+        await ai_cache.cache_response(cache_key, {"metrics": metrics, "strategies": parser.strategies}, raw_key=raw_key)
+    yield sse_event("done", {"source": "ai"})
+
+@lru_cache(maxsize=None)
 def get_fallback_insights() -> dict:
-    """Return fallback insights when AI service is unavailable"""
+    """Return fallback insights when AI service is unavailable.
+
+    Built once; callers compare against it by identity to serve the pre-serialized payload.
+    """
     return {
         "metrics": [
             MetricData(name="Customer Acquisition", current=120, target=150),
@@ -162,17 +344,63 @@ def get_fallback_insights() -> dict:
         ]
     }
 
+FALLBACK_PAYLOAD = "growth_strategy_fallback"
+static_payloads.register(FALLBACK_PAYLOAD, get_fallback_insights)
+
 @router.post("/", response_model=GrowthStrategyResponse)
 async def create_growth_strategy(
-    company_data: Dict[str, Any] = Body(...)
+    request: Request,
+    company_data: Dict[str, Any] = Body(...),
+    defer: bool = Query(False, description="Queue the request instead of returning fallback data when rate limited"),
+    priority: int = Query(0, description="Higher priorities are drained first"),
+    client_id: Optional[str] = Query(None, description="WebSocket client id to notify when a deferred job finishes")
 ) -> Dict[str, Any]:
     """Generate growth strategy based on company data"""
-    return await generate_growth_insights(company_data)
+    try:
+        with latency_budget(settings.GROWTH_STRATEGY_LATENCY_BUDGET):
+            result = await generate_growth_insights(company_data, raise_on_rate_limit=defer)
+    except RateLimitExceeded:
+        job_id = await deferred_jobs.enqueue({"company_data": company_data}, priority=priority, client_id=client_id)
+        if job_id is None:
+            result = get_fallback_insights()
+        else:
+            return JSONResponse(
+                status_code=202,
+                content={
+                    "job_id": job_id,
+                    "status": "queued",
+                    "status_url": f"{settings.API_V1_STR}/growth-strategy/jobs/{job_id}"
+                }
+            )
+    
+    if result is get_fallback_insights():
+        # Clients must revalidate since the AI may be back on the next call
+        return static_payloads.response(FALLBACK_PAYLOAD, request, cache_control="no-cache")
+    return result
+
+@router.get("/jobs/{job_id}", response_model=Dict[str, Any])
+async def get_growth_strategy_job(job_id: str) -> Dict[str, Any]:
+    """Poll a deferred growth strategy job"""
+    job = await deferred_jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+@router.post("/stream")
+async def stream_growth_strategy(
+    company_data: Dict[str, Any] = Body(...)
+) -> StreamingResponse:
+    """Stream a growth strategy as server-sent events, one strategy at a time"""
+    return StreamingResponse(
+        stream_growth_insights(company_data),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.get("/", response_model=GrowthStrategyResponse)
-async def get_growth_strategy() -> Dict[str, Any]:
+async def get_growth_strategy(request: Request) -> Response:
     """Get default growth strategy"""
-    return get_fallback_insights()
+    return static_payloads.response(FALLBACK_PAYLOAD, request)
 
 @router.get("/health", response_model=Dict[str, Any])
 async def health_check() -> Dict[str, Any]:
@@ -181,19 +409,26 @@ async def health_check() -> Dict[str, Any]:
         # Get cache stats
         cache_stats = await ai_cache.get_cache_stats()
         
-        # Check if we can make a request
-        can_make_request = await rate_limiter.check_rate_limit("huggingface_api")
+        # Inspect the quota without spending it
+        quota = await rate_limiter.get_quota("huggingface_api")
         
         return {
             "status": "healthy",
             "cache": cache_stats,
             "rate_limiter": {
-                "can_make_request": can_make_request,
+                **quota,
                 "max_requests_per_hour": rate_limiter.max_requests,
                 "min_interval_seconds": rate_limiter.min_interval
             },
+            "batching": llm_batcher.get_stats(),
+            "hedging": llm_provider.get_hedge_stats() if hasattr(llm_provider, "get_hedge_stats") else None,
+            "deferred_jobs": {
+                "queued": await deferred_jobs.queue_length()
+            },
             "huggingface_api": {
-                "configured": bool(settings.HUGGINGFACE_API_KEY)
+                "provider": llm_provider.name,
+                "configured": llm_provider.configured,
+                "upstream_timings": http_client.get_timing_stats(getattr(llm_provider, "api_url", None))
             }
         }
     except Exception as e:
@@ -1,72 +1,199 @@
-from typing import Dict, List
-import openai
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import time
 from app.core.config import settings
 from app.integrations.social_media import SocialMediaAnalyzer
+from app.integrations.llm_providers import get_llm_provider
+from app.analysis.trend_detection import trend_engine
+from app.analysis.segmentation import FEATURES, SegmentationEngine, SegmentationModel, SegmentationResult
+from app.analysis.forecasting import ForecastEngine, to_panel
+from app.analysis.ingestion import ArraySpool, AsyncStreamReader, IngestionError, IngestionStats, parse_upload, validate_chunk
+from app.services.segment_models import segment_models
+from app.services.sentiment import SENTIMENT_MODEL
+import numpy as np
 import pandas as pd
-from sklearn.cluster import KMeans
-from transformers import pipeline
+from app.utils.hedging import remaining_budget
+from app.utils.model_registry import model_registry
+
+logger = logging.getLogger(__name__)
 
 class MarketAnalysisService:
     def __init__(self):
         self.social_media = SocialMediaAnalyzer()
-        self.sentiment_analyzer = pipeline("sentiment-analysis")
-        openai.api_key = settings.OPENAI_API_KEY
+        self.llm = get_llm_provider("openai")
 
-    async def analyze_market_trends(self, industry: str, location: str) -> Dict:
+    async def _fetch_source(self, name: str, awaitable: Awaitable[Dict], timeout: float) -> Tuple[Any, Dict]:
+        """Await one source under its own deadline, capped by the request's latency budget"""
+        remaining = remaining_budget()
+        if remaining is not None:
+            timeout = min(timeout, max(remaining, 0))
+        
+        started = time.perf_counter()
         try:
-            # Get social media trends
-            social_trends = await self.social_media.get_market_trends()
-            
-            # Analyze industry-specific sentiment
-            sentiment = await self.social_media.analyze_twitter_sentiment(
-                query=f"{industry} {location}"
+            result = await asyncio.wait_for(awaitable, timeout)
+            failed = isinstance(result, dict) and (result.get('status') == 'error' or 'error' in result)
+            status = {'status': 'error' if failed else 'ok'}
+        except asyncio.TimeoutError:
+            logger.warning(f"Market trends source '{name}' timed out after {timeout:.1f}s")
+            result, status = None, {'status': 'timeout'}
+        except Exception as e:
+            logger.error(f"Market trends source '{name}' failed: {e}")
+            result, status = None, {'status': 'error', 'message': str(e)}
+        
+        status['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        return result, status
+
+    async def analyze_market_trends(self, industry: str, location: str) -> Dict:
+        """Fetch trends, sentiment and AI insights concurrently; a failed source leaves a partial result"""
+        sources = {
+            'trends': (self.social_media.get_market_trends(), settings.TWITTER_TRENDS_TIMEOUT),
+            'market_insights': (self._get_ai_market_insights(industry, location), settings.AI_MARKET_INSIGHTS_TIMEOUT)
+        }
+        sentiment_ready = model_registry.is_loaded(SENTIMENT_MODEL)
+        if sentiment_ready:
+            sources['sentiment'] = (
+                self.social_media.analyze_twitter_sentiment(query=f"{industry} {location}"),
+                settings.TWITTER_SEARCH_TIMEOUT
             )
-            
-            # Get AI-powered market insights
-            market_insights = await self._get_ai_market_insights(industry, location)
-            
-            return {
-                'trends': social_trends,
-                'sentiment': sentiment,
-                'market_insights': market_insights
+        else:
+            # The first request starts the load; until it finishes sentiment is reported as unavailable
+            model_registry.load_in_background(SENTIMENT_MODEL)
+        
+        fetched = await asyncio.gather(*(
+            self._fetch_source(name, awaitable, timeout) for name, (awaitable, timeout) in sources.items()
+        ))
+        
+        response = {name: result for name, (result, _) in zip(sources, fetched)}
+        response['sources'] = {name: status for name, (_, status) in zip(sources, fetched)}
+        if not sentiment_ready:
+            response['sentiment'] = None
+            response['sources']['sentiment'] = {
+                'status': 'unavailable',
+                'message': f"Loading model: {SENTIMENT_MODEL}",
+                'elapsed_ms': 0.0
             }
-        except Exception as e:
-            return {'error': str(e)}
+        
+        # Feed collected tweets into the industry's streaming trend counters
+        sentiment = response['sentiment']
+        if response['sources']['sentiment']['status'] == 'ok' and sentiment.get('data'):
+            trend_engine.add_texts(industry, (tweet['text'] for tweet in sentiment['data']))
+        response['emerging_terms'] = trend_engine.emerging_terms(industry)
+        response['partial'] = any(status['status'] != 'ok' for status in response['sources'].values())
+        return response
 
     async def _get_ai_market_insights(self, industry: str, location: str) -> Dict:
         try:
-            # Use OpenAI to generate market insights
-            response = await openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a market analysis expert."},
-                    {"role": "user", "content": f"Provide market insights for {industry} in {location}"}
-                ]
-            )
+            # Use the configured LLM (OpenAI by default) to generate market insights
+            completion = await self.llm.complete([
+                {"role": "system", "content": "You are a market analysis expert."},
+                {"role": "user", "content": f"Provide market insights for {industry} in {location}"}
+            ])
             
             return {
-                'insights': response.choices[0].message.content,
-                'confidence': response.choices[0].finish_reason == 'stop'
+                'insights': completion.text,
+                'confidence': completion.finish_reason == 'stop'
             }
         except Exception as e:
             return {'error': str(e)}
 
-    async def segment_customers(self, customer_data: List[Dict]) -> Dict:
+    async def segment_customers(
+        self,
+        customer_data: List[Dict],
+        n_clusters: int = 4,
+        auto_k: bool = False,
+        model_name: Optional[str] = None
+    ) -> Dict:
         try:
-            # Convert customer data to DataFrame
+            # Convert customer data to a feature matrix
             df = pd.DataFrame(customer_data)
-            
-            # Perform customer segmentation using KMeans
-            kmeans = KMeans(n_clusters=4, random_state=42)
-            segments = kmeans.fit_predict(df[['revenue', 'frequency', 'recency']])
-            
-            return {
-                'segments': segments.tolist(),
-                'segment_centers': kmeans.cluster_centers_.tolist()
-            }
+            X = df[FEATURES].to_numpy(dtype=float)
+
+            # Standardized MiniBatchKMeans, off the event loop; auto_k picks the count by silhouette
+            engine = SegmentationEngine(
+                n_clusters=None if auto_k else n_clusters,
+                chunk_size=settings.SEGMENTATION_CHUNK_SIZE,
+                sample_size=settings.SEGMENTATION_SAMPLE_SIZE
+            )
+            result = await asyncio.to_thread(engine.fit, X)
         except Exception as e:
             return {'error': str(e)}
 
+        response = result.to_dict()
+        if model_name:
+            response['model'] = self._save_model(model_name, engine, result)
+        return response
+
+    def _save_model(self, model_name: str, engine: SegmentationEngine, result: SegmentationResult) -> Dict:
+        """Store a fit for assign; a failed save is reported without discarding the segmentation"""
+        try:
+            # Saved models label new customers via assign without refitting
+            version = segment_models.save(model_name, SegmentationModel.from_fit(engine, result))
+            return {'name': model_name, 'version': version}
+        except Exception as e:
+            logger.error(f"Failed to save segmentation model '{model_name}': {e}")
+            return {'name': model_name, 'error': str(e)}
+
+    async def segment_customer_upload(
+        self,
+        body: AsyncIterator[bytes],
+        content_type: str,
+        n_clusters: int = 4,
+        auto_k: bool = False,
+        model_name: Optional[str] = None
+    ) -> Dict:
+        """Segment a CSV, Parquet or Arrow upload without materializing it.
+
+        The body is parsed in chunks into float arrays on a worker thread while it
+        arrives; the scaling pass runs on those chunks as they are parsed and
+        spooled, and the later passes re-read the spool. Invalid input raises
+        IngestionError.
+        """
+        engine = SegmentationEngine(
+            n_clusters=None if auto_k else n_clusters,
+            chunk_size=settings.SEGMENTATION_CHUNK_SIZE,
+            sample_size=settings.SEGMENTATION_SAMPLE_SIZE
+        )
+        reader = AsyncStreamReader(body, asyncio.get_running_loop())
+        spool = ArraySpool()
+        stats = IngestionStats()
+
+        def fit():
+            parsed = parse_upload(
+                reader,
+                content_type,
+                settings.SEGMENTATION_CHUNK_SIZE,
+                spool_bytes=settings.SEGMENTATION_UPLOAD_SPOOL_MB * 2 ** 20
+            )
+            validated = (validate_chunk(chunk, stats) for chunk in parsed)
+            try:
+                return engine.fit_chunks(
+                    spool.chunks(settings.SEGMENTATION_CHUNK_SIZE),
+                    return_labels=False,
+                    first_pass=spool.tee(validated)
+                )
+            except IngestionError:
+                raise
+            except ValueError:
+                if not stats.rows:
+                    raise IngestionError(f"No valid customer rows ({stats.rejected} rejected)")
+                raise
+
+        try:
+            started = time.perf_counter()
+            result = await asyncio.to_thread(fit)
+        finally:
+            spool.close()
+        logger.info(
+            f"Segmented upload of {stats.rows} customers ({reader.bytes_read / 2 ** 20:.1f} MiB, "
+            f"{stats.rejected} rejected) in {time.perf_counter() - started:.1f}s"
+        )
+        response = result.to_dict()
+        response['ingestion'] = {'rows': stats.rows, 'rejected': stats.rejected, 'chunks': stats.chunks, 'bytes': reader.bytes_read}
+        if model_name:
+            response['model'] = self._save_model(model_name, engine, result)
+        return response
+
     async def predict_market_size(self, industry_data: Dict) -> Dict:
         try:
             # Simple market size prediction using historical data
@@ -76,11 +203,36 @@ class MarketAnalysisService:
             growth_rate = df['market_size'].pct_change().mean()
             current_size = df['market_size'].iloc[-1]
             predicted_size = current_size * (1 + growth_rate)
-            
+
+            # Holt trend forecast with intervals for the following periods
+            engine = ForecastEngine("holt", horizon=int(industry_data.get('horizon', 4)))
+            forecast = engine.forecast(to_panel([df['market_size'].astype(float).tolist()]))
+
             return {
-                'current_size': current_size,
-                'predicted_size': predicted_size,
-                'growth_rate': growth_rate
+                'current_size': float(current_size),
+                'predicted_size': float(predicted_size),
+                'growth_rate': float(growth_rate),
+                'forecast': forecast.series(0)
             }
         except Exception as e:
             return {'error': str(e)}
+
+    async def forecast_market_sizes(
+        self,
+        series: Dict[str, List[Optional[float]]],
+        method: str = "holt",
+        horizon: int = 4,
+        interval: float = 0.95
+    ) -> Dict:
+        """Forecast many market-size series (e.g. industry/region pairs) in one vectorized fit"""
+        names = list(series)
+        engine = ForecastEngine(method, horizon=horizon, interval=interval, chunk_size=settings.FORECAST_SERIES_CHUNK)
+        panel = to_panel([[np.nan if value is None else value for value in series[name]] for name in names])
+        forecast = await asyncio.to_thread(engine.forecast, panel)
+        return {
+            'method': method,
+            'horizon': horizon,
+            'interval': interval,
+            'fit_seconds': round(forecast.fit_seconds, 3),
+            'series': {name: forecast.series(i) for i, name in enumerate(names)}
+        }
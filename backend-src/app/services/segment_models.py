@@ -0,0 +1,222 @@
+import asyncio
+import json
+import logging
+import math
+from typing import Any, Dict, List, Optional
+import numpy as np
+import redis
+from app.analysis.segmentation import SegmentationEngine, SegmentationModel, feature_matrix
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def population_stability(expected: List[float], observed: List[float]) -> float:
+    """Population stability index between two segment-share distributions (0.1 minor shift, 0.2 significant)"""
+    psi = 0.0
+    for e, o in zip(expected, observed):
+        e, o = max(e, 1e-4), max(o, 1e-4)
+        psi += (o - e) * math.log(o / e)
+    return psi
+
+
+class SegmentModelStore:
+    """Versioned segmentation models in Redis, with drift tracking and refits.
+
+    Every fit is saved as a new version and becomes the latest. Assignments use the
+    latest version, the only one held in memory once parsed, and update per-version counters
+    (customers per segment, summed distance) plus a capped per-version sample of
+    recent rows. A background check refits from that sample when the segment mix
+    or the distance to centers has drifted past the thresholds; saving the refit
+    drops the superseded version's counters and sample.
+    """
+
+    def __init__(
+        self,
+        psi_threshold: float = 0.2,
+        distance_ratio_threshold: float = 1.5,
+        min_samples: int = 500,
+        sample_size: int = 50000,
+        check_interval: float = 3600
+    ):
+        self.psi_threshold = psi_threshold
+        self.distance_ratio_threshold = distance_ratio_threshold
+        self.min_samples = min_samples
+        self.sample_size = sample_size
+        self.check_interval = check_interval
+        self._models: Dict[str, SegmentationModel] = {}  # name -> parsed latest version
+        self._checker: Optional[asyncio.Task] = None
+        self._stats = {"assigned": 0, "refits": 0}
+        try:
+            # Models are long-lived data rather than cache entries, so they get their own db
+            self.redis_client = redis.Redis(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                db=3,
+                decode_responses=True
+            )
+        except Exception as e:
+            logger.error(f"Failed to initialize Redis segment model store: {e}")
+            self.redis_client = None
+
+    def _require_redis(self):
+        if not self.redis_client:
+            raise RuntimeError("Segment model store unavailable")
+
+    def save(self, name: str, model: SegmentationModel) -> int:
+        """Store ``model`` as the next version of ``name`` and make it the latest"""
+        self._require_redis()
+        model.version = self.redis_client.incr(f"segments:{name}:next_version")
+        pipe = self.redis_client.pipeline()
+        pipe.set(f"segments:{name}:v{model.version}", json.dumps(model.to_dict()))
+        pipe.set(f"segments:{name}:latest", model.version)
+        pipe.sadd("segments:names", name)
+        # Rows assigned by the previous version only matter for its drift, which is now history
+        pipe.delete(self._drift_key(name, model.version - 1), self._sample_key(name, model.version - 1))
+        pipe.execute()
+        self._cache(name, model)
+        logger.info(f"Saved segmentation model '{name}' v{model.version} (k={model.k}, {model.n_samples} customers)")
+        return model.version
+
+    def _drift_key(self, name: str, version: int) -> str:
+        return f"segments:{name}:v{version}:drift"
+
+    def _sample_key(self, name: str, version: int) -> str:
+        return f"segments:{name}:v{version}:sample"
+
+    def _cache(self, name: str, model: SegmentationModel):
+        """Keep ``model`` in memory unless a newer version of ``name`` already is"""
+        cached = self._models.get(name)
+        if cached is None or cached.version <= model.version:
+            self._models[name] = model
+
+    def latest_version(self, name: str) -> Optional[int]:
+        self._require_redis()
+        version = self.redis_client.get(f"segments:{name}:latest")
+        return int(version) if version is not None else None
+
+    def load(self, name: str, version: Optional[int] = None) -> SegmentationModel:
+        """A stored model, the latest by default; raises LookupError if there is none"""
+        self._require_redis()
+        version = version or self.latest_version(name)
+        if version is None:
+            raise LookupError(f"No segmentation model named '{name}'")
+        model = self._models.get(name)
+        if model is None or model.version != version:
+            data = self.redis_client.get(f"segments:{name}:v{version}")
+            if data is None:
+                raise LookupError(f"No version {version} of segmentation model '{name}'")
+            model = SegmentationModel.from_dict(json.loads(data))
+            self._cache(name, model)
+        return model
+
+    def assign(self, name: str, customers: List[Dict]) -> Dict[str, Any]:
+        """Label customers with the latest model and record them for drift tracking"""
+        model = self.load(name)
+        X = feature_matrix(customers)
+        labels, distances = model.assign(X)
+        self._record(name, model, X, labels, distances)
+        self._stats["assigned"] += len(labels)
+        return {"version": model.version, "segments": labels.tolist(), "distances": np.round(distances, 4).tolist()}
+
+    def _record(self, name: str, model: SegmentationModel, X: np.ndarray, labels: np.ndarray, distances: np.ndarray):
+        if not len(labels):
+            return
+        counts_key = self._drift_key(name, model.version)
+        sample_key = self._sample_key(name, model.version)
+        try:
+            pipe = self.redis_client.pipeline()
+            pipe.hincrby(counts_key, "n", len(labels))
+            pipe.hincrbyfloat(counts_key, "distance", float(distances.sum()))
+            for segment, count in enumerate(np.bincount(labels, minlength=model.k)):
+                if count:
+                    pipe.hincrby(counts_key, f"segment:{segment}", int(count))
+            pipe.lpush(sample_key, *(json.dumps(row) for row in X.tolist()))
+            pipe.ltrim(sample_key, 0, self.sample_size - 1)
+            pipe.execute()
+        except Exception as e:
+            # Assignment still succeeds; drift is just measured on fewer customers
+            logger.error(f"Segment drift recording error: {e}")
+
+    def drift(self, name: str) -> Dict[str, Any]:
+        """Drift of customers assigned since the latest fit, relative to the fit itself"""
+        model = self.load(name)
+        counts = self.redis_client.hgetall(self._drift_key(name, model.version))
+        n = int(counts.get("n", 0))
+        result = {"version": model.version, "assigned": n, "psi": None, "distance_ratio": None, "drifted": False}
+        if not n:
+            return result
+        shares = [int(counts.get(f"segment:{segment}", 0)) / n for segment in range(model.k)]
+        psi = population_stability(model.baseline_shares, shares)
+        distance_ratio = float(counts.get("distance", 0)) / n / max(model.baseline_distance, 1e-9)
+        result.update({
+            "shares": [round(share, 4) for share in shares],
+            "psi": round(psi, 4),
+            "distance_ratio": round(distance_ratio, 4),
+            "drifted": n >= self.min_samples and (psi > self.psi_threshold or distance_ratio > self.distance_ratio_threshold)
+        })
+        return result
+
+    def refit(self, name: str) -> Optional[int]:
+        """Fit a new version of ``name`` on the recent sample, keeping its number of segments"""
+        model = self.load(name)
+        rows = [json.loads(row) for row in self.redis_client.lrange(self._sample_key(name, model.version), 0, -1)]
+        if len(rows) < max(self.min_samples, model.k):
+            logger.info(f"Not refitting '{name}': only {len(rows)} recent customers")
+            return None
+        engine = SegmentationEngine(n_clusters=model.k, chunk_size=settings.SEGMENTATION_CHUNK_SIZE)
+        result = engine.fit(np.array(rows), return_labels=False)
+        version = self.save(name, SegmentationModel.from_fit(engine, result))
+        self._stats["refits"] += 1
+        return version
+
+    async def refit_drifted(self) -> List[str]:
+        """Refit every model whose drift crossed a threshold; a Redis lock keeps it to one worker per model"""
+        refitted = []
+        for name in self.redis_client.smembers("segments:names"):
+            try:
+                drift = self.drift(name)
+                if not drift["drifted"]:
+                    continue
+                if not self.redis_client.set(f"segments:{name}:refit_lock", 1, nx=True, ex=600):
+                    continue
+                logger.info(f"Segmentation model '{name}' drifted (psi {drift['psi']}, distance ratio {drift['distance_ratio']}), refitting")
+                if await asyncio.to_thread(self.refit, name) is not None:
+                    refitted.append(name)
+            except Exception as e:
+                logger.error(f"Segment refit error for '{name}': {e}")
+        return refitted
+
+    async def _check(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await self.refit_drifted()
+            except Exception as e:
+                logger.error(f"Segment drift check error: {e}")
+
+    async def start(self):
+        """Start the scheduled drift check; called from the lifespan"""
+        if self.redis_client and self.check_interval > 0 and self._checker is None:
+            self._checker = asyncio.create_task(self._check())
+
+    async def stop(self):
+        if self._checker is not None:
+            self._checker.cancel()
+            try:
+                await self._checker
+            except asyncio.CancelledError:
+                pass
+            self._checker = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self._stats, "models_in_memory": len(self._models)}
+
+
+segment_models = SegmentModelStore(
+    psi_threshold=settings.SEGMENTATION_DRIFT_PSI,
+    distance_ratio_threshold=settings.SEGMENTATION_DRIFT_DISTANCE_RATIO,
+    min_samples=settings.SEGMENTATION_DRIFT_MIN_SAMPLES,
+    sample_size=settings.SEGMENTATION_REFIT_SAMPLE_SIZE,
+    check_interval=settings.SEGMENTATION_DRIFT_CHECK_SECONDS
+)
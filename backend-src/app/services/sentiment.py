@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+from app.core.config import settings
+from app.utils.batching import MicroBatcher
+from app.utils.model_registry import model_registry
+
+logger = logging.getLogger(__name__)
+
+SENTIMENT_MODEL = "sentiment-analysis"
+
+def load_sentiment_pipeline():
+    # transformers is imported here so that importing this module stays cheap
+    from transformers import pipeline
+    return pipeline("sentiment-analysis", model=settings.SENTIMENT_MODEL)
+
+model_registry.register(SENTIMENT_MODEL, load_sentiment_pipeline)
+
+def _inference_threads() -> int:
+    """Cores a forward pass runs on: torch's intra-op threads once torch is loaded"""
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        return torch.get_num_threads()
+    return os.cpu_count() or 1
+
+class SentimentScorer:
+    """Scores texts from concurrent requests in shared batches.
+
+    Texts submitted within ``max_wait`` are grouped by the MicroBatcher, sorted by
+    length and split into forward passes of ``model_batch_size`` so each pass pads
+    to similar lengths. Inference runs on a single worker thread, off the event
+    loop and without competing with itself for cores.
+    """
+
+    def __init__(self, max_batch_size: int = 64, max_wait: float = 0.02, model_batch_size: int = 16):
+        self.model_batch_size = model_batch_size
+        self.batcher = MicroBatcher(self._score_batch, max_batch_size=max_batch_size, max_wait=max_wait, name="sentiment")
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sentiment")
+        self._stats = {"texts": 0, "forward_passes": 0, "inference_seconds": 0.0}
+
+    def _run_model(self, model: Any, texts: List[str]) -> List[Dict[str, Any]]:
+        # Similar lengths in one pass means little padding, which is most of the wasted compute
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        results: List[Dict[str, Any]] = [None] * len(texts)
+        started = time.perf_counter()
+        for start in range(0, len(order), self.model_batch_size):
+            chunk = order[start:start + self.model_batch_size]
+            outputs = model([texts[i] for i in chunk], batch_size=len(chunk), truncation=True)
+            for i, output in zip(chunk, outputs):
+                results[i] = {"label": output["label"].lower(), "score": round(float(output["score"]), 4)}
+            self._stats["forward_passes"] += 1
+        self._stats["inference_seconds"] += time.perf_counter() - started
+        self._stats["texts"] += len(texts)
+        return results
+
+    async def _score_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        model = await model_registry.get(SENTIMENT_MODEL)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._run_model, model, texts)
+
+    async def score(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Per-text ``{"label", "score"}``, in input order"""
+        return list(await asyncio.gather(*(self.batcher.submit(text or "") for text in texts)))
+
+    @staticmethod
+    def aggregate(scores: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Label counts and mean polarity (-1 all negative, +1 all positive)"""
+        if not scores:
+            return {"count": 0, "labels": {}, "polarity": None, "label": None}
+        labels: Dict[str, int] = {}
+        polarity = 0.0
+        for score in scores:
+            labels[score["label"]] = labels.get(score["label"], 0) + 1
+            polarity += score["score"] if score["label"] == "positive" else -score["score"]
+        polarity /= len(scores)
+        return {
+            "count": len(scores),
+            "labels": labels,
+            "polarity": round(polarity, 4),
+            "label": "positive" if polarity > 0 else "negative" if polarity < 0 else "neutral"
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Inference throughput; ``texts_per_second_per_core`` is comparable across machine sizes"""
+        seconds = self._stats["inference_seconds"]
+        texts_per_second = self._stats["texts"] / seconds if seconds else None
+        cores = _inference_threads()
+        return {
+            **self._stats,
+            "inference_seconds": round(seconds, 3),
+            "texts_per_second": round(texts_per_second, 1) if texts_per_second else None,
+            "texts_per_second_per_core": round(texts_per_second / cores, 1) if texts_per_second else None,
+            "cores": cores,
+            "batching": self.batcher.get_stats()
+        }
+
+sentiment_scorer = SentimentScorer(
+    max_batch_size=settings.SENTIMENT_BATCH_MAX_SIZE,
+    max_wait=settings.SENTIMENT_BATCH_MAX_WAIT_MS / 1000,
+    model_batch_size=settings.SENTIMENT_MODEL_BATCH_SIZE
+)
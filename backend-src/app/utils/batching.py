@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Generic, List, Optional, Set, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """Collects items submitted by concurrent callers and processes them in one call.
+
+    A batch is dispatched when ``max_batch_size`` items are waiting or ``max_wait``
+    seconds after the first item arrived, whichever comes first. ``process_batch``
+    must return one result per item, in order; an exception fails every caller
+    in that batch. Call ``close`` on shutdown to finish batches still in flight.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[T]], Awaitable[List[R]]],
+        max_batch_size: int = 8,
+        max_wait: float = 0.05,
+        name: str = "batch"
+    ):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.name = name
+        self._pending: List[Tuple[T, asyncio.Future]] = []
+        self._timer: Optional[asyncio.Task] = None
+        # Keep references so in-flight batches are not garbage collected mid-flight
+        self._tasks: Set[asyncio.Task] = set()
+        self._stats = {"batches": 0, "items": 0, "errors": 0, "max_batch": 0}
+
+    async def submit(self, item: T) -> R:
+        """Queue an item and wait for its result"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_after_wait())
+
+        return await future
+
+    async def _flush_after_wait(self):
+        await asyncio.sleep(self.max_wait)
+        self._timer = None
+        self._flush()
+
+    def _flush(self):
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+            self._timer = None
+
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._task_done)
+
+    def _task_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"{self.name}: batch task failed: {task.exception()}")
+
+    async def _run(self, batch: List[Tuple[T, asyncio.Future]]):
+        items = [item for item, _ in batch]
+        started = time.perf_counter()
+        try:
+            results = await self.process_batch(items)
+            if len(results) != len(items):
+                raise ValueError(f"{self.name}: expected {len(items)} results, got {len(results)}")
+        except Exception as e:
+            self._stats["errors"] += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._stats["batches"] += 1
+            self._stats["items"] += len(items)
+            self._stats["max_batch"] = max(self._stats["max_batch"], len(items))
+
+        logger.debug(f"{self.name}: processed {len(items)} items in {time.perf_counter() - started:.3f}s")
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def close(self):
+        """Dispatch anything still pending and wait for in-flight batches; called from the lifespan"""
+        if self._pending:
+            self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Batch counters; ``avg_batch_size`` is the items served per upstream call"""
+        batches = self._stats["batches"]
+        return {
+            **self._stats,
+            "pending": len(self._pending),
+            "in_flight": len(self._tasks),
+            "avg_batch_size": round(self._stats["items"] / batches, 2) if batches else 0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000
+        }
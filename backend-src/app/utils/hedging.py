@@ -0,0 +1,182 @@
+import asyncio
+import contextvars
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, Optional, TypeVar
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Monotonic deadline of the request being served; asyncio tasks inherit it when created
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("latency_deadline", default=None)
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """Raised when the request's latency budget is spent"""
+
+
+@contextmanager
+def latency_budget(seconds: Optional[float]) -> Iterator[None]:
+    """Bound everything awaited inside to ``seconds``; a nested budget can only shrink the outer one"""
+    if not seconds:
+        yield
+        return
+
+    deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    if outer is not None:
+        deadline = min(deadline, outer)
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_budget() -> Optional[float]:
+    """Seconds left in the current budget, or None when no budget applies"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+async def within_budget(awaitable: Awaitable[T]) -> T:
+    """Await under the remaining budget, raising DeadlineExceeded once it runs out"""
+    remaining = remaining_budget()
+    if remaining is None:
+        return await awaitable
+    if remaining <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded("Latency budget exhausted")
+    try:
+        return await asyncio.wait_for(awaitable, remaining)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded("Latency budget exhausted")
+
+
+class LatencyTracker:
+    """Rolling window of call latencies per key"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, key: str, seconds: float):
+        self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, key: str, pct: float) -> Optional[float]:
+        """Latency at ``pct``, or None until enough samples are in"""
+        samples = self._samples.get(key)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        values = sorted(samples)
+        return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+class Hedger:
+    """Races a duplicate call against one that outlives the observed tail latency.
+
+    The primary call starts immediately. If it has not finished once the tracked
+    percentile has elapsed, the hedge call is started too and the first success
+    wins; the loser is cancelled. Everything is bounded by the caller's latency budget.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        percentile: float = 0.95,
+        min_delay: float = 0.2,
+        tracker: Optional[LatencyTracker] = None
+    ):
+        self.name = name
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.tracker = tracker or LatencyTracker()
+        self._stats = {"calls": 0, "hedged": 0, "hedge_wins": 0, "failures": 0, "deadline_exceeded": 0}
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        observed = self.tracker.percentile(key, self.percentile)
+        if observed is None:
+            return None
+        return max(observed, self.min_delay)
+
+    async def run(
+        self,
+        key: str,
+        primary: Callable[[], Awaitable[T]],
+        hedge: Optional[Callable[[], Awaitable[T]]] = None
+    ) -> T:
+        """Run ``primary``, hedging with ``hedge`` (or a second ``primary``) past the tail latency"""
+        remaining = remaining_budget()
+        if remaining is not None and remaining <= 0:
+            self._stats["deadline_exceeded"] += 1
+            raise DeadlineExceeded(f"{self.name}: latency budget exhausted")
+
+        self._stats["calls"] += 1
+        delay = self.hedge_delay(key)
+        started = time.monotonic()
+        tasks: Dict[asyncio.Task, str] = {asyncio.ensure_future(primary()): "primary"}
+        hedged = False
+        error: Optional[BaseException] = None
+
+        try:
+            while tasks:
+                timeout = None if hedged or delay is None else max(delay - (time.monotonic() - started), 0)
+                remaining = remaining_budget()
+                if remaining is not None:
+                    timeout = remaining if timeout is None else min(timeout, remaining)
+
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    remaining = remaining_budget()
+                    if remaining is not None and remaining <= 0:
+                        self._stats["deadline_exceeded"] += 1
+                        raise DeadlineExceeded(f"{self.name}: latency budget exhausted")
+                    if not hedged:
+                        hedged = True
+                        self._stats["hedged"] += 1
+                        logger.info(f"{self.name}: {key} exceeded {delay:.2f}s, sending hedged request")
+                        tasks[asyncio.ensure_future((hedge or primary)())] = "hedge"
+                    continue
+
+                for task in done:
+                    label = tasks.pop(task)
+                    if task.exception() is None:
+                        # Time until the first answer; a slow primary that lost still counts as slow
+                        self.tracker.record(key, time.monotonic() - started)
+                        if label == "hedge":
+                            self._stats["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+
+            self._stats["failures"] += 1
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hedge counters; ``hedge_rate`` is the share of calls that needed a duplicate"""
+        calls = self._stats["calls"]
+        return {
+            **self._stats,
+            "hedge_rate": round(self._stats["hedged"] / calls, 4) if calls else 0,
+            "percentile": self.percentile
+        }
+
+
+def build_hedger(name: str) -> Hedger:
+    """Hedger configured from the LLM_HEDGE_* settings"""
+    return Hedger(
+        name,
+        percentile=settings.LLM_HEDGE_PERCENTILE,
+        min_delay=settings.LLM_HEDGE_MIN_DELAY_MS / 1000,
+        tracker=LatencyTracker(settings.LLM_LATENCY_WINDOW, settings.LLM_HEDGE_MIN_SAMPLES)
+    )
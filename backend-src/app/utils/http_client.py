@@ -0,0 +1,205 @@
+import httpx
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, asdict
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+from urllib.parse import urlparse
+from ..core.config import settings
+from .hedging import DeadlineExceeded, remaining_budget
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  (required by httpx for HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+@dataclass
+class UpstreamTiming:
+    host: str
+    method: str
+    status_code: Optional[int]
+    http_version: Optional[str]
+    connect_ms: Optional[float]  # None when a pooled connection was reused
+    ttfb_ms: Optional[float]
+    total_ms: float
+    reused_connection: bool
+
+
+class _RequestTracer:
+    """Collects httpcore trace events for a single request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.connect_started: Optional[float] = None
+        self.connect_finished: Optional[float] = None
+        self.headers_received: Optional[float] = None
+
+    async def __call__(self, event_name: str, info: Dict[str, Any]):
+        now = time.perf_counter()
+        if event_name == "connection.connect_tcp.started":
+            self.connect_started = now
+        elif event_name in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+            self.connect_finished = now
+        elif event_name.endswith("receive_response_headers.complete"):
+            self.headers_received = now
+
+    def _ms(self, start: Optional[float], end: Optional[float]) -> Optional[float]:
+        if start is None or end is None:
+            return None
+        return round((end - start) * 1000, 2)
+
+    def timing(self, request: httpx.Request, response: Optional[httpx.Response]) -> UpstreamTiming:
+        return UpstreamTiming(
+            host=request.url.host,
+            method=request.method,
+            status_code=response.status_code if response is not None else None,
+            http_version=response.http_version if response is not None else None,
+            connect_ms=self._ms(self.connect_started, self.connect_finished),
+            ttfb_ms=self._ms(self.started, self.headers_received),
+            total_ms=self._ms(self.started, time.perf_counter()),
+            reused_connection=self.connect_started is None
+        )
+
+
+class HTTPClientManager:
+    """Application-lifetime pooled HTTP client for upstream API calls"""
+
+    def __init__(self):
+        self.client: Optional[httpx.AsyncClient] = None
+        self.timings: Deque[UpstreamTiming] = deque(maxlen=settings.HTTP_CLIENT_TIMINGS_HISTORY)
+
+    async def start(self):
+        """Create the shared client; called from the FastAPI lifespan"""
+        if self.client is not None:
+            return
+
+        http2 = settings.HTTP_CLIENT_HTTP2 and HTTP2_AVAILABLE
+        if settings.HTTP_CLIENT_HTTP2 and not HTTP2_AVAILABLE:
+            logger.warning("HTTP/2 requested but the 'h2' package is not installed, falling back to HTTP/1.1")
+
+        self.client = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE,
+                keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(
+                settings.HTTP_CLIENT_READ_TIMEOUT,
+                connect=settings.HTTP_CLIENT_CONNECT_TIMEOUT,
+                pool=settings.HTTP_CLIENT_POOL_TIMEOUT
+            )
+        )
+        logger.info(f"Shared HTTP client started (http2={http2})")
+
+    async def close(self):
+        """Close pooled connections; called on application shutdown"""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+            logger.info("Shared HTTP client closed")
+
+    def get_client(self) -> httpx.AsyncClient:
+        if self.client is None:
+            # Allows use outside the app lifespan (scripts, tests)
+            logger.warning("Shared HTTP client used before startup, creating it lazily")
+            self.client = httpx.AsyncClient(
+                timeout=httpx.Timeout(
+                    settings.HTTP_CLIENT_READ_TIMEOUT,
+                    connect=settings.HTTP_CLIENT_CONNECT_TIMEOUT
+                )
+            )
+        return self.client
+
+    def _budget_timeout(self, kwargs: Dict[str, Any]):
+        """Cap the timeouts at what is left of the caller's latency budget"""
+        remaining = remaining_budget()
+        if remaining is None or "timeout" in kwargs:
+            return
+        if remaining <= 0:
+            raise DeadlineExceeded("Latency budget exhausted before the upstream call")
+        kwargs["timeout"] = httpx.Timeout(
+            min(settings.HTTP_CLIENT_READ_TIMEOUT, remaining),
+            connect=min(settings.HTTP_CLIENT_CONNECT_TIMEOUT, remaining),
+            pool=min(settings.HTTP_CLIENT_POOL_TIMEOUT, remaining)
+        )
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request through the shared pool and record connect/TTFB/total timings"""
+        tracer = _RequestTracer()
+        extensions = kwargs.pop("extensions", {}) or {}
+        extensions["trace"] = tracer
+        self._budget_timeout(kwargs)
+
+        client = self.get_client()
+        request = client.build_request(method, url, extensions=extensions, **kwargs)
+        response = None
+        try:
+            response = await client.send(request)
+            return response
+        finally:
+            timing = tracer.timing(request, response)
+            self.timings.append(timing)
+            if response is not None:
+                response.extensions["timing"] = timing
+            logger.debug(f"Upstream call timing: {asdict(timing)}")
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """Stream a response through the shared pool; timings are recorded when the body is closed"""
+        tracer = _RequestTracer()
+        extensions = kwargs.pop("extensions", {}) or {}
+        extensions["trace"] = tracer
+        self._budget_timeout(kwargs)
+
+        client = self.get_client()
+        request = client.build_request(method, url, extensions=extensions, **kwargs)
+        response = None
+        try:
+            response = await client.send(request, stream=True)
+            yield response
+        finally:
+            if response is not None:
+                await response.aclose()
+            timing = tracer.timing(request, response)
+            self.timings.append(timing)
+            logger.debug(f"Upstream stream timing: {asdict(timing)}")
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    def get_timing_stats(self, host: Optional[str] = None) -> Dict[str, Any]:
+        """Summarize recent upstream timings, optionally for a single host"""
+        if host and "://" in host:
+            host = urlparse(host).hostname
+        samples = [t for t in self.timings if host is None or t.host == host]
+        if not samples:
+            return {"calls": 0}
+
+        def percentile(values, pct):
+            values = sorted(v for v in values if v is not None)
+            if not values:
+                return None
+            return values[min(len(values) - 1, int(len(values) * pct))]
+
+        return {
+            "calls": len(samples),
+            "reused_connection_ratio": round(sum(t.reused_connection for t in samples) / len(samples), 3),
+            "connect_ms_p50": percentile([t.connect_ms for t in samples], 0.5),
+            "ttfb_ms_p50": percentile([t.ttfb_ms for t in samples], 0.5),
+            "ttfb_ms_p95": percentile([t.ttfb_ms for t in samples], 0.95),
+            "total_ms_p50": percentile([t.total_ms for t in samples], 0.5),
+            "total_ms_p95": percentile([t.total_ms for t in samples], 0.95),
+            "last": asdict(samples[-1])
+        }
+
+
+http_client = HTTPClientManager()
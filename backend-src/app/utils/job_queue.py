@@ -0,0 +1,232 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+import redis
+from fastapi.encoders import jsonable_encoder
+from ..core.config import settings
+from .rate_limiter import RateLimitExceeded
+
+logger = logging.getLogger(__name__)
+
+# Score offset per priority level; larger than any realistic queueing delay so priority always wins
+PRIORITY_WEIGHT = 10 ** 10
+
+
+class DeferredJobQueue:
+    """Redis-backed priority queue for AI jobs refused by the rate limiter.
+
+    Jobs survive restarts. A worker started from the app lifespan drains the queue,
+    re-queueing a job in place whenever the limiter still says no, so the hourly
+    budget is used in full without dropping work. A popped job holds a lease in
+    the ``running`` set until it finishes; leases left behind by a crashed worker
+    expire and their jobs are queued again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Dict[str, Any]], Awaitable[Any]],
+        on_complete: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+        capacity_delay: Optional[Callable[[], Awaitable[float]]] = None
+    ):
+        self.name = name
+        self.handler = handler
+        self.on_complete = on_complete
+        # Reports how long until the rate limiter has capacity, without consuming any
+        self.capacity_delay = capacity_delay
+        self.queue_key = f"jobs:{name}:queue"
+        self.running_key = f"jobs:{name}:running"  # Job id -> lease deadline
+        self.result_ttl = settings.AI_JOB_RESULT_TTL
+        self.poll_interval = settings.AI_JOB_POLL_INTERVAL
+        self.retry_interval = settings.AI_JOB_RETRY_INTERVAL
+        self.lease_seconds = settings.AI_JOB_LEASE_SECONDS
+        self._worker: Optional[asyncio.Task] = None
+        try:
+            self.redis_client = redis.Redis(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                db=2,
+                decode_responses=True
+            )
+        except Exception as e:
+            logger.error(f"Failed to initialize Redis job queue: {e}")
+            self.redis_client = None
+
+    def _job_key(self, job_id: str) -> str:
+        return f"jobs:{self.name}:{job_id}"
+
+    async def enqueue(self, payload: Dict[str, Any], priority: int = 0, client_id: Optional[str] = None) -> Optional[str]:
+        """Persist a job and return its id, or None if the queue is unavailable"""
+        if not self.redis_client:
+            return None
+
+        try:
+            job_id = uuid.uuid4().hex
+            created_at = time.time()
+            pipe = self.redis_client.pipeline()
+            pipe.hset(self._job_key(job_id), mapping={
+                "id": job_id,
+                "status": "queued",
+                "priority": priority,
+                "client_id": client_id or "",
+                "payload": json.dumps(jsonable_encoder(payload)),
+                "created_at": created_at
+            })
+            # Lowest score pops first: higher priority, then older
+            pipe.zadd(self.queue_key, {job_id: created_at - priority * PRIORITY_WEIGHT})
+            pipe.execute()
+            logger.info(f"Queued deferred job {job_id} (priority {priority})")
+            return job_id
+        except Exception as e:
+            logger.error(f"Job enqueue error: {e}")
+            return None
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job status, plus the result once completed"""
+        if not self.redis_client:
+            return None
+
+        try:
+            job = self.redis_client.hgetall(self._job_key(job_id))
+            if not job:
+                return None
+            status = {
+                "job_id": job_id,
+                "status": job["status"],
+                "created_at": float(job["created_at"])
+            }
+            if job["status"] == "queued":
+                status["position"] = self.redis_client.zrank(self.queue_key, job_id)
+            if "result" in job:
+                status["result"] = json.loads(job["result"])
+            if "error" in job:
+                status["error"] = job["error"]
+            return status
+        except Exception as e:
+            logger.error(f"Job lookup error: {e}")
+            return None
+
+    async def queue_length(self) -> int:
+        if not self.redis_client:
+            return 0
+        try:
+            return self.redis_client.zcard(self.queue_key)
+        except Exception as e:
+            logger.error(f"Job queue length error: {e}")
+            return 0
+
+    def _pop(self) -> Optional[Dict[str, Any]]:
+        popped = self.redis_client.zpopmin(self.queue_key)
+        if not popped:
+            return None
+        job_id, score = popped[0]
+        job = self.redis_client.hgetall(self._job_key(job_id))
+        if not job:
+            return None
+        job["score"] = score
+        pipe = self.redis_client.pipeline()
+        # The queue score is kept so an expired lease puts the job back in its old place
+        pipe.hset(self._job_key(job_id), mapping={"status": "running", "score": score})
+        pipe.zadd(self.running_key, {job_id: time.time() + self.lease_seconds})
+        pipe.execute()
+        return job
+
+    def _requeue(self, job: Dict[str, Any]):
+        pipe = self.redis_client.pipeline()
+        pipe.hset(self._job_key(job["id"]), "status", "queued")
+        pipe.zadd(self.queue_key, {job["id"]: job["score"]})
+        pipe.zrem(self.running_key, job["id"])
+        pipe.execute()
+
+    def _finish(self, job: Dict[str, Any], **fields):
+        key = self._job_key(job["id"])
+        pipe = self.redis_client.pipeline()
+        pipe.hset(key, mapping={**fields, "finished_at": time.time()})
+        pipe.expire(key, self.result_ttl)
+        pipe.zrem(self.running_key, job["id"])
+        pipe.execute()
+
+    def recover_expired(self) -> int:
+        """Queue again the jobs whose worker lease ran out; returns how many"""
+        recovered = 0
+        for job_id in self.redis_client.zrangebyscore(self.running_key, "-inf", time.time()):
+            # Whoever removes the lease owns the recovery, so concurrent workers never queue a job twice
+            if not self.redis_client.zrem(self.running_key, job_id):
+                continue
+            job = self.redis_client.hgetall(self._job_key(job_id))
+            if not job or job.get("status") != "running":
+                continue
+            self._requeue({"id": job_id, "score": float(job.get("score", job["created_at"]))})
+            recovered += 1
+        if recovered:
+            logger.warning(f"Re-queued {recovered} deferred jobs whose worker lease expired")
+        return recovered
+
+    async def _wait_for_capacity(self):
+        delay = await self.capacity_delay() if self.capacity_delay else 0
+        await asyncio.sleep(delay or self.retry_interval)
+
+    async def run_once(self) -> bool:
+        """Process the next job; returns False when there was nothing runnable"""
+        if self.capacity_delay and self.redis_client.zcard(self.queue_key):
+            # Wait for the budget instead of spending attempts that would be refused
+            delay = await self.capacity_delay()
+            if delay > 0:
+                await asyncio.sleep(min(delay, self.retry_interval))
+                return False
+
+        job = self._pop()
+        if job is None:
+            return False
+
+        try:
+            result = await self.handler(json.loads(job["payload"]))
+        except RateLimitExceeded:
+            # Still over budget: put the job back where it was and wait
+            self._requeue(job)
+            await self._wait_for_capacity()
+            return False
+        except Exception as e:
+            logger.error(f"Deferred job {job['id']} failed: {e}")
+            self._finish(job, status="failed", error=str(e))
+            notification = {"job_id": job["id"], "status": "failed", "error": str(e)}
+        else:
+            self._finish(job, status="completed", result=json.dumps(jsonable_encoder(result)))
+            notification = {"job_id": job["id"], "status": "completed", "result": jsonable_encoder(result)}
+            logger.info(f"Deferred job {job['id']} completed")
+
+        if self.on_complete and job.get("client_id"):
+            try:
+                await self.on_complete({**notification, "client_id": job["client_id"]})
+            except Exception as e:
+                logger.error(f"Deferred job notification error: {e}")
+        return True
+
+    async def _drain(self):
+        while True:
+            try:
+                self.recover_expired()
+                if not await self.run_once():
+                    await asyncio.sleep(self.poll_interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Deferred job worker error: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def start(self):
+        """Start draining in the background; called from the FastAPI lifespan"""
+        if self.redis_client and self._worker is None:
+            self._worker = asyncio.create_task(self._drain())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
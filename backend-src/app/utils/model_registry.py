@@ -0,0 +1,197 @@
+import asyncio
+import gc
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+
+def _rss_bytes() -> Optional[int]:
+    """Resident memory of this process"""
+    if PSUTIL_AVAILABLE:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _parameter_bytes(model: Any) -> Optional[int]:
+    """Weight size of a transformers pipeline or torch module, if it exposes parameters"""
+    module = getattr(model, "model", model)
+    parameters = getattr(module, "parameters", None)
+    if not callable(parameters):
+        return None
+    try:
+        return sum(p.numel() * p.element_size() for p in parameters())
+    except Exception:
+        return None
+
+
+@dataclass
+class LoadedModel:
+    model: Any
+    loaded_at: float
+    last_used: float
+    load_seconds: float
+    memory_bytes: Optional[int]
+
+
+class ModelRegistry:
+    """Named ML models loaded on first use or warm-up and unloaded when idle.
+
+    Loaders run in a worker thread so a multi-second model load never blocks the
+    event loop, and concurrent requests for the same model share a single load.
+    """
+
+    def __init__(self, idle_unload_seconds: float = 1800.0, warm_up: Iterable[str] = ()):
+        self.idle_unload_seconds = idle_unload_seconds
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._warm_up: Set[str] = set(warm_up)
+        self._models: Dict[str, LoadedModel] = {}
+        self._loading: Dict[str, asyncio.Task] = {}
+        self._reaper: Optional[asyncio.Task] = None
+
+    def register(self, name: str, loader: Callable[[], Any], warm_up: bool = False):
+        self._loaders[name] = loader
+        if warm_up:
+            self._warm_up.add(name)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def _load(self, name: str) -> LoadedModel:
+        rss_before = _rss_bytes()
+        started = time.perf_counter()
+        model = self._loaders[name]()
+        load_seconds = time.perf_counter() - started
+
+        memory = _parameter_bytes(model)
+        if memory is None and rss_before is not None:
+            memory = max(_rss_bytes() - rss_before, 0)
+        now = time.time()
+        logger.info(f"Loaded model '{name}' in {load_seconds:.1f}s")
+        return LoadedModel(model=model, loaded_at=now, last_used=now, load_seconds=load_seconds, memory_bytes=memory)
+
+    def load_in_background(self, name: str) -> asyncio.Task:
+        """Start loading a model, or join the load already in progress"""
+        if name not in self._loaders:
+            raise KeyError(f"Unknown model: {name}")
+        task = self._loading.get(name)
+        if task is None:
+            async def load():
+                try:
+                    self._models[name] = await asyncio.to_thread(self._load, name)
+                except Exception as e:
+                    logger.error(f"Failed to load model '{name}': {e}")
+                    raise
+                finally:
+                    self._loading.pop(name, None)
+
+            task = self._loading[name] = asyncio.create_task(load())
+            # Failures are logged above; retrieve them so unawaited background loads stay quiet
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def get(self, name: str) -> Any:
+        """The model, loading it first if needed"""
+        loaded = self._models.get(name)
+        if loaded is None:
+            await asyncio.shield(self.load_in_background(name))
+            loaded = self._models[name]
+        loaded.last_used = time.time()
+        return loaded.model
+
+    async def warm_up(self, names: Optional[List[str]] = None):
+        """Load models ahead of traffic; failures are logged and retried lazily on first use"""
+        names = names if names is not None else self._warm_up_names()
+        await asyncio.gather(
+            *(self.load_in_background(name) for name in names if not self.is_loaded(name)),
+            return_exceptions=True
+        )
+
+    def _warm_up_names(self) -> List[str]:
+        unknown = self._warm_up - set(self._loaders)
+        if unknown:
+            logger.warning(f"Warm-up models not registered: {', '.join(sorted(unknown))}")
+        return sorted(self._warm_up & set(self._loaders))
+
+    def unload(self, name: str) -> bool:
+        if self._models.pop(name, None) is None:
+            return False
+        gc.collect()
+        logger.info(f"Unloaded model '{name}'")
+        return True
+
+    def unload_idle(self, max_idle: Optional[float] = None) -> List[str]:
+        """Unload models unused for ``max_idle`` seconds; warm-up models stay resident"""
+        max_idle = self.idle_unload_seconds if max_idle is None else max_idle
+        cutoff = time.time() - max_idle
+        idle = [
+            name for name, loaded in self._models.items()
+            if loaded.last_used < cutoff and name not in self._warm_up
+        ]
+        return [name for name in idle if self.unload(name)]
+
+    async def _reap(self):
+        while True:
+            await asyncio.sleep(max(self.idle_unload_seconds / 4, 1))
+            try:
+                self.unload_idle()
+            except Exception as e:
+                logger.error(f"Idle model reaper error: {e}")
+
+    async def start(self):
+        """Warm up configured models in the background and start unloading idle ones; called from the lifespan"""
+        for name in self._warm_up_names():
+            self.load_in_background(name)
+        if self.idle_unload_seconds > 0 and self._reaper is None:
+            self._reaper = asyncio.create_task(self._reap())
+
+    async def stop(self):
+        if self._reaper is not None:
+            self._reaper.cancel()
+            try:
+                await self._reaper
+            except asyncio.CancelledError:
+                pass
+            self._reaper = None
+
+    def ready(self, names: Optional[List[str]] = None) -> bool:
+        """Whether the given models (default: the warm-up set) are loaded"""
+        names = names if names is not None else self._warm_up & set(self._loaders)
+        return all(self.is_loaded(name) for name in names)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Loaded models with their memory footprint and idle time"""
+        now = time.time()
+        return {
+            "registered": sorted(self._loaders),
+            "loading": sorted(self._loading),
+            "loaded": {
+                name: {
+                    "memory_mb": round(loaded.memory_bytes / 2 ** 20, 1) if loaded.memory_bytes is not None else None,
+                    "load_seconds": round(loaded.load_seconds, 2),
+                    "idle_seconds": round(now - loaded.last_used, 1)
+                }
+                for name, loaded in self._models.items()
+            },
+            "idle_unload_seconds": self.idle_unload_seconds
+        }
+
+
+model_registry = ModelRegistry(
+    idle_unload_seconds=settings.MODEL_IDLE_UNLOAD_SECONDS,
+    warm_up=settings.MODEL_WARM_UP
+)
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import re
+from typing import Any, Dict, Optional
+
+# Fields that influence the generated strategy; anything else is ignored for caching
+PROFILE_FIELDS = ("industry", "size", "revenue", "growth_rate", "target_market", "current_challenges")
+
+MONEY_MULTIPLIERS = {
+    "k": 1_000, "thousand": 1_000,
+    "m": 1_000_000, "mm": 1_000_000, "mn": 1_000_000, "million": 1_000_000,
+    "b": 1_000_000_000, "bn": 1_000_000_000, "billion": 1_000_000_000
+}
+
+# Bare numbers below this are read as millions, matching how revenue has always been entered ("5" == "$5M")
+BARE_MILLIONS_THRESHOLD = 10_000
+
+INDUSTRY_SYNONYMS = {
+    "tech": "technology",
+    "it": "technology",
+    "information technology": "technology",
+    "software": "software",
+    "software as a service": "saas",
+    "saas": "saas",
+    "ecommerce": "e-commerce",
+    "e commerce": "e-commerce",
+    "online retail": "e-commerce",
+    "retail": "retail",
+    "health": "healthcare",
+    "health care": "healthcare",
+    "healthcare": "healthcare",
+    "medical": "healthcare",
+    "fintech": "fintech",
+    "financial technology": "fintech",
+    "finance": "financial services",
+    "financial services": "financial services",
+    "banking": "financial services",
+    "edtech": "education",
+    "education": "education"
+}
+
+# Buckets match the company sizes offered in the business profile form
+SIZE_BUCKETS = ("1-10", "11-50", "51-200", "200+")
+SIZE_SYNONYMS = {
+    "micro": "1-10", "startup": "1-10", "solo": "1-10",
+    "small": "11-50", "smb": "11-50",
+    "medium": "51-200", "mid": "51-200", "mid-size": "51-200", "midsize": "51-200", "mid-market": "51-200",
+    "large": "200+", "enterprise": "200+", "corporate": "200+"
+}
+
+
+def normalize_text(value: Any) -> Optional[str]:
+    """Lower-case and collapse whitespace; lists are sorted so order does not matter"""
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple, set)):
+        items = sorted(filter(None, (normalize_text(item) for item in value)))
+        return "; ".join(items) or None
+    text = re.sub(r"\s+", " ", str(value)).strip().lower()
+    return text or None
+
+
+def parse_money(value: Any) -> Optional[float]:
+    """Parse revenue such as "$10M", "10 million", "10,000,000" or 1.5e6 into dollars"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        amount, multiplier = float(value), None
+    else:
+        match = re.fullmatch(
+            r"\$?\s*([0-9][0-9,]*(?:\.[0-9]+)?)\s*([a-z]*)\s*(?:usd)?",
+            str(value).strip().lower()
+        )
+        if not match:
+            return None
+        amount = float(match.group(1).replace(",", ""))
+        suffix = match.group(2)
+        if suffix and suffix not in MONEY_MULTIPLIERS:
+            return None
+        multiplier = MONEY_MULTIPLIERS.get(suffix)
+
+    if multiplier is None:
+        multiplier = 1_000_000 if amount < BARE_MILLIONS_THRESHOLD else 1
+    return round(amount * multiplier, 2)
+
+
+def parse_percent(value: Any) -> Optional[float]:
+    """Parse a growth rate such as "15%", "15" or 0.15 into percent"""
+    if value is None or isinstance(value, bool):
+        return None
+    text = str(value).strip().lower()
+    has_sign = text.endswith("%")
+    try:
+        rate = float(text.rstrip("%").strip())
+    except ValueError:
+        return None
+    # Fractions without a percent sign ("0.15") are ratios
+    if not has_sign and 0 < abs(rate) < 1:
+        rate *= 100
+    return round(rate, 2)
+
+
+def size_bucket(value: Any) -> Optional[str]:
+    """Map employee counts, ranges or words ("Medium", "51-200", 75) onto a size bucket"""
+    text = normalize_text(value)
+    if text is None:
+        return None
+    if text in SIZE_BUCKETS:
+        return text
+    if text in SIZE_SYNONYMS:
+        return SIZE_SYNONYMS[text]
+
+    numbers = [int(n) for n in re.findall(r"\d+", text.replace(",", ""))]
+    if not numbers:
+        return text
+    headcount = max(numbers)
+    if headcount <= 10:
+        return "1-10"
+    if headcount <= 50:
+        return "11-50"
+    if headcount <= 200:
+        return "51-200"
+    return "200+"
+
+
+def normalize_industry(value: Any) -> Optional[str]:
+    text = normalize_text(value)
+    if text is None:
+        return None
+    text = text.replace("&", "and").strip(" .")
+    return INDUSTRY_SYNONYMS.get(text, text)
+
+
+def canonicalize_company_profile(company_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a free-form company profile to the normalized fields that drive AI output.
+
+    Revenue and growth rate that cannot be parsed are kept as normalized text so
+    different unparseable inputs do not collapse onto one cache entry.
+    """
+    revenue = company_data.get("revenue")
+    growth_rate = company_data.get("growth_rate")
+    parsed_revenue = parse_money(revenue)
+    parsed_growth = parse_percent(growth_rate)
+
+    profile = {
+        "industry": normalize_industry(company_data.get("industry")),
+        "size": size_bucket(company_data.get("size")),
+        "revenue": parsed_revenue if parsed_revenue is not None else normalize_text(revenue),
+        "growth_rate": parsed_growth if parsed_growth is not None else normalize_text(growth_rate),
+        "target_market": normalize_text(company_data.get("target_market")),
+        "current_challenges": normalize_text(company_data.get("current_challenges"))
+    }
+    return {field: profile[field] for field in PROFILE_FIELDS}
+
+
+def profile_cache_key(profile: Dict[str, Any], namespace: str = "growth_insights") -> str:
+    """Cache key for a canonical profile"""
+    digest = hashlib.md5(json.dumps(profile, sort_keys=True).encode()).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+def raw_cache_key(company_data: Dict[str, Any]) -> str:
+    """The pre-canonicalization key, kept only to measure the hit-rate gain"""
+    return hashlib.md5(json.dumps(company_data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def format_money(amount: Any) -> str:
+    """Render a canonical revenue for prompts ("$10M", "$750K")"""
+    if not isinstance(amount, (int, float)):
+        return amount or "Unknown"
+    for suffix, size in (("B", 1_000_000_000), ("M", 1_000_000), ("K", 1_000)):
+        if abs(amount) >= size:
+            return f"${amount / size:g}{suffix}"
+    return f"${amount:g}"
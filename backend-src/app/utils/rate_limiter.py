@@ -1,13 +1,28 @@
 from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+import asyncio
 import redis
 import time
+from collections import deque
+from typing import List
 from ..core.config import settings
 import logging
 import json
+import uuid
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
+# Reservation handed out when Redis cannot record one; like check_rate_limit, a Redis error allows the request
+UNRESERVED = "unreserved"
+
+class RateLimitExceeded(Exception):
+    """Raised when an upstream call is refused by the rate limiter"""
+
+    def __init__(self, key_prefix: str):
+        super().__init__(f"Rate limit exceeded for {key_prefix}")
+        self.key_prefix = key_prefix
+
 class RateLimiter:
     def __init__(self):
         try:
@@ -31,6 +46,11 @@ class RateLimiter:
             return True  # Allow requests if Redis is not available
             
         try:
+            # Capacity checked out by reserve() belongs to its holder
+            if self.redis_client.exists(self._reservation_key(key_prefix)):
+                logger.warning(f"Rate limit capacity for {key_prefix} is reserved")
+                return False
+            
             current_time = int(time.time())
             hour_key = f"rate_limit:{key_prefix}:{current_time // self.window_size}"
             last_request_key = f"last_request:{key_prefix}"
@@ -81,8 +101,199 @@ class RateLimiter:
             logger.error(f"Rate limiter error: {e}")
             return True  # Allow requests if Redis operation fails
 
+    def _reservation_key(self, key_prefix: str) -> str:
+        return f"reservation:{key_prefix}"
+
+    async def get_quota(self, key_prefix: str) -> dict:
+        """Report remaining capacity without recording a request or touching the backoff"""
+        if not self.redis_client:
+            return {"status": "disconnected", "can_make_request": True}
+        
+        try:
+            current_time = int(time.time())
+            window = current_time // self.window_size
+            
+            pipe = self.redis_client.pipeline()
+            pipe.get(f"rate_limit:{key_prefix}:{window}")
+            pipe.get(f"last_request:{key_prefix}")
+            pipe.get(f"backoff:{key_prefix}")
+            pipe.ttl(self._reservation_key(key_prefix))
+            results = pipe.execute()
+            
+            hourly_requests = int(results[0]) if results[0] else 0
+            last_request_time = int(results[1]) if results[1] else 0
+            backoff_multiplier = int(results[2]) if results[2] else 1
+            reserved_for = max(results[3], 0)
+            
+            remaining = max(self.max_requests - hourly_requests, 0)
+            window_resets_at = (window + 1) * self.window_size
+            next_allowed_at = max(last_request_time + self.min_interval * backoff_multiplier, current_time + reserved_for)
+            if remaining == 0:
+                next_allowed_at = max(next_allowed_at, window_resets_at)
+            
+            return {
+                "status": "connected",
+                "can_make_request": remaining > 0 and next_allowed_at <= current_time and not reserved_for,
+                "remaining": remaining,
+                "max_requests": self.max_requests,
+                "window_resets_at": window_resets_at,
+                "next_allowed_at": next_allowed_at,
+                "retry_after": max(next_allowed_at - current_time, 0),
+                "backoff_multiplier": backoff_multiplier,
+                "reserved": bool(reserved_for)
+            }
+        except Exception as e:
+            logger.error(f"Rate limiter quota error: {e}")
+            return {"status": "error", "message": str(e), "can_make_request": True}
+
+    async def seconds_until_available(self, key_prefix: str) -> int:
+        """Seconds until a request would be allowed; 0 means now"""
+        quota = await self.get_quota(key_prefix)
+        return quota.get("retry_after", 0)
+
+    async def reserve(self, key_prefix: str, ttl: int = 60) -> str:
+        """Check out capacity for one request without spending it yet.
+
+        Returns a reservation token to pass to commit() once the request is sent,
+        or to release() if it never is. Returns None when no capacity is available.
+        Unclaimed reservations expire after ``ttl`` seconds. If Redis is unavailable
+        the request is allowed with an ``UNRESERVED`` token that commit() and
+        release() ignore.
+        """
+        if not self.redis_client:
+            return UNRESERVED
+        
+        quota = await self.get_quota(key_prefix)
+        if not quota["can_make_request"]:
+            return None
+        
+        token = uuid.uuid4().hex
+        try:
+            # NX makes the reservation atomic across workers
+            if self.redis_client.set(self._reservation_key(key_prefix), token, nx=True, ex=ttl):
+                return token
+            return None
+        except Exception as e:
+            logger.error(f"Rate limiter reserve error: {e}")
+            return UNRESERVED  # Allow requests if Redis operation fails
+
+    async def commit(self, key_prefix: str, token: str) -> bool:
+        """Spend a reservation: record the request exactly as an allowed check_rate_limit would"""
+        if not self.redis_client or token == UNRESERVED:
+            return True
+        
+        try:
+            reservation_key = self._reservation_key(key_prefix)
+            if self.redis_client.get(reservation_key) != token:
+                logger.warning(f"Reservation for {key_prefix} expired before commit")
+            
+            current_time = int(time.time())
+            hour_key = f"rate_limit:{key_prefix}:{current_time // self.window_size}"
+            backoff_key = f"backoff:{key_prefix}"
+            backoff_multiplier = int(self.redis_client.get(backoff_key) or 1)
+            
+            pipe = self.redis_client.pipeline()
+            pipe.incr(hour_key)
+            pipe.expire(hour_key, self.window_size)
+            pipe.set(f"last_request:{key_prefix}", current_time)
+            if backoff_multiplier > 1:
+                pipe.setex(backoff_key, self.window_size, max(backoff_multiplier - 1, 1))
+            pipe.execute()
+            
+            await self.release(key_prefix, token)
+            return True
+        except Exception as e:
+            logger.error(f"Rate limiter commit error: {e}")
+            return False
+
+    async def release(self, key_prefix: str, token: str):
+        """Give back an unused reservation"""
+        if not self.redis_client or token == UNRESERVED:
+            return
+        
+        try:
+            reservation_key = self._reservation_key(key_prefix)
+            if self.redis_client.get(reservation_key) == token:
+                self.redis_client.delete(reservation_key)
+        except Exception as e:
+            logger.error(f"Rate limiter release error: {e}")
+
+class TokenBudget:
+    """In-process sliding-window token budget; callers wait for capacity instead of failing.
+
+    ``acquire`` takes an estimate before the call and ``settle`` replaces it with
+    the usage the API reports, so the window tracks what was actually spent.
+    """
+
+    def __init__(self, tokens_per_minute: int, window: float = 60.0):
+        self.tokens_per_minute = tokens_per_minute
+        self.window = window
+        self._entries = deque()  # [monotonic time, tokens] per call in the window
+        self._paused_until = 0.0
+        self._stats = {"calls": 0, "waits": 0, "waited_seconds": 0.0, "estimated_tokens": 0, "actual_tokens": 0}
+
+    def _used(self, now: float) -> int:
+        while self._entries and self._entries[0][0] <= now - self.window:
+            self._entries.popleft()
+        return sum(tokens for _, tokens in self._entries)
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        if self._paused_until > now:
+            return self._paused_until - now
+        used = self._used(now)
+        # A call bigger than the whole budget still runs once the window is empty
+        if used + tokens <= self.tokens_per_minute or not self._entries:
+            return 0.0
+        for started, spent in self._entries:
+            used -= spent
+            if used + tokens <= self.tokens_per_minute:
+                return started + self.window - now
+        return self._entries[-1][0] + self.window - now
+
+    async def acquire(self, tokens: int) -> List:
+        """Wait until ``tokens`` fit in the window and record them; returns a handle for ``settle``"""
+        waited = False
+        started = time.monotonic()
+        while True:
+            now = time.monotonic()
+            wait = self._wait_time(tokens, now)
+            if wait <= 0:
+                break
+            waited = True
+            await asyncio.sleep(wait)
+
+        if waited:
+            self._stats["waits"] += 1
+            self._stats["waited_seconds"] += time.monotonic() - started
+        entry = [now, tokens]
+        self._entries.append(entry)
+        self._stats["calls"] += 1
+        self._stats["estimated_tokens"] += tokens
+        return entry
+
+    def settle(self, entry: List, actual_tokens: int):
+        """Replace a call's estimate with the tokens it really used"""
+        entry[1] = actual_tokens
+        self._stats["actual_tokens"] += actual_tokens
+
+    def pause(self, seconds: float):
+        """Hold every caller back, e.g. for an upstream Retry-After"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def get_stats(self) -> dict:
+        """Budget usage for the current window"""
+        return {
+            **self._stats,
+            "waited_seconds": round(self._stats["waited_seconds"], 3),
+            "tokens_per_minute": self.tokens_per_minute,
+            "tokens_in_window": self._used(time.monotonic())
+        }
+
 class AICache:
-    def __init__(self):
+    def __init__(self, namespace: str = None, max_size: int = 1000):
+        # Namespaced caches keep their own hit counters and LRU, so one cannot evict another's entries
+        self.stats_key = f"{namespace}:cache_stats" if namespace else "cache_stats"
+        self.access_key = f"{namespace}:cache_access" if namespace else "cache_access"
         try:
             self.redis_client = redis.Redis(
                 host=settings.REDIS_HOST,
@@ -90,47 +301,99 @@ class AICache:
                 db=1,
                 decode_responses=True
             )
-            self.cache_ttl = 7200  # Cache for 2 hours
-            self.max_cache_size = 1000  # Maximum number of cached items
+            self.cache_ttl = settings.AI_CACHE_SOFT_TTL  # Entries are fresh for this long
+            self.stale_ttl = settings.AI_CACHE_HARD_TTL  # Stale entries are still served until this age
+            self.refresh_lock_ttl = 60  # Seconds a background refresh may hold its lock
+            self.max_cache_size = max_size  # Maximum number of cached items in this namespace
         except Exception as e:
             logger.error(f"Failed to initialize Redis cache: {e}")
             self.redis_client = None
 
-    async def get_cached_response(self, key: str) -> dict:
-        """Get cached response for a given key"""
+    async def get_cached_entry(self, key: str, raw_key: str = None) -> dict:
+        """Get a cached entry, fresh or stale, as ``{"response", "stale", "age"}``.
+
+        ``raw_key`` is the key the request would have used before canonicalization;
+        it is only used to record whether that key would also have hit.
+        """
         if not self.redis_client:
             return None
             
         try:
             cached_data = self.redis_client.get(key)
-            if cached_data:
-                # Update access time for LRU implementation
-                self.redis_client.zadd("cache_access", {key: time.time()})
-                return json.loads(cached_data)
-            return None
+            if not cached_data:
+                self._record_lookup("misses", raw_key)
+                return None
+            
+            entry = json.loads(cached_data)
+            if "cached_at" not in entry:
+                # Entry written before soft TTLs existed
+                entry = {"cached_at": time.time(), "response": entry}
+            age = time.time() - entry["cached_at"]
+            stale = age > self.cache_ttl
+            self._record_lookup("stale_hits" if stale else "hits", raw_key)
+            
+            # Update access time for LRU implementation
+            self.redis_client.zadd(self.access_key, {key: time.time()})
+            return {"response": entry["response"], "stale": stale, "age": int(age)}
         except Exception as e:
             logger.error(f"Cache get error: {e}")
             return None
 
-    async def cache_response(self, key: str, response: dict):
+    async def get_cached_response(self, key: str, raw_key: str = None) -> dict:
+        """Get a fresh cached response for a given key"""
+        entry = await self.get_cached_entry(key, raw_key=raw_key)
+        if entry and not entry["stale"]:
+            return entry["response"]
+        return None
+
+    async def try_acquire_refresh(self, key: str) -> bool:
+        """Claim the right to refresh a stale entry so only one worker recomputes it"""
+        if not self.redis_client:
+            return True
+        try:
+            return bool(self.redis_client.set(f"refresh_lock:{key}", 1, nx=True, ex=self.refresh_lock_ttl))
+        except Exception as e:
+            logger.error(f"Cache refresh lock error: {e}")
+            return False
+
+    async def release_refresh(self, key: str):
+        if not self.redis_client:
+            return
+        try:
+            self.redis_client.delete(f"refresh_lock:{key}")
+        except Exception as e:
+            logger.error(f"Cache refresh unlock error: {e}")
+
+    def _record_lookup(self, outcome: str, raw_key: str = None):
+        pipe = self.redis_client.pipeline()
+        pipe.hincrby(self.stats_key, outcome, 1)
+        if raw_key:
+            raw_hit = self.redis_client.exists(f"raw_seen:{raw_key}")
+            pipe.hincrby(self.stats_key, "raw_key_hits" if raw_hit else "raw_key_misses", 1)
+        pipe.execute()
+
+    async def cache_response(self, key: str, response: dict, raw_key: str = None):
         """Cache response with LRU eviction policy"""
         if not self.redis_client:
             return
             
         try:
             # Check cache size
-            cache_size = self.redis_client.zcard("cache_access")
+            cache_size = self.redis_client.zcard(self.access_key)
             
             # If cache is full, remove oldest entries
             if cache_size >= self.max_cache_size:
-                oldest_keys = self.redis_client.zrange("cache_access", 0, cache_size - self.max_cache_size)
+                oldest_keys = self.redis_client.zrange(self.access_key, 0, cache_size - self.max_cache_size)
                 if oldest_keys:
                     self.redis_client.delete(*oldest_keys)
-                    self.redis_client.zrem("cache_access", *oldest_keys)
+                    self.redis_client.zrem(self.access_key, *oldest_keys)
             
-            # Cache new response
-            self.redis_client.setex(key, self.cache_ttl, json.dumps(response))
-            self.redis_client.zadd("cache_access", {key: time.time()})
+            # Cache new response; Redis keeps it until the hard TTL so it can be served stale
+            entry = {"cached_at": time.time(), "response": jsonable_encoder(response)}
+            self.redis_client.setex(key, self.stale_ttl, json.dumps(entry))
+            self.redis_client.zadd(self.access_key, {key: time.time()})
+            if raw_key:
+                self.redis_client.setex(f"raw_seen:{raw_key}", self.stale_ttl, 1)
             
         except Exception as e:
             logger.error(f"Cache set error: {e}")
@@ -141,12 +404,26 @@ class AICache:
             return {"status": "disconnected"}
             
         try:
-            cache_size = self.redis_client.zcard("cache_access")
+            cache_size = self.redis_client.zcard(self.access_key)
+            counters = {k: int(v) for k, v in self.redis_client.hgetall(self.stats_key).items()}
+            
+            def hit_rate(hits, misses):
+                total = hits + misses
+                return round(hits / total, 3) if total else None
+            
+            hits = counters.get("hits", 0) + counters.get("stale_hits", 0)
             return {
                 "status": "connected",
                 "cache_size": cache_size,
                 "max_size": self.max_cache_size,
-                "ttl": self.cache_ttl
+                "ttl": self.cache_ttl,
+                "stale_ttl": self.stale_ttl,
+                "hits": counters.get("hits", 0),
+                "stale_hits": counters.get("stale_hits", 0),
+                "misses": counters.get("misses", 0),
+                "hit_rate": hit_rate(hits, counters.get("misses", 0)),
+                # What the hit rate would have been with uncanonicalized keys
+                "raw_key_hit_rate": hit_rate(counters.get("raw_key_hits", 0), counters.get("raw_key_misses", 0))
             }
         except Exception as e:
             logger.error(f"Cache stats error: {e}")
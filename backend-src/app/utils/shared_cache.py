@@ -0,0 +1,183 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+import redis
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SharedTTLCache:
+    """Redis-backed TTL cache that coalesces loads across requests and workers.
+
+    A miss is loaded by a single caller: requests in the same worker await the
+    same task and other workers wait on a Redis lock for the result, so a burst
+    causes one upstream call per key. Keys requested recently are "hot" and
+    refreshed in the background, by a loop started from the app lifespan, before
+    they expire, so they rarely miss at all. If Redis fails, keys are loaded directly.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        loader: Callable[[str], Awaitable[Any]],
+        ttl: int = 300,
+        hot_keys: int = 20,
+        hot_window: int = 900,
+        lock_wait: float = 10.0
+    ):
+        self.namespace = namespace
+        self.loader = loader
+        self.ttl = ttl
+        self.hot_keys = hot_keys
+        self.hot_window = hot_window
+        self.lock_wait = lock_wait
+        # Held past the load so a refresh and a miss in the same interval don't both call upstream;
+        # shorter than the TTL so hot keys can be refreshed before they expire
+        self.lock_ttl = max(int(ttl * 0.5), 1)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._refresher: Optional[asyncio.Task] = None
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "upstream_calls": 0, "refreshes": 0, "errors": 0}
+        try:
+            self.redis_client = redis.Redis(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                db=1,
+                decode_responses=True
+            )
+        except Exception as e:
+            logger.error(f"Failed to initialize Redis for {namespace} cache: {e}")
+            self.redis_client = None
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _read(self, key: str) -> Optional[Any]:
+        cached = self.redis_client.get(self._key(key))
+        return json.loads(cached) if cached is not None else None
+
+    def _mark_hot(self, key: str):
+        self.redis_client.zadd(f"{self.namespace}:hot", {key: time.time()})
+
+    async def _call_loader(self, key: str, store: bool = True) -> Any:
+        self._stats["upstream_calls"] += 1
+        value = await self.loader(key)
+        if self.redis_client and store:
+            try:
+                self.redis_client.setex(self._key(key), self.ttl, json.dumps(value, default=str))
+            except Exception as e:
+                logger.error(f"{self.namespace} cache write error: {e}")
+        return value
+
+    def _release_lock(self, lock_key: str):
+        try:
+            self.redis_client.delete(lock_key)
+        except Exception as e:
+            logger.error(f"{self.namespace} cache unlock error: {e}")
+
+    async def _load(self, key: str) -> Any:
+        if not self.redis_client:
+            return await self.loader(key)
+
+        lock_key = f"{self.namespace}:lock:{key}"
+        try:
+            locked = self.redis_client.set(lock_key, 1, nx=True, ex=self.lock_ttl)
+        except Exception as e:
+            logger.error(f"{self.namespace} cache lock error, loading directly: {e}")
+            return await self._call_loader(key, store=False)
+        if locked:
+            try:
+                return await self._call_loader(key)
+            except Exception:
+                self._release_lock(lock_key)
+                raise
+
+        # Another worker is loading; wait for its result instead of calling upstream too
+        deadline = time.monotonic() + self.lock_wait
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+            try:
+                value = self._read(key)
+                if value is not None:
+                    self._stats["coalesced"] += 1
+                    return value
+                if not self.redis_client.exists(lock_key):
+                    break  # The other load failed
+            except Exception as e:
+                logger.error(f"{self.namespace} cache read error while waiting, loading directly: {e}")
+                return await self._call_loader(key, store=False)
+        logger.warning(f"{self.namespace}: no result from concurrent load of '{key}', loading directly")
+        return await self._call_loader(key)
+
+    async def get(self, key: str) -> Any:
+        """Cached value for ``key``, loading it once if missing; loader errors propagate"""
+        if self.redis_client:
+            try:
+                self._mark_hot(key)
+                value = self._read(key)
+                if value is not None:
+                    self._stats["hits"] += 1
+                    return value
+            except Exception as e:
+                logger.error(f"{self.namespace} cache read error: {e}")
+
+        self._stats["misses"] += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.create_task(self._load(key))
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self._stats["coalesced"] += 1
+        try:
+            return await asyncio.shield(task)
+        except Exception:
+            self._stats["errors"] += 1
+            raise
+
+    async def refresh_hot(self):
+        """Reload hot keys that are about to expire; the Redis lock keeps it to one worker per key"""
+        if not self.redis_client:
+            return
+        now = time.time()
+        hot_key = f"{self.namespace}:hot"
+        self.redis_client.zremrangebyscore(hot_key, 0, now - self.hot_window)
+        for key in self.redis_client.zrevrange(hot_key, 0, self.hot_keys - 1):
+            remaining = self.redis_client.ttl(self._key(key))
+            if remaining > self.ttl * 0.2 or key in self._inflight:
+                continue
+            lock_key = f"{self.namespace}:lock:{key}"
+            if not self.redis_client.set(lock_key, 1, nx=True, ex=self.lock_ttl):
+                continue
+            try:
+                await self._call_loader(key)
+                self._stats["refreshes"] += 1
+            except Exception as e:
+                self.redis_client.delete(lock_key)
+                logger.warning(f"{self.namespace}: background refresh of '{key}' failed: {e}")
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(max(self.ttl * 0.1, 1))
+            try:
+                await self.refresh_hot()
+            except Exception as e:
+                logger.error(f"{self.namespace} refresh loop error: {e}")
+
+    async def start(self):
+        """Start refreshing hot keys in the background; called from the FastAPI lifespan"""
+        if self.redis_client and self._refresher is None:
+            self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._refresher is not None:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self._stats, "ttl": self.ttl, "inflight": len(self._inflight)}
@@ -0,0 +1,79 @@
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_CONTROL = "public, max-age=300"
+
+
+@dataclass(frozen=True)
+class StaticPayload:
+    body: bytes
+    etag: str
+    cache_control: str
+
+
+class StaticPayloadRegistry:
+    """Response bodies serialized once and served as raw bytes.
+
+    Endpoints that always return the same data register a factory here. The
+    payload is encoded at startup, so requests skip pydantic validation and JSON
+    serialization entirely and conditional GET/HEAD requests are answered with 304.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._cache_control: Dict[str, str] = {}
+        self._payloads: Dict[str, StaticPayload] = {}
+
+    def register(self, name: str, factory: Callable[[], Any], cache_control: str = DEFAULT_CACHE_CONTROL):
+        self._factories[name] = factory
+        self._cache_control[name] = cache_control
+        self._payloads.pop(name, None)
+
+    def _serialize(self, name: str) -> StaticPayload:
+        body = json.dumps(jsonable_encoder(self._factories[name]()), separators=(",", ":")).encode()
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        return StaticPayload(body=body, etag=etag, cache_control=self._cache_control[name])
+
+    def build(self):
+        """Serialize every registered payload; called from the FastAPI lifespan"""
+        for name in self._factories:
+            self._payloads[name] = self._serialize(name)
+        logger.info(f"Serialized {len(self._payloads)} static payloads")
+
+    def get(self, name: str) -> StaticPayload:
+        payload = self._payloads.get(name)
+        if payload is None:
+            payload = self._payloads[name] = self._serialize(name)
+        return payload
+
+    def response(self, name: str, request: Optional[Request] = None, cache_control: Optional[str] = None) -> Response:
+        """Raw JSON response for a payload, or 304 if a GET/HEAD client already has it"""
+        payload = self.get(name)
+        headers = {"ETag": payload.etag, "Cache-Control": cache_control or payload.cache_control}
+
+        # 304 is only defined for safe methods; other requests always get the body, still tagged
+        if (
+            request is not None
+            and request.method in ("GET", "HEAD")
+            and _etag_matches(request.headers.get("if-none-match"), payload.etag)
+        ):
+            return Response(status_code=304, headers=headers)
+        return Response(content=payload.body, media_type="application/json", headers=headers)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # If-None-Match uses weak comparison, so W/ prefixes added by proxies still match
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+static_payloads = StaticPayloadRegistry()
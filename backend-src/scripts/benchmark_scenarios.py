@@ -0,0 +1,45 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.analysis.scenarios import ScenarioAssumptions, ScenarioEngine
+
+def profile_assumptions(i):
+    """
+    Vary market size, growth and competition across profiles the way real locations differ
+    """
+    return ScenarioAssumptions(
+        market_size=500_000 + 250_000 * (i % 8),
+        monthly_revenue=20_000 + 5_000 * (i % 5),
+        growth_mean=0.05 + 0.02 * (i % 6),
+        saturation_mean=0.4 + 0.05 * (i % 8),
+        competitor_share_mean=0.05 + 0.03 * (i % 7),
+        reference_growth=0.15
+    )
+
+def run_benchmark(paths, years, profiles):
+    engine = ScenarioEngine(n_paths=paths, horizon_years=years)
+    engine.simulate(profile_assumptions(0), seed=0)  # Warm up allocations
+    latencies = []
+    for i in range(profiles):
+        started = time.perf_counter()
+        engine.simulate(profile_assumptions(i), seed=i)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    print(f"{paths:>9,} paths x {years} years  {profiles} profiles  "
+          f"mean {statistics.mean(latencies):7.1f}ms  p95 {latencies[int(len(latencies) * 0.95) - 1]:7.1f}ms  "
+          f"max {latencies[-1]:7.1f}ms")
+
+if __name__ == "__main__":
+    #   python scripts/benchmark_scenarios.py --paths 10000 100000 1000000
+    parser = argparse.ArgumentParser(description="Benchmark Monte Carlo scenario latency per profile")
+    parser.add_argument("--paths", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--profiles", type=int, default=20)
+    args = parser.parse_args()
+    for paths in args.paths:
+        run_benchmark(paths, args.years, args.profiles)
@@ -0,0 +1,52 @@
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.analysis.segmentation import SegmentationEngine
+
+# Revenue, frequency and recency centers of the synthetic customer groups
+GROUPS = np.array([
+    [500.0, 2.0, 300.0],
+    [5000.0, 12.0, 60.0],
+    [20000.0, 40.0, 14.0],
+    [80000.0, 90.0, 3.0]
+])
+
+def synthetic_chunks(rows, chunk_size, seed=7):
+    """
+    Re-iterable source of customer chunks; each pass regenerates the same rows, so nothing is held in memory
+    """
+    def chunks():
+        rng = np.random.default_rng(seed)
+        for start in range(0, rows, chunk_size):
+            size = min(chunk_size, rows - start)
+            group = rng.integers(0, len(GROUPS), size)
+            yield GROUPS[group] * rng.lognormal(0.0, 0.25, (size, GROUPS.shape[1]))
+    return chunks
+
+def run_benchmark(rows, chunk_size, n_clusters):
+    engine = SegmentationEngine(n_clusters=n_clusters, chunk_size=chunk_size)
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = engine.fit_chunks(synthetic_chunks(rows, chunk_size), rows, return_labels=False)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{rows:>11,} rows  k={result.k}  {elapsed:8.2f}s  {rows / elapsed:>12,.0f} rows/s  "
+          f"peak {peak / 2**20:7.1f} MiB  sizes {result.segment_sizes}")
+
+if __name__ == "__main__":
+    #   python scripts/benchmark_segmentation.py --rows 10000 1000000 10000000
+    # Peak memory should stay flat as rows grow; it depends on the chunk size
+    parser = argparse.ArgumentParser(description="Benchmark customer segmentation fit time and memory")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--clusters", type=int, default=4, help="0 picks k automatically")
+    args = parser.parse_args()
+    for rows in args.rows:
+        run_benchmark(rows, args.chunk_size, args.clusters or None)
@@ -0,0 +1,71 @@
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import httpx
+
+INDUSTRIES = ["technology", "retail", "healthcare", "finance", "manufacturing"]
+SIZES = ["1-10", "11-50", "51-200", "200+"]
+
+def random_profile():
+    """
+    Build a company profile; a small pool of variants keeps the cache hit rate realistic
+    """
+    return {
+        "industry": random.choice(INDUSTRIES),
+        "size": random.choice(SIZES),
+        "revenue": f"${random.choice([1, 5, 10, 25, 50])}M",
+        "growth_rate": f"{random.choice([5, 10, 15, 25])}%",
+        "target_market": random.choice(["B2B", "B2C"])
+    }
+
+async def worker(client, url, deadline, latencies, statuses):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            response = await client.post(url, json=random_profile())
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        except httpx.HTTPError as e:
+            statuses[type(e).__name__] = statuses.get(type(e).__name__, 0) + 1
+        latencies.append(time.perf_counter() - started)
+
+async def run_load_test(base_url, concurrency, duration):
+    """
+    Drive the growth strategy endpoint at a fixed concurrency and report latency percentiles
+    """
+    url = f"{base_url.rstrip('/')}/api/v1/growth-strategy/"
+    latencies, statuses = [], {}
+    deadline = time.perf_counter() + duration
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(timeout=60.0, limits=limits) as client:
+        await asyncio.gather(*(
+            worker(client, url, deadline, latencies, statuses) for _ in range(concurrency)
+        ))
+
+    if not latencies:
+        print("No requests completed")
+        return
+
+    latencies.sort()
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    print(f"Requests:    {len(latencies)} in {duration}s ({len(latencies) / duration:.1f} req/s)")
+    print(f"Concurrency: {concurrency}")
+    print(f"Latency ms:  mean {statistics.mean(latencies) * 1000:.0f}, p50 {percentile(0.5):.0f}, "
+          f"p95 {percentile(0.95):.0f}, p99 {percentile(0.99):.0f}")
+    print(f"Statuses:    {statuses}")
+
+if __name__ == "__main__":
+    # Offline run against the bundled stand-in:
+    #   uvicorn app.integrations.llm_standin:app --port 8001
+    #   LLM_PROVIDER=local uvicorn app.main:app --port 8000
+    #   python scripts/load_test_ai.py --concurrency 50 --duration 30
+    parser = argparse.ArgumentParser(description="Load test the AI growth strategy path")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30.0)
+    args = parser.parse_args()
+    asyncio.run(run_load_test(args.url, args.concurrency, args.duration))
@@ -0,0 +1,63 @@
+import asyncio
+from app.utils.batching import MicroBatcher
+
+def test_concurrent_submits_share_one_batch():
+    calls = []
+
+    async def process(items):
+        calls.append(list(items))
+        return [item.upper() for item in items]
+
+    async def run():
+        batcher = MicroBatcher(process, max_batch_size=8, max_wait=0.01)
+        return await asyncio.gather(*(batcher.submit(word) for word in ["a", "b", "c"]))
+
+    assert asyncio.run(run()) == ["A", "B", "C"]
+    assert calls == [["a", "b", "c"]]
+
+def test_full_batch_is_dispatched_without_waiting():
+    calls = []
+
+    async def process(items):
+        calls.append(len(items))
+        return items
+
+    async def run():
+        batcher = MicroBatcher(process, max_batch_size=2, max_wait=10)
+        return await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit(i) for i in range(4))),
+            timeout=1
+        )
+
+    assert asyncio.run(run()) == [0, 1, 2, 3]
+    assert calls == [2, 2]
+
+def test_batch_error_reaches_every_caller():
+    async def process(items):
+        raise RuntimeError("upstream down")
+
+    async def run():
+        batcher = MicroBatcher(process, max_wait=0.01)
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+def test_close_waits_for_in_flight_batches():
+    finished = []
+
+    async def process(items):
+        await asyncio.sleep(0.01)
+        finished.extend(items)
+        return items
+
+    async def run():
+        batcher = MicroBatcher(process, max_batch_size=2, max_wait=10)
+        submitted = [asyncio.ensure_future(batcher.submit(i)) for i in range(3)]
+        await asyncio.sleep(0)
+        await batcher.close()
+        assert batcher.get_stats()["in_flight"] == 0
+        return await asyncio.gather(*submitted)
+
+    assert asyncio.run(run()) == [0, 1, 2]
+    assert sorted(finished) == [0, 1, 2]
@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+from app.analysis.forecasting import ForecastEngine, to_panel
+
+def test_holt_extends_trends_and_skips_missing_periods():
+    panel = to_panel([[10, 12, 14, 16, 18, 20], [5, 5, 5, 5], [1, np.nan, 3, 4, 5, 6]])
+    forecast = ForecastEngine("holt", horizon=3).forecast(panel)
+    np.testing.assert_allclose(forecast.point, [[22, 24, 26], [5, 5, 5], [7, 8, 9]], atol=1e-6)
+
+def test_intervals_widen_with_horizon_and_cover_noisy_series():
+    rng = np.random.default_rng(1)
+    panel = 100 + np.cumsum(rng.normal(0, 1, (5000, 41)), axis=1)
+    forecast = ForecastEngine("ses", horizon=3).forecast(panel[:, :-1])
+
+    width = forecast.upper - forecast.lower
+    assert (np.diff(width, axis=1) >= 0).all()
+    covered = (panel[:, -1] >= forecast.lower[:, 0]) & (panel[:, -1] <= forecast.upper[:, 0])
+    assert 0.92 < covered.mean() < 0.98
+
+def test_series_without_observations_are_rejected():
+    with pytest.raises(ValueError):
+        ForecastEngine("ses").forecast(to_panel([[1, 2], []]))
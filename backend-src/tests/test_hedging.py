@@ -0,0 +1,106 @@
+import asyncio
+import pytest
+from app.utils.hedging import DeadlineExceeded, Hedger, LatencyTracker, latency_budget, remaining_budget, within_budget
+
+def warmed_hedger(latency=0.01, key="call"):
+    tracker = LatencyTracker(window=50, min_samples=5)
+    for _ in range(5):
+        tracker.record(key, latency)
+    return Hedger("test", min_delay=0.01, tracker=tracker)
+
+def test_slow_primary_is_hedged_and_hedge_wins():
+    async def slow():
+        await asyncio.sleep(1)
+        return "primary"
+
+    async def fast():
+        return "hedge"
+
+    hedger = warmed_hedger()
+    assert asyncio.run(hedger.run("call", slow, fast)) == "hedge"
+    stats = hedger.get_stats()
+    assert stats["hedged"] == 1 and stats["hedge_wins"] == 1 and stats["hedge_rate"] == 1
+
+def test_fast_primary_is_not_hedged():
+    async def fast():
+        return "primary"
+
+    hedger = warmed_hedger(latency=0.5)
+    assert asyncio.run(hedger.run("call", fast, fast)) == "primary"
+    assert hedger.get_stats()["hedged"] == 0
+
+def test_no_hedging_before_enough_samples():
+    assert Hedger("test", tracker=LatencyTracker(min_samples=5)).hedge_delay("call") is None
+
+def test_nested_budgets_only_shrink():
+    async def run():
+        with latency_budget(0.05):
+            with latency_budget(10):
+                assert remaining_budget() <= 0.05
+            await within_budget(asyncio.sleep(1))
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(run())
+    assert remaining_budget() is None
+
+class FakeLimiter:
+    def __init__(self, capacity):
+        self.capacity, self.committed = capacity, 0
+
+    async def reserve(self, key_prefix):
+        if not self.capacity:
+            return None
+        self.capacity -= 1
+        return "token"
+
+    async def commit(self, key_prefix, token):
+        self.committed += 1
+
+    async def release(self, key_prefix, token):
+        self.capacity += 1
+
+def slow_provider(base, name, rate_limited, delay=0.05):
+    from app.integrations.llm_providers import LLMCompletion
+
+    class Slow(base):
+        def __init__(self):
+            self.name, self.rate_limited, self.calls = name, rate_limited, 0
+
+        @property
+        def configured(self):
+            return True
+
+        async def complete(self, prompt, max_tokens=500, temperature=0.7):
+            self.calls += 1
+            await asyncio.sleep(delay)
+            return LLMCompletion(text=prompt, provider=self.name, model="test")
+
+    return Slow()
+
+def test_openai_primary_is_hedged_against_secondary():
+    from app.integrations.llm_providers import HedgedProvider, LLMProvider, OpenAIProvider
+
+    assert OpenAIProvider.rate_limited is False
+    primary = slow_provider(OpenAIProvider, "openai", OpenAIProvider.rate_limited, delay=1)
+    secondary = slow_provider(LLMProvider, "local", rate_limited=False, delay=0)
+    provider = HedgedProvider(primary, secondary, limiter=FakeLimiter(capacity=0))
+    provider.hedger = warmed_hedger(key="complete")
+
+    assert asyncio.run(provider.complete("hi")).provider == "local"
+    assert secondary.calls == 1 and provider.get_hedge_stats()["hedge_wins"] == 1
+
+def test_hedges_to_rate_limited_providers_spend_a_token():
+    from app.integrations.llm_providers import HedgedProvider, LLMProvider
+
+    limited = slow_provider(LLMProvider, "huggingface", rate_limited=True, delay=0.2)
+    limiter = FakeLimiter(capacity=1)
+    provider = HedgedProvider(limited, limiter=limiter)
+    provider.hedger = warmed_hedger(key="complete")
+    asyncio.run(provider.complete("hi"))
+    assert limited.calls == 2 and limiter.committed == 1
+
+    # Without capacity the hedge is skipped and the primary answers alone
+    provider.hedger = warmed_hedger(key="complete")
+    asyncio.run(provider.complete("hi"))
+    assert limited.calls == 3 and limiter.committed == 1
+    assert provider.get_hedge_stats()["refused_hedges"] == 1
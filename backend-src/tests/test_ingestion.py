@@ -0,0 +1,90 @@
+import asyncio
+import io
+import pytest
+from app.analysis.ingestion import ArraySpool, AsyncStreamReader, IngestionError, IngestionStats, ndjson_records, parse_upload, validate_chunk
+
+CSV = b"id,revenue,frequency,recency\n1,100.5,2,30\n2,,3,10\n3,250,-1,5\n4,80,1,400\n5,1200,12,2\n"
+
+async def body(data, piece=7):
+    for start in range(0, len(data), piece):
+        await asyncio.sleep(0)
+        yield data[start:start + piece]
+
+def test_csv_stream_is_parsed_validated_and_spooled_in_chunks():
+    async def run():
+        reader = AsyncStreamReader(body(CSV), asyncio.get_running_loop())
+        stats = IngestionStats()
+        spool = ArraySpool()
+
+        def ingest():
+            chunks = parse_upload(reader, "text/csv; charset=utf-8", chunk_size=2)
+            return [len(chunk) for chunk in spool.tee(validate_chunk(chunk, stats) for chunk in chunks)]
+
+        try:
+            sizes = await asyncio.to_thread(ingest)
+            rows = [row.tolist() for chunk in spool.chunks(2)() for row in chunk]
+        finally:
+            spool.close()
+        return sizes, rows, stats
+
+    sizes, rows, stats = asyncio.run(run())
+    assert sizes == [1, 1, 1]
+    assert rows == [[100.5, 2.0, 30.0], [80.0, 1.0, 400.0], [1200.0, 12.0, 2.0]]
+    assert (stats.rows, stats.rejected, stats.chunks) == (3, 2, 3)
+
+def test_unreadable_uploads_raise_ingestion_errors():
+    with pytest.raises(IngestionError):
+        list(parse_upload(io.BytesIO(b"revenue,frequency\n1,2\n"), "text/csv", chunk_size=10))
+    with pytest.raises(IngestionError):
+        parse_upload(io.BytesIO(b"{}"), "application/json", chunk_size=10)
+
+def test_bad_csv_cells_reject_only_their_rows():
+    data = b"revenue,frequency,recency\n100,2,30\nabc,3,10\n80,1,n/a\n"
+    stats = IngestionStats()
+    rows = [validate_chunk(chunk, stats) for chunk in parse_upload(io.BytesIO(data), "text/csv", chunk_size=10)]
+    assert rows[0].tolist() == [[100.0, 2.0, 30.0]]
+    assert (stats.rows, stats.rejected) == (1, 2)
+
+def arrow_table(pa):
+    return pa.table({
+        "revenue": [100.5, None, 80.0, 1200.0],
+        "frequency": [2, 3, 1, 12],
+        "recency": ["30", "10", "x", "2"],
+        "id": [1, 2, 3, 4]
+    })
+
+def test_parquet_upload_is_read_by_row_group():
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+    buffer = io.BytesIO()
+    pa.parquet.write_table(arrow_table(pa), buffer, row_group_size=2)
+    buffer.seek(0)
+
+    stats = IngestionStats()
+    chunks = [validate_chunk(chunk, stats) for chunk in parse_upload(buffer, "application/vnd.apache.parquet", chunk_size=2)]
+    assert [row for chunk in chunks for row in chunk.tolist()] == [[100.5, 2.0, 30.0], [1200.0, 12.0, 2.0]]
+    assert (stats.rows, stats.rejected, stats.chunks) == (2, 2, 2)
+
+def test_arrow_stream_upload_is_read_batch_by_batch():
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.ipc
+    buffer = io.BytesIO()
+    table = arrow_table(pa)
+    with pa.ipc.new_stream(buffer, table.schema) as writer:
+        writer.write_table(table, max_chunksize=3)
+
+    async def run():
+        reader = AsyncStreamReader(body(buffer.getvalue(), piece=64), asyncio.get_running_loop())
+        return await asyncio.to_thread(lambda: [chunk.shape for chunk in parse_upload(reader, "application/vnd.apache.arrow.stream", chunk_size=2)])
+
+    assert asyncio.run(run()) == [(2, 3), (1, 3), (1, 3)]
+
+    with pytest.raises(IngestionError):
+        list(parse_upload(io.BytesIO(b"not arrow"), "application/vnd.apache.arrow.stream", chunk_size=2))
+
+def test_ndjson_records_are_parsed_line_by_line():
+    data = b'{"id": "a"}\n\n{"id": "b"}\n{"id": \n'
+    records = ndjson_records(io.BytesIO(data), lambda record: record["id"])
+    assert [next(records), next(records)] == ["a", "b"]
+    with pytest.raises(IngestionError, match="Line 4"):
+        next(records)
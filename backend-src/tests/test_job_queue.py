@@ -0,0 +1,28 @@
+import asyncio
+import pytest
+from app.utils.job_queue import DeferredJobQueue
+
+fakeredis = pytest.importorskip("fakeredis")
+
+def test_jobs_left_running_by_a_crashed_worker_are_requeued():
+    async def handler(payload):
+        return {"echo": payload}
+
+    queue = DeferredJobQueue("test", handler)
+    queue.redis_client = fakeredis.FakeRedis(decode_responses=True)
+    job_id = asyncio.run(queue.enqueue({"n": 1}))
+
+    # A worker pops the job and dies before finishing it
+    queue.lease_seconds = -1
+    queue._pop()
+    assert asyncio.run(queue.get_job(job_id))["status"] == "running"
+
+    assert queue.recover_expired() == 1
+    assert queue.recover_expired() == 0
+    assert asyncio.run(queue.get_job(job_id))["status"] == "queued"
+
+    queue.lease_seconds = 60
+    assert asyncio.run(queue.run_once())
+    job = asyncio.run(queue.get_job(job_id))
+    assert (job["status"], job["result"]) == ("completed", {"echo": {"n": 1}})
+    assert not queue.redis_client.zcard(queue.running_key)
@@ -0,0 +1,33 @@
+import asyncio
+from app.services import market_analysis
+from app.services.market_analysis import MarketAnalysisService
+from app.services.sentiment import SENTIMENT_MODEL
+
+class FakeSocialMedia:
+    def __init__(self):
+        self.sentiment_calls = 0
+
+    async def get_market_trends(self):
+        return {"status": "success", "data": []}
+
+    async def analyze_twitter_sentiment(self, query):
+        self.sentiment_calls += 1
+        return {"status": "success", "data": []}
+
+def test_trends_report_sentiment_unavailable_while_model_loads(monkeypatch):
+    loads = []
+    monkeypatch.setattr(market_analysis.model_registry, "is_loaded", lambda name: False)
+    monkeypatch.setattr(market_analysis.model_registry, "load_in_background", loads.append)
+
+    async def insights(industry, location):
+        return {"insights": "steady demand", "confidence": True}
+
+    service = MarketAnalysisService.__new__(MarketAnalysisService)
+    service.social_media = FakeSocialMedia()
+    service._get_ai_market_insights = insights
+
+    response = asyncio.run(service.analyze_market_trends("coffee", "Austin"))
+    assert response["sources"]["sentiment"]["status"] == "unavailable"
+    assert response["sentiment"] is None and response["partial"] is True
+    assert response["market_insights"]["insights"] == "steady demand"
+    assert loads == [SENTIMENT_MODEL] and service.social_media.sentiment_calls == 0
@@ -0,0 +1,37 @@
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+market_analyzer = pytest.importorskip("app.analysis.market_analyzer")
+
+def make_analyzer():
+    analyzer = market_analyzer.MarketAnalyzer.__new__(market_analyzer.MarketAnalyzer)
+    analyzer.profile = SimpleNamespace(monthly_revenue=100000, industry=None)
+    analyzer.market_data = analyzer._fetch_market_data()
+    return analyzer
+
+def test_unlocated_locations_keep_the_baseline_score():
+    analyzer = make_analyzer()
+    unlocated = [SimpleNamespace(id="somewhere")]
+    scores = analyzer._location_scores(
+        analyzer._calculate_market_sizes(unlocated),
+        analyzer._competitor_shares(unlocated),
+        analyzer._forecast_growths(unlocated)
+    )
+    # Market size 1.8M over 100k revenue, a 0.15 competitor share and growth at 1.1x the market rate
+    assert scores[0] == pytest.approx((18 + 0.85 + 1.1) / 3)
+
+    competition = analyzer._analyze_competition(unlocated[0])
+    assert competition.market_share == pytest.approx(0.15)
+    assert competition.threat_level == "high"
+
+def test_indexed_counts_share_the_estimate_scale(monkeypatch):
+    analyzer = make_analyzer()
+    monkeypatch.setattr(market_analyzer.MarketAnalyzer, "_competitors_indexed", staticmethod(lambda: True))
+    monkeypatch.setattr(
+        market_analyzer.competitor_index, "counts",
+        lambda latitudes, longitudes, industry: (np.array([10, 0]), np.array([20, 0]))
+    )
+    located = [SimpleNamespace(id=1, latitude=30.0, longitude=-97.0), SimpleNamespace(id=2, latitude=31.0, longitude=-97.0)]
+    shares = analyzer._competitor_shares(located + [SimpleNamespace(id=3)])
+    assert shares.tolist() == pytest.approx([0.15, 0.0, 0.15])
@@ -0,0 +1,31 @@
+import asyncio
+from app.utils.model_registry import ModelRegistry
+
+def test_concurrent_gets_share_one_lazy_load():
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return "model"
+
+    async def run():
+        registry = ModelRegistry()
+        registry.register("sentiment", loader)
+        assert not registry.is_loaded("sentiment")
+        return await asyncio.gather(*(registry.get("sentiment") for _ in range(5)))
+
+    assert asyncio.run(run()) == ["model"] * 5
+    assert loads == [1]
+
+def test_idle_models_are_unloaded_but_warm_up_models_stay():
+    async def run():
+        registry = ModelRegistry(warm_up=["resident"])
+        registry.register("resident", lambda: "a")
+        registry.register("lazy", lambda: "b")
+        await registry.warm_up()
+        await registry.get("lazy")
+        return registry, registry.unload_idle(max_idle=-1)
+
+    registry, unloaded = asyncio.run(run())
+    assert unloaded == ["lazy"]
+    assert registry.ready() and registry.is_loaded("resident")
@@ -0,0 +1,53 @@
+from app.utils.profile_canonicalizer import (
+    canonicalize_company_profile,
+    parse_money,
+    parse_percent,
+    profile_cache_key,
+    size_bucket,
+    format_money
+)
+
+def test_revenue_formats_parse_to_the_same_amount():
+    assert parse_money("$10M") == parse_money("10M") == parse_money("10000000") == 10_000_000
+    assert parse_money("10 million") == parse_money("$10,000,000") == 10_000_000
+    assert parse_money("500K") == 500_000
+    assert parse_money("5") == 5_000_000  # bare small numbers have always meant millions
+    assert parse_money("lots") is None
+
+def test_growth_rate_formats_parse_to_percent():
+    assert parse_percent("15%") == parse_percent("15") == parse_percent(0.15) == 15
+    assert parse_percent("n/a") is None
+
+def test_size_buckets():
+    assert size_bucket("Medium") == size_bucket("51-200") == size_bucket(120) == "51-200"
+    assert size_bucket("startup") == "1-10"
+    assert size_bucket("1000 employees") == "200+"
+
+def test_equivalent_profiles_share_a_cache_key():
+    first = {
+        "industry": "Tech",
+        "size": "Medium",
+        "revenue": "$10M",
+        "growth_rate": "15%",
+        "target_market": "B2B  SaaS ",
+        "main_products": ["Market Analysis Tool"]
+    }
+    second = {
+        "industry": "information technology",
+        "size": "51-200",
+        "revenue": "10000000",
+        "growth_rate": "15",
+        "target_market": "b2b saas"
+    }
+    assert canonicalize_company_profile(first) == canonicalize_company_profile(second)
+    assert profile_cache_key(canonicalize_company_profile(first)) == profile_cache_key(canonicalize_company_profile(second))
+
+def test_different_profiles_do_not_collide():
+    base = {"industry": "retail", "revenue": "$10M"}
+    other = {"industry": "retail", "revenue": "$12M"}
+    assert profile_cache_key(canonicalize_company_profile(base)) != profile_cache_key(canonicalize_company_profile(other))
+
+def test_format_money():
+    assert format_money(10_000_000.0) == "$10M"
+    assert format_money(750_000.0) == "$750K"
+    assert format_money(None) == "Unknown"
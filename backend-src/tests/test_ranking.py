@@ -0,0 +1,20 @@
+import numpy as np
+from app.analysis.ranking import TopK, batched
+
+def test_top_k_over_batches_matches_a_full_sort():
+    rng = np.random.default_rng(3)
+    scores = rng.normal(size=10_000)
+    scores[5] = np.nan
+    leaders = TopK(7)
+    for batch in batched(range(len(scores)), 999):
+        leaders.push(scores[batch], batch)
+
+    expected = np.argsort(-np.nan_to_num(scores, nan=-np.inf))[:7]
+    assert [item for _, item in leaders.result()] == expected.tolist()
+    assert leaders.seen == 10_000
+    assert len(leaders._items) == 7
+
+def test_fewer_candidates_than_k():
+    leaders = TopK(5)
+    leaders.push(np.array([0.2, 0.9]), ["a", "b"])
+    assert leaders.result() == [(0.9, "b"), (0.2, "a")]
@@ -0,0 +1,20 @@
+import asyncio
+import redis
+from app.utils.rate_limiter import UNRESERVED, RateLimiter
+
+def test_requests_are_allowed_when_redis_is_down():
+    limiter = RateLimiter()
+    # Nothing listens on port 1, so every Redis call fails to connect
+    limiter.redis_client = redis.Redis(host="127.0.0.1", port=1, socket_connect_timeout=0.1)
+
+    async def run():
+        quota = await limiter.get_quota("test_api")
+        reservation = await limiter.reserve("test_api")
+        committed = await limiter.commit("test_api", reservation)
+        await limiter.release("test_api", reservation)
+        return quota, reservation, committed
+
+    quota, reservation, committed = asyncio.run(run())
+    assert quota["can_make_request"]
+    assert reservation == UNRESERVED
+    assert committed
@@ -0,0 +1,22 @@
+from app.analysis.scenarios import ScenarioAssumptions, ScenarioEngine
+
+ASSUMPTIONS = ScenarioAssumptions(market_size=1_000_000, monthly_revenue=50_000, growth_mean=0.1, growth_sd=0.05)
+
+def test_seeded_simulations_are_reproducible():
+    engine = ScenarioEngine(n_paths=20_000, horizon_years=3)
+    first = engine.simulate(ASSUMPTIONS, seed=42)
+    second = engine.simulate(ASSUMPTIONS, seed=42)
+    assert first["market_size"] == second["market_size"]
+    assert first["location_score"] == second["location_score"]
+    assert engine.simulate(ASSUMPTIONS, seed=7)["market_size"] != first["market_size"]
+
+def test_bands_are_ordered_and_growth_slows_near_saturation():
+    engine = ScenarioEngine(n_paths=20_000, horizon_years=3)
+    result = engine.simulate(ASSUMPTIONS, seed=1)
+    bands = result["market_size"]
+    assert len(bands["p50"]) == 4
+    assert all(low <= high for low, high in zip(bands["p5"], bands["p95"]))
+    assert bands["p50"][0] == 1_000_000
+
+    saturated = engine.simulate(ScenarioAssumptions(**{**ASSUMPTIONS.__dict__, "saturation_mean": 0.95}), seed=1)
+    assert saturated["annual_growth"]["p50"] < result["annual_growth"]["p50"]
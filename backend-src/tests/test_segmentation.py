@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from app.analysis.segmentation import FEATURES, SegmentationEngine, array_chunks
+
+def make_customers(rows_per_group=500):
+    rng = np.random.default_rng(0)
+    centers = np.array([[100.0, 2.0, 300.0], [400.0, 20.0, 150.0], [700.0, 40.0, 10.0]])
+    return np.concatenate([center * rng.lognormal(0.0, 0.1, (rows_per_group, 3)) for center in centers])
+
+def test_chunked_fit_finds_groups_and_reports_progress():
+    X = make_customers()
+    stages = []
+    engine = SegmentationEngine(n_clusters=3, chunk_size=200, progress=lambda stage, done, total: stages.append((stage, done, total)))
+    result = engine.fit_chunks(array_chunks(X, 200), len(X))
+
+    assert sorted(result.segment_sizes) == [500, 500, 500]
+    assert len(result.labels) == len(X)
+    assert ("labelling", len(X), len(X)) in stages
+    # Centers come back in original units, not standardized ones
+    assert result.centers[:, 0].max() > 600
+
+def test_auto_k_picks_the_number_of_groups():
+    result = SegmentationEngine(n_clusters=None, chunk_size=200, sample_size=600).fit(make_customers())
+    assert result.k == 3
+    assert set(result.to_dict()["k_scores"]) == set(range(2, 9))
+
+def test_stored_model_assigns_like_the_fit():
+    from app.analysis.segmentation import SegmentationModel
+    from app.services.segment_models import population_stability
+
+    X = make_customers()
+    engine = SegmentationEngine(n_clusters=3)
+    result = engine.fit(X)
+    model = SegmentationModel.from_dict(SegmentationModel.from_fit(engine, result).to_dict())
+
+    labels, distances = model.assign(X)
+    assert (labels == result.labels).all()
+    assert abs(distances.mean() - model.baseline_distance) < 1e-9
+    assert population_stability(model.baseline_shares, model.baseline_shares) == 0
+
+def test_saving_a_version_drops_the_superseded_one():
+    fakeredis = pytest.importorskip("fakeredis")
+    from app.analysis.segmentation import SegmentationModel
+    from app.services.segment_models import SegmentModelStore
+
+    store = SegmentModelStore(check_interval=0)
+    store.redis_client = fakeredis.FakeRedis(decode_responses=True)
+    X = make_customers()
+    engine = SegmentationEngine(n_clusters=3)
+    result = engine.fit(X)
+    store.save("shops", SegmentationModel.from_fit(engine, result))
+    store.assign("shops", [dict(zip(FEATURES, row)) for row in X[:10].tolist()])
+    assert store.redis_client.exists("segments:shops:v1:drift", "segments:shops:v1:sample") == 2
+
+    store.save("shops", SegmentationModel.from_fit(engine, result))
+    assert store.redis_client.exists("segments:shops:v1:drift", "segments:shops:v1:sample") == 0
+    assert store.load("shops", 1).version == 1
+    assert store.load("shops").version == 2 and store.get_stats()["models_in_memory"] == 1
@@ -0,0 +1,18 @@
+from app.services.sentiment import SentimentScorer
+
+def fake_model(texts, batch_size, truncation):
+    return [{"label": "POSITIVE" if "good" in text else "NEGATIVE", "score": 0.8} for text in texts]
+
+def test_length_sorted_passes_keep_input_order():
+    scorer = SentimentScorer(model_batch_size=2)
+    texts = ["good " * 5, "bad", "good", "bad " * 9, "good " * 2]
+    scores = scorer._run_model(fake_model, texts)
+    assert [score["label"] for score in scores] == ["positive", "negative", "positive", "negative", "positive"]
+    assert scorer.get_stats()["forward_passes"] == 3
+
+def test_aggregate_polarity():
+    scores = [{"label": "positive", "score": 0.9}, {"label": "negative", "score": 0.5}]
+    aggregate = SentimentScorer.aggregate(scores)
+    assert aggregate["labels"] == {"positive": 1, "negative": 1}
+    assert aggregate["polarity"] == 0.2 and aggregate["label"] == "positive"
+    assert SentimentScorer.aggregate([])["count"] == 0
@@ -0,0 +1,24 @@
+import asyncio
+import redis
+from app.utils.shared_cache import SharedTTLCache
+
+def test_keys_are_loaded_directly_when_redis_is_down():
+    loads = []
+
+    async def loader(key):
+        loads.append(key)
+        return {"location": key}
+
+    cache = SharedTTLCache("test", loader)
+    # Nothing listens on port 1, so every Redis call fails to connect
+    cache.redis_client = redis.Redis(host="127.0.0.1", port=1, socket_connect_timeout=0.1)
+
+    async def run():
+        await cache.start()
+        try:
+            return await cache.get("1")
+        finally:
+            await cache.stop()
+
+    assert asyncio.run(run()) == {"location": "1"}
+    assert loads == ["1"] and cache.get_stats()["upstream_calls"] == 1
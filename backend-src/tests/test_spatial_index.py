@@ -0,0 +1,72 @@
+import threading
+import time
+import numpy as np
+from app.analysis.spatial_index import CompetitorIndex, SpatialIndex, arc_km, to_unit_vectors
+
+def brute_force_count(latitudes, longitudes, latitude, longitude, radius_km):
+    distances = arc_km(np.linalg.norm(to_unit_vectors(latitudes, longitudes) - to_unit_vectors(latitude, longitude), axis=1))
+    return int((distances <= radius_km).sum())
+
+def test_incremental_changes_match_a_brute_force_count():
+    rng = np.random.default_rng(0)
+    latitudes, longitudes = rng.uniform(51.3, 51.7, 2000), rng.uniform(-0.4, 0.2, 2000)
+    index = SpatialIndex(rebuild_fraction=0.5)
+    index.build({str(i): (latitudes[i], longitudes[i]) for i in range(2000)})
+
+    for i in range(100):  # Move some points to the query location, delete others
+        index.upsert(str(i), 51.5, -0.1)
+        latitudes[i], longitudes[i] = 51.5, -0.1
+    for i in range(100, 150):
+        index.remove(str(i))
+    keep = np.r_[0:100, 150:2000]
+
+    queries = to_unit_vectors([51.5, 51.4], [-0.1, 0.0])
+    expected = [brute_force_count(latitudes[keep], longitudes[keep], lat, lon, 3.0) for lat, lon in [(51.5, -0.1), (51.4, 0.0)]]
+    assert index.count_within(queries, 3.0).tolist() == expected
+    assert len(index) == 1950
+    assert index.rebuilds == 1  # Changes stayed in the delta
+
+    index.rebuild()
+    assert index.count_within(queries, 3.0).tolist() == expected
+    assert index.nearest(51.5, -0.1, 3)[0][1] == 0.0
+
+def test_competitors_split_into_direct_and_indirect_by_industry():
+    index = CompetitorIndex(radius_km=2.0, refresh_seconds=float("inf"))
+    index.load([
+        {"id": "a", "latitude": 40.0, "longitude": -74.0, "industry": "Cafe"},
+        {"id": "b", "latitude": 40.001, "longitude": -74.0, "industry": "cafe"},
+        {"id": "c", "latitude": 40.002, "longitude": -74.0, "industry": "gym"},
+        {"id": "d", "latitude": 41.0, "longitude": -74.0, "industry": "cafe"}
+    ])
+    stats = index.competition(40.0, -74.0, "cafe")
+    assert (stats.direct, stats.indirect) == (2, 1)
+    assert [point_id for point_id, _ in stats.nearest[:3]] == ["a", "b", "c"]
+
+    index.apply([{"id": "c", "latitude": 40.0, "longitude": -74.0, "industry": "cafe"}, {"id": "a", "deleted": True}])
+    direct, indirect = index.counts([40.0, 41.0], [-74.0, -74.0], "cafe")
+    assert direct.tolist() == [2, 1] and indirect.tolist() == [0, 0]
+
+def test_concurrent_refreshes_sync_once():
+    class SlowRedis:
+        def __init__(self):
+            self.syncs = 0
+
+        def zrangebyscore(self, key, low, high, withscores=False):
+            self.syncs += 1
+            time.sleep(0.05)
+            return [("a", 1.0)]
+
+        def hmget(self, key, ids):
+            return ['{"id": "a", "latitude": 40.0, "longitude": -74.0, "industry": "cafe"}']
+
+    index = CompetitorIndex(refresh_seconds=60)
+    index.redis_client = SlowRedis()
+    threads = [threading.Thread(target=index.refresh) for _ in range(4)]
+    # Every thread passes the staleness check and queues on the lock before any refresh runs
+    with index._lock:
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+    for thread in threads:
+        thread.join()
+    assert index.redis_client.syncs == 1 and len(index) == 1
@@ -0,0 +1,36 @@
+import asyncio
+import time
+from app.utils.rate_limiter import TokenBudget
+
+def test_calls_within_budget_do_not_wait():
+    async def run():
+        budget = TokenBudget(tokens_per_minute=1000)
+        for _ in range(4):
+            await budget.acquire(200)
+        return budget.get_stats()
+
+    stats = asyncio.run(run())
+    assert stats["waits"] == 0 and stats["tokens_in_window"] == 800
+
+def test_over_budget_call_queues_until_the_window_frees_up():
+    async def run():
+        budget = TokenBudget(tokens_per_minute=100, window=0.1)
+        await budget.acquire(80)
+        started = time.monotonic()
+        await budget.acquire(50)
+        return time.monotonic() - started, budget.get_stats()
+
+    waited, stats = asyncio.run(run())
+    assert waited >= 0.09
+    assert stats["waits"] == 1
+
+def test_settle_replaces_the_estimate():
+    async def run():
+        budget = TokenBudget(tokens_per_minute=100)
+        entry = await budget.acquire(90)
+        budget.settle(entry, 30)
+        await budget.acquire(60)
+        return budget.get_stats()
+
+    stats = asyncio.run(run())
+    assert stats["waits"] == 0 and stats["tokens_in_window"] == 90
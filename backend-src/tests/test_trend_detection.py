@@ -0,0 +1,28 @@
+from app.analysis.trend_detection import CountMinSketch, SpaceSaving, TrendEngine, tokenize
+
+def test_tokenize_drops_urls_and_stopwords():
+    assert tokenize("The new #AI tool is great https://t.co/x @acme") == ["#ai", "tool", "great", "@acme"]
+
+def test_count_min_sketch_never_undercounts():
+    sketch = CountMinSketch(width=64, depth=4)
+    for i in range(500):
+        sketch.add(f"term{i % 50}")
+    assert all(sketch.estimate(f"term{i}") >= 10 for i in range(50))
+
+def test_space_saving_keeps_heavy_hitters():
+    counters = SpaceSaving(k=5)
+    for i in range(1000):
+        counters.add("hot" if i % 3 == 0 else f"noise{i}")
+    assert counters.top(1)[0][0] == "hot"
+    assert len(counters.counters) == 5
+
+def test_rising_term_is_flagged_as_emerging():
+    engine = TrendEngine(bucket_seconds=60, buckets=10, recent_buckets=2, min_count=5, rise_ratio=3.0)
+    for minute in range(8):
+        engine.add_texts("saas", ["pricing churn onboarding"] * 5, timestamp=minute * 60)
+    for minute in range(8, 10):
+        engine.add_texts("saas", ["pricing agents agents"] * 10, timestamp=minute * 60)
+
+    emerging = engine.emerging_terms("saas", timestamp=9 * 60)
+    assert [entry["term"] for entry in emerging] == ["agents"]
+    assert engine.top_terms("saas", 1, timestamp=9 * 60)[0]["term"] in ("agents", "pricing")
@@ -0,0 +1,18 @@
+import asyncio
+import time
+import httpx
+import pytest
+from app.integrations.twitter_collector import RateLimitWindow
+
+def test_spent_window_without_reset_header_waits_a_minute():
+    window = RateLimitWindow("test")
+    window.update(httpx.Response(200, headers={"x-rate-limit-limit": "5", "x-rate-limit-remaining": "0"}))
+    assert 59 < window.reset_at - time.time() <= 60
+
+    # Waits for the assumed reset instead of failing on a missing one
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(asyncio.wait_for(window.acquire(), timeout=0.05))
+
+    window.reset_at = time.time() - 1
+    asyncio.run(window.acquire())
+    assert window.remaining == 4